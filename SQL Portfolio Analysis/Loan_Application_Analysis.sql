@@ -1,3 +1,8 @@
+-- The aggregate reports below are also kept incrementally by
+-- app/portfolio.py (same report columns), updated per scored batch
+-- instead of re-scanning loan_applications:
+--   python portfolio.py report --all --db portfolio.sqlite
+
 SELECT * FROM Projects.loan_applications;
 
  -- Customer Demographics Overview
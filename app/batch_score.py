@@ -0,0 +1,334 @@
+"""
+Sharded, multi-process batch scoring for portfolio re-scores.
+
+    python batch_score.py applications.parquet scored/ --workers 8 --chunk-rows 100000
+
+The input (CSV, Parquet or Arrow IPC) is read sequentially in shards of
+--chunk-rows rows; unless --keep-columns, only the fields scoring needs
+are read. Each shard is scored in a worker process that loads the model
+once, and is written to <output>/part-<shard>.parquet (or .arrow with
+--output-format arrow). Files are written under a temporary name and
+renamed on completion, so an interrupted run can be re-started with
+--resume and only the missing shards are scored again.
+With --explain, declined rows (PD above the decision threshold, or
+--explain-min-pd) get a Reasons column from batched TreeSHAP (explain.py).
+With --portfolio-db, each worker also reduces its shard to portfolio
+segment summaries (portfolio.py), which are merged into that store once
+per shard; a shard is never counted twice, even across --resume.
+With --drift-report, every shard's drift histograms (drift.py) are summed
+and the PSI / CSI of the scored rows against the model's training
+baseline is written to that JSON file (shards skipped by --resume are
+not included).
+Read Parquet output back with pd.read_parquet(<output>).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pandas as pd
+
+from columnar import FORMAT_SUFFIX, SCORING_COLUMNS, format_for_path, iter_frames, write_frame
+from drift import DriftMonitor, load_baseline
+from explain import Explainer
+from features import resolve_reference_date
+from metrics import stage, stage_totals
+from native_scorer import NativeScorer
+from portfolio import PortfolioAnalytics, PortfolioStore
+from scoring import MODEL_DIR, MODEL_FILE, load_compiled_scorer, load_model, load_model_config, score_new_applications
+
+# =====================================================
+# 1. Settings
+# =====================================================
+
+DEFAULT_CHUNK_ROWS = 100_000
+OUTPUT_COLUMNS = ["PD_Default", "Default_Pred", "Risk_Band"]
+ID_COLUMNS = ["Customer_ID"]
+
+# Job settings that must match for --resume to reuse completed shards
+JOB_FILE = "_job.json"
+RESUME_KEYS = (
+    "input", "model_file", "chunk_rows", "reference_date", "keep_columns", "output_format",
+    "explain", "explain_min_pd",
+)
+
+OUTPUT_FORMATS = ("parquet", "arrow")
+
+
+def shard_path(out_dir: Path, shard: int, fmt: str = "parquet") -> Path:
+    return out_dir / f"part-{shard:05d}{FORMAT_SUFFIX[fmt]}"
+
+
+# =====================================================
+# 2. Input
+# =====================================================
+
+def iter_input_shards(path: Path, chunk_rows: int, keep_columns: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Read CSV, Parquet or Arrow IPC in chunk_rows-row shards without loading
+    the whole file. Unless keep_columns, only the scoring fields are read.
+    """
+    columns = None if keep_columns else SCORING_COLUMNS
+    yield from iter_frames(path, format_for_path(path), chunk_rows, columns=columns)
+
+
+# =====================================================
+# 3. Worker process
+# =====================================================
+
+_worker_state = {}
+
+
+def _init_worker(
+    model_file: str,
+    threads: int,
+    reference_date: str,
+    keep_columns: bool,
+    output_format: str,
+    portfolio: bool,
+    explain: bool,
+    explain_min_pd: Optional[float],
+    drift: bool,
+):
+    """
+    Runs once per worker: load the pipeline and its decision config.
+    Model threads are capped so workers do not oversubscribe the cores.
+    """
+    pipe = load_model(model_file)
+    if isinstance(pipe, NativeScorer):
+        pipe.set_threads(threads)
+    else:
+        model = pipe.named_steps["model"]
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=threads)
+
+    _worker_state.update(
+        pipe=pipe,
+        config=load_model_config(model_file),
+        reference_date=reference_date,
+        keep_columns=keep_columns,
+        output_format=output_format,
+        portfolio=portfolio,
+        explainer=Explainer(load_compiled_scorer(model_file)) if explain else None,
+        explain_min_pd=explain_min_pd,
+        drift=drift,
+    )
+
+
+def score_shard(shard: int, df: pd.DataFrame, out_dir: str) -> tuple:
+    """
+    Score one shard and write it atomically. Returns (shard, rows, seconds,
+    worker pid, cumulative per-stage seconds in that worker, portfolio
+    summaries as a dict or None, drift histogram counts or None).
+    """
+    start = time.perf_counter()
+    state = _worker_state
+    monitor = DriftMonitor(state["config"]["risk_band_labels"]) if state["drift"] else None
+    scored = score_new_applications(
+        df, state["pipe"], state["config"],
+        reference_date=state["reference_date"],
+        explainer=state["explainer"],
+        explain_min_pd=state["explain_min_pd"],
+        drift=monitor,
+    )
+
+    portfolio = None
+    if state["portfolio"]:
+        with stage("portfolio", "batch"):
+            portfolio = PortfolioAnalytics.from_frame(scored).to_dict()
+
+    if not state["keep_columns"]:
+        keep = [c for c in ID_COLUMNS + OUTPUT_COLUMNS + ["Reasons"] if c in scored.columns]
+        scored = scored[keep]
+
+    final = shard_path(Path(out_dir), shard, state["output_format"])
+    tmp = final.with_name(final.name + ".tmp")
+    with stage("write", "batch"):
+        write_frame(scored, tmp, state["output_format"])
+        os.replace(tmp, final)
+    drift_counts = monitor.total if monitor is not None else None
+    return shard, len(scored), time.perf_counter() - start, os.getpid(), stage_totals(), portfolio, drift_counts
+
+
+# =====================================================
+# 4. Driver
+# =====================================================
+
+def _prepare_output(out_dir: Path, job: dict, resume: bool) -> dict:
+    """
+    Create the output directory and record the job settings. With resume,
+    the stored settings win (in particular the reference date), and a
+    mismatch on anything else is an error rather than a mixed output.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    job_path = out_dir / JOB_FILE
+
+    if job_path.exists():
+        if not resume:
+            raise SystemExit(f"{out_dir} already holds a scoring job; use --resume or a new directory")
+        stored = json.loads(job_path.read_text())
+        # Jobs started before these settings existed
+        stored.setdefault("output_format", "parquet")
+        stored.setdefault("explain", False)
+        stored.setdefault("explain_min_pd", None)
+        if job["reference_date_arg"] is None:
+            job["reference_date"] = stored["reference_date"]
+        clashes = [k for k in RESUME_KEYS if stored.get(k) != job[k]]
+        if clashes:
+            raise SystemExit(f"Cannot resume: settings differ from the original job: {clashes}")
+    else:
+        for stale in out_dir.glob("part-*"):
+            stale.unlink()
+
+    job_path.write_text(json.dumps({k: job[k] for k in RESUME_KEYS}, indent=2))
+    return job
+
+
+def run(
+    input_path: Path,
+    out_dir: Path,
+    workers: int,
+    chunk_rows: int,
+    model_file: str = MODEL_FILE,
+    reference_date: Optional[str] = None,
+    keep_columns: bool = False,
+    resume: bool = False,
+    output_format: str = "parquet",
+    portfolio_db: Optional[Path] = None,
+    explain: bool = False,
+    explain_min_pd: Optional[float] = None,
+    drift_report: Optional[Path] = None,
+) -> dict:
+    """
+    Score input_path into out_dir and return a run summary.
+    """
+    job = _prepare_output(out_dir, {
+        "input": str(input_path.resolve()),
+        "model_file": model_file,
+        "chunk_rows": chunk_rows,
+        "reference_date_arg": reference_date,
+        "reference_date": resolve_reference_date(reference_date).date().isoformat(),
+        "keep_columns": keep_columns,
+        "output_format": output_format,
+        "explain": explain,
+        "explain_min_pd": explain_min_pd,
+    }, resume)
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    init_args = (
+        model_file, threads, job["reference_date"], keep_columns, output_format,
+        portfolio_db is not None, explain, explain_min_pd, drift_report is not None,
+    )
+    store = PortfolioStore(portfolio_db) if portfolio_db is not None else None
+    drift = None
+    if drift_report is not None:
+        drift = DriftMonitor(
+            load_model_config(model_file)["risk_band_labels"], load_baseline(MODEL_DIR / model_file)
+        )
+
+    start = time.perf_counter()
+    rows_scored = shards_scored = shards_skipped = 0
+    pending = deque()
+    worker_stages = {}
+
+    def collect(future):
+        nonlocal rows_scored, shards_scored
+        shard, n_rows, seconds, pid, stages, portfolio, drift_counts = future.result()
+        worker_stages[pid] = stages
+        if drift is not None:
+            drift.add(drift_counts, n_rows)
+        if store is not None:
+            # Keyed by input and shard layout, not model: a re-score of the
+            # same applicants does not add them to the portfolio again
+            store.merge(PortfolioAnalytics.from_dict(portfolio), f"{job['input']}:{chunk_rows}:{shard}")
+        rows_scored += n_rows
+        shards_scored += 1
+        elapsed = time.perf_counter() - start
+        print(
+            f"shard {shard:05d}: {n_rows} rows in {seconds:.2f}s "
+            f"({rows_scored / elapsed:,.0f} rows/s overall)",
+            file=sys.stderr,
+        )
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+        for shard, df in enumerate(iter_input_shards(input_path, chunk_rows, keep_columns)):
+            if resume and shard_path(out_dir, shard, output_format).exists():
+                shards_skipped += 1
+                continue
+            pending.append(pool.submit(score_shard, shard, df, str(out_dir)))
+            # Bound read-ahead: at most two shards per worker held in memory
+            if len(pending) >= 2 * workers:
+                collect(pending.popleft())
+        while pending:
+            collect(pending.popleft())
+    if store is not None:
+        store.close()
+    if drift is not None:
+        drift_report.write_text(json.dumps(
+            {"input": job["input"], "rows": drift.rows, **drift.compare(drift.total)}, indent=2
+        ))
+
+    elapsed = time.perf_counter() - start
+    stage_seconds = {}
+    for stages in worker_stages.values():
+        for name, seconds in stages.items():
+            stage_seconds[name] = stage_seconds.get(name, 0.0) + seconds
+    return {
+        "rows_scored": rows_scored,
+        "shards_scored": shards_scored,
+        "shards_skipped": shards_skipped,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows_scored / elapsed, 1) if elapsed > 0 else None,
+        "workers": workers,
+        # Wall time per stage inside the workers, summed over workers
+        "stage_seconds": {name: round(v, 3) for name, v in sorted(stage_seconds.items())},
+        "reference_date": job["reference_date"],
+        "output": str(out_dir),
+        "portfolio_db": str(portfolio_db) if portfolio_db is not None else None,
+        "drift_report": str(drift_report) if drift_report is not None else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded multi-process PD batch scoring.")
+    parser.add_argument("input", type=Path, help="CSV, Parquet or Arrow IPC file of raw applications")
+    parser.add_argument("output", type=Path, help="Output directory for part-* shards")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per shard")
+    parser.add_argument("--model-file", default=MODEL_FILE, help="Pickle or .native artefact in MODEL_DIR")
+    parser.add_argument("--reference-date", help="Date App_Vintage is measured from (YYYY-MM-DD)")
+    parser.add_argument("--keep-columns", action="store_true", help="Write input columns alongside scores")
+    parser.add_argument("--resume", action="store_true", help="Skip shards already written to output")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="parquet", help="Shard file format")
+    parser.add_argument("--portfolio-db", type=Path, help="Fold scored shards into this portfolio store")
+    parser.add_argument("--explain", action="store_true", help="Add adverse-action Reasons for declined rows")
+    parser.add_argument("--explain-min-pd", type=float, help="Explain rows above this PD (default: decision threshold)")
+    parser.add_argument("--drift-report", type=Path, help="Write PSI / CSI against the training baseline here")
+    args = parser.parse_args(argv)
+
+    summary = run(
+        args.input,
+        args.output,
+        workers=max(1, args.workers),
+        chunk_rows=args.chunk_rows,
+        model_file=args.model_file,
+        reference_date=args.reference_date,
+        keep_columns=args.keep_columns,
+        resume=args.resume,
+        output_format=args.output_format,
+        portfolio_db=args.portfolio_db,
+        explain=args.explain,
+        explain_min_pd=args.explain_min_pd,
+        drift_report=args.drift_report,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
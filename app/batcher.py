@@ -0,0 +1,180 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Set
+
+# =====================================================
+# Async micro-batcher for single-record requests
+# =====================================================
+
+# Upper bounds of the batch-size histogram buckets (last bucket is open)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _fail_closed(entry: tuple):
+    future = entry[1]
+    if not future.done():
+        future.set_exception(RuntimeError("The micro-batcher is closed"))
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into batches.
+
+    submit() queues an item and awaits its own result. A collector task
+    takes the first queued item, then keeps collecting until max_batch
+    items are waiting or max_wait_ms has passed since that first item,
+    and hands the batch to score_many(items) -> results (same order) in
+    the executor, off the event loop. Up to max_concurrent batches run at
+    once; while they are all busy, new requests pile up into the next
+    (larger) batch instead of waiting behind many tiny ones.
+
+    close() lets the batches already being scored finish; requests not
+    yet handed to score_many fail with RuntimeError.
+    """
+
+    def __init__(
+        self,
+        score_many: Callable[[list], list],
+        max_batch: int = 64,
+        max_wait_ms: float = 2.0,
+        executor: Optional[Executor] = None,
+        max_concurrent: int = 2,
+    ):
+        self.score_many = score_many
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.executor = executor
+        self.max_concurrent = max(1, max_concurrent)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        # Running flushes, referenced until done so none is collected mid-batch
+        self._flushes: Set[asyncio.Task] = set()
+
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.wait_seconds_total = 0.0
+
+    # -----------------------------
+    # Caller side
+    # -----------------------------
+    async def submit(self, item):
+        """
+        Queue item and wait for its result (exceptions from score_many are
+        raised here, for every caller in the failed batch).
+        """
+        if self._task is None:
+            self._start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    def _start(self):
+        # Bound to the running loop on first use (the loop does not exist at import)
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._task = asyncio.get_running_loop().create_task(self._collect())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            while not self._queue.empty():
+                _fail_closed(self._queue.get_nowait())
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    # -----------------------------
+    # Collector
+    # -----------------------------
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.max_wait
+
+                while len(batch) < self.max_batch:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                # Closed while collecting: the batch will never be scored
+                for entry in batch:
+                    _fail_closed(entry)
+                raise
+            # Anything that arrived while waiting for a slot joins this batch
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            flush = loop.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list):
+        loop = asyncio.get_running_loop()
+        try:
+            live = [entry for entry in batch if not entry[1].done()]
+            if not live:
+                return
+            self._record(live)
+            try:
+                results = await loop.run_in_executor(self.executor, self.score_many, [e[0] for e in live])
+            except Exception as e:
+                with self._stats_lock:
+                    self.failed_batches += 1
+                for _, future, _ in live:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future, _), result in zip(live, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def _record(self, live: List[tuple]):
+        now = time.perf_counter()
+        size = len(live)
+        bucket = next((i for i, b in enumerate(BATCH_SIZE_BUCKETS) if size <= b), len(BATCH_SIZE_BUCKETS))
+        with self._stats_lock:
+            self.requests += size
+            self.batches += 1
+            self.histogram[bucket] += 1
+            self.wait_seconds_total += sum(now - queued_at for _, _, queued_at in live)
+
+    def stats(self) -> dict:
+        labels = [str(b) for b in BATCH_SIZE_BUCKETS] + ["+Inf"]
+        with self._stats_lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "requests": self.requests,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else None,
+                "mean_queue_wait_ms": (
+                    round(self.wait_seconds_total / self.requests * 1000, 3) if self.requests else None
+                ),
+                # Batches per size bucket, keyed by the bucket's upper bound
+                "batch_size_histogram": dict(zip(labels, self.histogram)),
+            }
@@ -0,0 +1,312 @@
+import io
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from features import CATEGORICAL_FIELDS, DATE_FIELD, NUMERIC_FIELDS, RAW_FIELDS
+from schema import NUMERIC_DTYPES, conform_frame, numeric
+
+# =====================================================
+# 1. Formats and schema
+# =====================================================
+
+FORMATS = ("csv", "parquet", "arrow")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "json": "application/json",
+}
+_MEDIA_ALIASES = {
+    "application/x-parquet": "parquet",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/x-arrow": "arrow",
+}
+
+SUFFIXES = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+FORMAT_SUFFIX = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+ID_FIELD = "Customer_ID"
+
+# Fields the scoring pipeline reads (the projection for scoring-only reads)
+SCORING_COLUMNS = [ID_FIELD] + RAW_FIELDS
+
+# Declared up front so no reader re-infers them: numerics in their compact
+# dtypes (schema.py), low-cardinality labels as categoricals (then given
+# their fixed levels by conform_frame), the date as text (parsed once by
+# feature engineering)
+INPUT_DTYPES = {
+    **NUMERIC_DTYPES,
+    **{c: "category" for c in CATEGORICAL_FIELDS},
+    DATE_FIELD: "str",
+}
+_ARROW_NUMERIC = {c: pa.from_numpy_dtype(np.dtype(dtype)) for c, dtype in NUMERIC_DTYPES.items()}
+_ARROW_DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+
+
+def format_for_media_type(content_type: Optional[str]) -> str:
+    """
+    Format name for a Content-Type / Accept media type (json if unset).
+    """
+    media = (content_type or MEDIA_TYPES["json"]).split(";")[0].strip().lower()
+    for fmt, known in MEDIA_TYPES.items():
+        if media == known:
+            return fmt
+    if media in _MEDIA_ALIASES:
+        return _MEDIA_ALIASES[media]
+    raise ValueError(f"Unsupported content type: {media}")
+
+
+def format_for_path(path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix not in SUFFIXES:
+        raise ValueError(f"Unsupported file type: {suffix or path}")
+    return SUFFIXES[suffix]
+
+
+def input_files(paths: Iterable[Path]) -> List[Path]:
+    """
+    Files to read for a list of paths: directories (e.g. batch_score.py
+    output) contribute their part-* shards in order.
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.glob("part-*") if p.suffix.lower() in SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+# =====================================================
+# 2. Readers
+# =====================================================
+
+def _arrow_to_pandas(data) -> pd.DataFrame:
+    """
+    Table / RecordBatch to pandas with the declared dtypes. Numeric
+    columns are cast in Arrow; split_blocks keeps one block per column, so
+    null-free float buffers are not consolidated into a 2-D copy.
+    """
+    arrays = []
+    for field, column in zip(data.schema, data.columns):
+        if field.name in NUMERIC_FIELDS and field.type != _ARROW_NUMERIC[field.name]:
+            try:
+                column = column.cast(_ARROW_NUMERIC[field.name])
+            except pa.ArrowInvalid:
+                # Text that is not a number: name the rows, as for JSON
+                column = pa.array(numeric(column.to_pandas(), field.name))
+        elif field.name in CATEGORICAL_FIELDS and not pa.types.is_dictionary(field.type):
+            column = column.cast(pa.string()).dictionary_encode()
+        arrays.append(column)
+
+    build = pa.Table.from_arrays if isinstance(data, pa.Table) else pa.RecordBatch.from_arrays
+    return conform_frame(build(arrays, names=data.schema.names).to_pandas(split_blocks=True))
+
+
+def _projection(available: Iterable[str], columns: Optional[List[str]]) -> Optional[List[str]]:
+    if columns is None:
+        return None
+    available = list(available)
+    return [c for c in columns if c in available]
+
+
+def _open_arrow(source):
+    """
+    Arrow IPC reader for a path, bytes or file object; the file (random
+    access) format is memory-mapped when given a path.
+    """
+    if isinstance(source, (str, Path)):
+        source = pa.memory_map(str(source))
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        source = pa.BufferReader(source)
+    try:
+        return ipc.open_file(source)
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return ipc.open_stream(source)
+
+
+def _arrow_batches(reader):
+    if isinstance(reader, ipc.RecordBatchFileReader):
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+    else:
+        yield from reader
+
+
+def _csv_source(source):
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+
+
+def _csv_kwargs(columns: Optional[List[str]], numeric_dtypes: bool = True) -> dict:
+    dtypes = INPUT_DTYPES if numeric_dtypes else {c: d for c, d in INPUT_DTYPES.items() if c not in NUMERIC_DTYPES}
+    kwargs = {"dtype": dtypes}
+    if columns is not None:
+        wanted = set(columns)
+        kwargs["usecols"] = lambda c: c in wanted
+    return kwargs
+
+
+def read_frame(source, fmt: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Whole CSV / Parquet / Arrow IPC input (path, bytes or file object) as a
+    DataFrame with the declared dtypes. With columns, only those that exist
+    in the input are read.
+    """
+    if fmt == "csv":
+        try:
+            return conform_frame(pd.read_csv(_csv_source(source), **_csv_kwargs(columns)))
+        except ValueError:
+            # A numeric field that is not all numbers: read it as text
+            # again so conform_frame names the bad rows
+            if hasattr(source, "seek"):
+                source.seek(0)
+            return conform_frame(pd.read_csv(_csv_source(source), **_csv_kwargs(columns, numeric_dtypes=False)))
+    if fmt == "parquet":
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = pa.BufferReader(source)
+        parquet = pq.ParquetFile(source)
+        return _arrow_to_pandas(parquet.read(columns=_projection(parquet.schema_arrow.names, columns)))
+    if fmt == "arrow":
+        table = _open_arrow(source).read_all()
+        projection = _projection(table.schema.names, columns)
+        return _arrow_to_pandas(table if projection is None else table.select(projection))
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def iter_frames(source, fmt: str, chunk_rows: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    read_frame in chunks of at most chunk_rows rows, without loading the
+    whole input (Arrow IPC batches are yielded as written, split if larger).
+    """
+    if fmt == "csv":
+        for chunk in pd.read_csv(_csv_source(source), chunksize=chunk_rows, **_csv_kwargs(columns)):
+            yield conform_frame(chunk)
+    elif fmt == "parquet":
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = pa.BufferReader(source)
+        parquet = pq.ParquetFile(source)
+        projection = _projection(parquet.schema_arrow.names, columns)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=projection):
+            yield _arrow_to_pandas(batch)
+    elif fmt == "arrow":
+        reader = _open_arrow(source)
+        projection = _projection(reader.schema.names, columns)
+        for batch in _arrow_batches(reader):
+            if projection is not None:
+                batch = batch.select(projection)
+            for start in range(0, batch.num_rows, chunk_rows):
+                yield _arrow_to_pandas(batch.slice(start, chunk_rows))
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def count_rows(source, fmt: str) -> Optional[int]:
+    """
+    Row count from Parquet / Arrow file metadata, or None when it would
+    take a full read (CSV, Arrow streams). File objects are rewound.
+    """
+    rows = None
+    if fmt == "parquet":
+        rows = pq.ParquetFile(source).metadata.num_rows
+    elif fmt == "arrow":
+        reader = _open_arrow(source)
+        if isinstance(reader, ipc.RecordBatchFileReader):
+            rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return rows
+
+
+# =====================================================
+# 3. Writers
+# =====================================================
+
+def _to_table(df: pd.DataFrame) -> pa.Table:
+    # Categoricals always use int32 indices, so chunks of one output agree
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type) and field.type != _ARROW_DICTIONARY:
+            table = table.set_column(i, field.name, table.column(i).cast(_ARROW_DICTIONARY))
+    return table
+
+
+def to_bytes(df: pd.DataFrame, fmt: str) -> bytes:
+    """
+    One DataFrame serialised as a CSV, Parquet or Arrow IPC stream body.
+    """
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    sink = pa.BufferOutputStream()
+    table = _to_table(df)
+    if fmt == "parquet":
+        pq.write_table(table, sink)
+    elif fmt == "arrow":
+        with ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+    return sink.getvalue().to_pybytes()
+
+
+class FrameWriter:
+    """
+    Appends DataFrame chunks to one CSV, Parquet or Arrow IPC output
+    (a path or binary file object). The first chunk fixes the schema.
+    """
+
+    def __init__(self, dst, fmt: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+        self.fmt = fmt
+        self._own = isinstance(dst, (str, Path))
+        self._sink = open(dst, "wb") if self._own else dst
+        self._writer = None
+        self._schema = None
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame):
+        if self.fmt == "csv":
+            self._sink.write(df.to_csv(index=False, header=(self.rows == 0)).encode("utf-8"))
+        else:
+            table = _to_table(df)
+            if self._writer is None:
+                self._schema = table.schema.remove_metadata()
+                if self.fmt == "parquet":
+                    self._writer = pq.ParquetWriter(self._sink, self._schema)
+                else:
+                    self._writer = ipc.new_file(self._sink, self._schema)
+            self._writer.write_table(table.cast(self._schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._own:
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def write_frame(df: pd.DataFrame, dst, fmt: str):
+    with FrameWriter(dst, fmt) as writer:
+        writer.write(df)
@@ -0,0 +1,115 @@
+import copy
+
+import numpy as np
+
+from native_scorer import FeatureEncoder, linear_contribs
+
+# =====================================================
+# Precompiled single-record scorer
+# =====================================================
+
+
+def _final_step(step):
+    # Transformers are wrapped in one-step Pipelines in the training notebook
+    return step.steps[-1][1] if hasattr(step, "steps") else step
+
+
+class CompiledScorer(FeatureEncoder):
+    """
+    Low-latency scoring for one applicant at a time.
+
+    At load time the fitted ColumnTransformer is flattened into plain arrays:
+    StandardScaler means/scales for the numeric block and, for each
+    categorical column, a dict from category to its one-hot output index.
+    A raw record is then encoded straight into a dense float64 vector and
+    passed to the XGBoost booster's inplace_predict, skipping DataFrame
+    construction and the sklearn transform stack entirely.
+
+    The pipelines in models/ densify the one-hot block (sparse_output_ is
+    False), so zeros in the vector are real zeros, not missing values.
+    """
+
+    def __init__(self, pipe):
+        # Imported here, not at module level: the pipe was unpickled, so
+        # sklearn is loaded already, and native-backend replicas never need it
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        preprocessor = pipe.named_steps["preprocess"]
+        self.model = pipe.named_steps["model"]
+
+        if getattr(preprocessor, "sparse_output_", False):
+            raise ValueError("CompiledScorer requires a ColumnTransformer with dense output")
+
+        self.num_cols = []
+        self.num_start = 0
+        self.mean = np.zeros(0)
+        self.scale = np.ones(0)
+        self.cat_index = {}
+        offset = 0
+
+        for name, step, cols in preprocessor.transformers_:
+            if name == "remainder" or step == "drop":
+                continue
+            est = _final_step(step)
+            cols = list(cols)
+
+            if isinstance(est, StandardScaler):
+                if self.num_cols:
+                    raise ValueError("CompiledScorer supports a single numeric (StandardScaler) block")
+                self.num_cols = cols
+                self.num_start = offset
+                self.mean = est.mean_ if est.with_mean else np.zeros(len(cols))
+                self.scale = est.scale_ if est.with_std else np.ones(len(cols))
+                offset += len(cols)
+            elif isinstance(est, OneHotEncoder):
+                if est.handle_unknown != "ignore" or est.drop_idx_ is not None:
+                    raise ValueError("CompiledScorer supports OneHotEncoder(handle_unknown='ignore') without drop")
+                for col, cats in zip(cols, est.categories_):
+                    self.cat_index[col] = {cat: offset + i for i, cat in enumerate(cats)}
+                    offset += len(cats)
+            else:
+                raise ValueError(f"Unsupported transformer in '{name}': {type(est).__name__}")
+
+        self.n_features = offset
+        self._finish()
+
+        # Private single-threaded booster copy: one row never benefits from
+        # the thread pool, and n_jobs=-1 adds scheduling latency
+        self.booster = None
+        self.iteration_range = (0, 0)
+        if hasattr(self.model, "get_booster"):
+            self.booster = copy.copy(self.model.get_booster())
+            self.booster.set_param({"nthread": 1})
+            best_iteration = getattr(self.model, "best_iteration", None)
+            if best_iteration is not None:
+                self.iteration_range = (0, best_iteration + 1)
+
+    def predict_proba_encoded(self, x: np.ndarray) -> np.ndarray:
+        """
+        PD for already-encoded rows.
+        """
+        if self.booster is not None:
+            return self.booster.inplace_predict(
+                x, iteration_range=self.iteration_range, missing=np.nan, validate_features=False
+            )
+        return self.model.predict_proba(x)[:, 1]
+
+    def predict_contribs(self, x: np.ndarray) -> np.ndarray:
+        """
+        Log-odds contributions for already-encoded rows, bias last:
+        TreeSHAP from the booster for XGBoost / LightGBM, exact terms for
+        a logistic regression.
+        """
+        if self.booster is not None:
+            import xgboost as xgb
+
+            # The fitted booster, not the single-threaded copy: explanations
+            # are computed for whole batches
+            return self.model.get_booster().predict(
+                xgb.DMatrix(x, missing=np.nan), pred_contribs=True, iteration_range=self.iteration_range
+            )
+        if hasattr(self.model, "booster_"):
+            return self.model.booster_.predict(x, pred_contrib=True)
+        if hasattr(self.model, "coef_") and len(getattr(self.model, "classes_", ())) == 2:
+            return linear_contribs(x, np.ravel(self.model.coef_), float(np.ravel(self.model.intercept_)[0]))
+        raise ValueError(f"No explanation support for {type(self.model).__name__}")
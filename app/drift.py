@@ -0,0 +1,417 @@
+"""
+Population-stability and feature-drift monitoring over scored traffic.
+
+    python drift.py baseline training_sample.parquet --model-file xgboost_model_01.pkl
+    python drift.py check applications.parquet --model-file xgboost_model_01.pkl
+
+Each model carries a DriftMonitor fed from the scoring path right after
+feature engineering: fixed-bin histograms of Credit_Score, DTI,
+Affordability_Score, Loan_to_Income_Ratio, the categorical bands, the PD
+and the PD within each risk band. All histograms live in one flat count
+vector per time window, so a batch costs a few searchsorted calls and one
+bincount, and memory is fixed whatever the traffic.
+
+PSI (scores) and CSI (features) compare a window of traffic with the
+training baseline stored next to the model as <name>_<version>.drift.json
+(written by the baseline command). Monitor state is a plain count vector
+per window id, so states from worker processes or replicas merge by
+addition.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from features import AGE_LABELS, CREDIT_LABELS, TENURE_LABELS
+
+# =====================================================
+# 1. Bins
+# =====================================================
+
+DRIFT_SUFFIX = ".drift.json"
+BASELINE_FORMAT = 1
+
+# Rolling windows: DRIFT_WINDOWS windows of DRIFT_WINDOW_SECONDS each are kept
+DRIFT_WINDOW_SECONDS = float(os.getenv("DRIFT_WINDOW_SECONDS", "3600"))
+DRIFT_WINDOWS = int(os.getenv("DRIFT_WINDOWS", "24"))
+
+# Fixed interior edges; every numeric histogram also has an underflow,
+# an overflow and a missing bin
+NUMERIC_EDGES = {
+    "Credit_Score": np.arange(300.0, 901.0, 25.0),
+    "DTI": np.round(np.arange(0.0, 2.01, 0.1), 2),
+    "Affordability_Score": np.arange(0.0, 101.0, 5.0),
+    "Loan_to_Income_Ratio": np.round(np.arange(0.0, 3.01, 0.1), 2),
+}
+PD_EDGES = np.round(np.arange(0.05, 1.0, 0.05), 2)
+
+# Known labels; anything else (or missing) lands in a trailing "other" bin
+CATEGORICAL_LABELS = {
+    "Credit_Band": list(CREDIT_LABELS),
+    "Age_Band": list(AGE_LABELS),
+    "Employment_Tenure_Band": list(TENURE_LABELS),
+}
+
+SCORE_FEATURE = "PD"
+
+# Rule-of-thumb PSI / CSI reading
+STABLE_BELOW = 0.10
+SHIFT_FROM = 0.25
+_PSI_FLOOR = 1e-4
+
+
+def drift_status(index: float) -> str:
+    if np.isnan(index):
+        return "no data"
+    if index < STABLE_BELOW:
+        return "stable"
+    return "monitor" if index < SHIFT_FROM else "shift"
+
+
+class DriftLayout:
+    """
+    Where each histogram sits in the flat count vector. Numeric features
+    have len(edges) + 2 bins (the last is missing), categorical ones
+    len(labels) + 1, and the PD has one histogram overall plus one per
+    risk band label ("PD|<band>").
+    """
+
+    def __init__(self, band_labels: List[str]):
+        self.band_labels = list(band_labels)
+        self.histograms: Dict[str, dict] = {}
+        offset = 0
+
+        def add(name, kind, size, **extra):
+            nonlocal offset
+            self.histograms[name] = {"kind": kind, "offset": offset, "size": size, **extra}
+            offset += size
+
+        for name, edges in NUMERIC_EDGES.items():
+            add(name, "feature", len(edges) + 2, edges=edges)
+        for name, labels in CATEGORICAL_LABELS.items():
+            add(name, "feature", len(labels) + 1, labels=labels)
+        add(SCORE_FEATURE, "score", len(PD_EDGES) + 2, edges=PD_EDGES)
+        for band in self.band_labels:
+            add(f"{SCORE_FEATURE}|{band}", "score", len(PD_EDGES) + 2, edges=PD_EDGES)
+        self.size = offset
+
+    def signature(self) -> dict:
+        # Enough to tell whether two count vectors can be added
+        return {"bands": self.band_labels, "size": self.size}
+
+
+def _numeric_bins(x: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    bins = np.searchsorted(edges, x, side="right")
+    bins[np.isnan(x)] = len(edges) + 1
+    return bins
+
+
+def _categorical_bins(values, labels: List[str]) -> np.ndarray:
+    if isinstance(values, list):
+        # Records path: a dict lookup is far cheaper than a Categorical
+        index = {label: i for i, label in enumerate(labels)}
+        return np.array([index.get(v, len(labels)) for v in values], dtype=np.int64)
+    codes = pd.Categorical(values, categories=labels).codes.astype(np.int64)
+    codes[codes < 0] = len(labels)
+    return codes
+
+
+# =====================================================
+# 2. Monitor
+# =====================================================
+
+class DriftMonitor:
+    """
+    Histogram counts for one model's traffic, kept per time window in a
+    fixed ring of DRIFT_WINDOWS windows plus a running total.
+
+    observe_frame / observe_records compute a batch's count vector outside
+    the lock and add it under the lock, so scoring threads contend only
+    for a vector addition of a few hundred integers.
+    """
+
+    def __init__(
+        self,
+        band_labels: List[str],
+        baseline: Optional[dict] = None,
+        window_seconds: float = DRIFT_WINDOW_SECONDS,
+        windows: int = DRIFT_WINDOWS,
+    ):
+        self.layout = DriftLayout(band_labels)
+        self.baseline = baseline
+        self.window_seconds = window_seconds
+        self._ring = np.zeros((windows, self.layout.size), dtype=np.int64)
+        self._ring_ids = np.full(windows, -1, dtype=np.int64)
+        self.total = np.zeros(self.layout.size, dtype=np.int64)
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def counts(self, columns: Dict[str, object], proba: np.ndarray, band) -> np.ndarray:
+        """
+        Count vector for one batch: columns maps each monitored feature to
+        its values (array or list), band is the risk band per row.
+        """
+        parts = []
+        for name, spec in self.layout.histograms.items():
+            if spec["kind"] == "score":
+                continue
+            values = columns[name]
+            if "edges" in spec:
+                bins = _numeric_bins(np.asarray(values, dtype="float64"), spec["edges"])
+            else:
+                bins = _categorical_bins(values, spec["labels"])
+            parts.append(bins + spec["offset"])
+
+        proba = np.asarray(proba, dtype="float64")
+        pd_bins = _numeric_bins(proba, PD_EDGES)
+        parts.append(pd_bins + self.layout.histograms[SCORE_FEATURE]["offset"])
+
+        band_codes = _categorical_bins(band, self.layout.band_labels)
+        known = band_codes < len(self.layout.band_labels)
+        band_offsets = np.array(
+            [self.layout.histograms[f"{SCORE_FEATURE}|{b}"]["offset"] for b in self.layout.band_labels],
+            dtype=np.int64,
+        )
+        parts.append(band_offsets[band_codes[known]] + pd_bins[known])
+
+        return np.bincount(np.concatenate(parts), minlength=self.layout.size)
+
+    def add(self, counts: np.ndarray, rows: int, now: Optional[float] = None):
+        window = int((time.time() if now is None else now) // self.window_seconds)
+        slot = window % len(self._ring)
+        with self._lock:
+            if self._ring_ids[slot] != window:
+                self._ring[slot] = 0
+                self._ring_ids[slot] = window
+            self._ring[slot] += counts
+            self.total += counts
+            self.rows += rows
+
+    def observe_frame(self, df_fe: pd.DataFrame, proba: np.ndarray, band):
+        """
+        Record an engineered batch (after engineer_features_for_scoring).
+        """
+        columns = {
+            name: df_fe[name].to_numpy(dtype="float64", na_value=np.nan) if "edges" in spec else df_fe[name]
+            for name, spec in self.layout.histograms.items()
+            if spec["kind"] == "feature"
+        }
+        self.add(self.counts(columns, proba, band), len(df_fe))
+
+    def observe_records(self, records_fe: List[dict], proba, band):
+        """
+        Record engineered single records (the /predict micro-batch path).
+        """
+        columns = {
+            name: [r[name] if r[name] is not None else np.nan for r in records_fe]
+            if "edges" in spec else [r[name] for r in records_fe]
+            for name, spec in self.layout.histograms.items()
+            if spec["kind"] == "feature"
+        }
+        self.add(self.counts(columns, proba, list(band)), len(records_fe))
+
+    # -----------------------------
+    # Windows and reports
+    # -----------------------------
+    def window_counts(self, windows: Optional[int] = None, now: Optional[float] = None) -> np.ndarray:
+        """
+        Counts over the last `windows` windows (default: all retained).
+        """
+        current = int((time.time() if now is None else now) // self.window_seconds)
+        windows = len(self._ring) if windows is None else min(windows, len(self._ring))
+        with self._lock:
+            live = (self._ring_ids > current - windows) & (self._ring_ids <= current)
+            return self._ring[live].sum(axis=0)
+
+    def histogram(self, counts: np.ndarray, name: str) -> np.ndarray:
+        spec = self.layout.histograms[name]
+        return counts[spec["offset"]:spec["offset"] + spec["size"]]
+
+    def report(self, windows: Optional[int] = None, now: Optional[float] = None) -> dict:
+        """
+        PSI per score histogram and CSI per feature for the recent windows
+        against the baseline (indices are null without a baseline).
+        """
+        return {
+            "window_seconds": self.window_seconds,
+            "windows": len(self._ring) if windows is None else windows,
+            "rows_total": self.rows,
+            **self.compare(self.window_counts(windows, now)),
+        }
+
+    def compare(self, counts: np.ndarray) -> dict:
+        """
+        PSI / CSI of any count vector in this layout (e.g. self.total)
+        against the baseline.
+        """
+        baseline = (self.baseline or {}).get("histograms", {})
+        out = {"scores": {}, "features": {}}
+        for name, spec in self.layout.histograms.items():
+            actual = self.histogram(counts, name)
+            expected = baseline.get(name)
+            index = stability_index(actual, np.asarray(expected)) if expected is not None else float("nan")
+            section = out["scores"] if spec["kind"] == "score" else out["features"]
+            section[name] = {
+                "rows": int(actual.sum()),
+                "index": None if np.isnan(index) else round(index, 4),
+                "status": drift_status(index) if expected is not None else "no baseline",
+            }
+        return {"has_baseline": self.baseline is not None, **out}
+
+    def summary(self) -> dict:
+        """
+        Rows seen and the PD's PSI over the retained windows (for /models
+        and the metrics scrape).
+        """
+        report = self.report()
+        return {
+            "rows": self.rows,
+            "has_baseline": report["has_baseline"],
+            "pd_psi": report["scores"][SCORE_FEATURE]["index"],
+        }
+
+    # -----------------------------
+    # Merging
+    # -----------------------------
+    def state(self) -> dict:
+        with self._lock:
+            return {
+                "layout": self.layout.signature(),
+                "window_seconds": self.window_seconds,
+                "rows": self.rows,
+                "total": self.total.tolist(),
+                "windows": {
+                    str(w): self._ring[i].tolist() for i, w in enumerate(self._ring_ids.tolist()) if w >= 0
+                },
+            }
+
+    def merge(self, state: dict):
+        """
+        Add another monitor's state (same layout and window length).
+        Windows older than this ring's oldest retained window are dropped.
+        """
+        if state["layout"] != self.layout.signature() or state["window_seconds"] != self.window_seconds:
+            raise ValueError("Drift states with different layouts or window lengths cannot be merged")
+        with self._lock:
+            for window, counts in state["windows"].items():
+                window = int(window)
+                slot = window % len(self._ring)
+                if self._ring_ids[slot] > window:
+                    continue
+                if self._ring_ids[slot] != window:
+                    self._ring[slot] = 0
+                    self._ring_ids[slot] = window
+                self._ring[slot] += np.asarray(counts, dtype=np.int64)
+            self.total += np.asarray(state["total"], dtype=np.int64)
+            self.rows += state["rows"]
+
+
+def stability_index(actual: np.ndarray, expected: np.ndarray) -> float:
+    """
+    PSI / CSI: sum((a - e) * ln(a / e)) over bin shares, with empty bins
+    floored so one empty bin does not make the index infinite.
+    """
+    if actual.sum() == 0 or expected.sum() == 0 or len(actual) != len(expected):
+        return float("nan")
+    a = np.maximum(actual / actual.sum(), _PSI_FLOOR)
+    e = np.maximum(expected / expected.sum(), _PSI_FLOOR)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+# =====================================================
+# 3. Baselines
+# =====================================================
+
+def baseline_path(model_path: Path) -> Path:
+    return Path(model_path).with_suffix(DRIFT_SUFFIX)
+
+
+def load_baseline(model_path: Path) -> Optional[dict]:
+    """
+    Training baseline stored next to a model artefact, or None.
+    """
+    path = baseline_path(model_path)
+    if not path.exists():
+        return None
+    baseline = json.loads(path.read_text())
+    if baseline.get("format") != BASELINE_FORMAT:
+        raise ValueError(f"{path.name}: unsupported drift baseline format {baseline.get('format')!r}")
+    return baseline
+
+
+def make_baseline(monitor: DriftMonitor, source: str) -> dict:
+    """
+    Baseline document from everything a monitor has observed.
+    """
+    return {
+        "format": BASELINE_FORMAT,
+        "source": source,
+        "rows": monitor.rows,
+        "bands": monitor.layout.band_labels,
+        "histograms": {
+            name: monitor.histogram(monitor.total, name).tolist() for name in monitor.layout.histograms
+        },
+    }
+
+
+# =====================================================
+# 4. Command line
+# =====================================================
+
+def _observe_file(path: Path, model_file: str, reference_date: Optional[str], chunk_rows: int) -> DriftMonitor:
+    # Deferred: the scoring stack is only needed by the CLI
+    from columnar import SCORING_COLUMNS, format_for_path, iter_frames
+    from scoring import load_model, load_model_config, score_new_applications
+
+    pipe = load_model(model_file)
+    config = load_model_config(model_file)
+    monitor = DriftMonitor(config["risk_band_labels"])
+    for chunk in iter_frames(path, format_for_path(path), chunk_rows, columns=SCORING_COLUMNS):
+        score_new_applications(chunk, pipe, config, reference_date=reference_date, drift=monitor)
+    return monitor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drift baselines and offline PSI / CSI checks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (
+        ("baseline", "Score a training sample and store its histograms next to the model"),
+        ("check", "Score a file and report PSI / CSI against the model's baseline"),
+    ):
+        cmd = commands.add_parser(name, help=help_text)
+        cmd.add_argument("input", type=Path, help="CSV, Parquet or Arrow IPC file of raw applications")
+        cmd.add_argument("--model-file", default=None, help="Pickle or .native artefact in MODEL_DIR")
+        cmd.add_argument("--reference-date", help="Date App_Vintage is measured from (YYYY-MM-DD)")
+        cmd.add_argument("--chunk-rows", type=int, default=100_000, help="Rows scored per chunk")
+    args = parser.parse_args(argv)
+
+    from scoring import MODEL_DIR, MODEL_FILE
+
+    model_file = args.model_file or MODEL_FILE
+    monitor = _observe_file(args.input, model_file, args.reference_date, args.chunk_rows)
+
+    if args.command == "baseline":
+        out = baseline_path(MODEL_DIR / model_file)
+        out.write_text(json.dumps(make_baseline(monitor, args.input.name)))
+        print(json.dumps({"baseline": str(out), "rows": monitor.rows}))
+        return
+
+    baseline = load_baseline(MODEL_DIR / model_file)
+    if baseline is None:
+        raise SystemExit(f"No baseline for {model_file}; run: python drift.py baseline <training sample>")
+    monitor.baseline = baseline
+    print(json.dumps({"rows": monitor.rows, **monitor.compare(monitor.total)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
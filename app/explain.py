@@ -0,0 +1,177 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from features import engineer_features_for_scoring, engineer_features_record
+from metrics import stage
+from native_scorer import FeatureEncoder
+
+# =====================================================
+# Adverse-action reasons from batched TreeSHAP
+# =====================================================
+
+# Reasons returned per explained applicant (adverse-action notices
+# typically carry up to four)
+DEFAULT_TOP_K = 4
+DEFAULT_CACHE_ENTRIES = 100_000
+
+
+def _display(value) -> Optional[str]:
+    # Reason values are text, so the Reasons column has one type in
+    # Arrow / Parquet output whatever the field
+    if value is None or value is pd.NA or (isinstance(value, (float, np.floating)) and np.isnan(value)):
+        return None
+    if isinstance(value, (float, np.floating)):
+        return f"{float(value):.4g}"
+    return str(value.item() if hasattr(value, "item") else value)
+
+
+class Explainer:
+    """
+    Reason codes for one model: which engineered fields pushed an
+    applicant's PD up the most.
+
+    Contributions come from the model's own batched TreeSHAP
+    (scorer.predict_contribs: XGBoost pred_contribs, LightGBM pred_contrib)
+    in log-odds, and the columns of each one-hot block are summed back
+    into the field they encode, so a reason reads "Loan_Purpose = small_business"
+    rather than naming an encoded column.
+
+    Per-field contributions are cached by a digest of the encoded row: a
+    repeat applicant, or identical rows within a batch, are explained
+    once. Only rows whose PD is above the explain threshold reach the
+    booster at all (explain_batch).
+    """
+
+    def __init__(self, scorer: FeatureEncoder, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.scorer = scorer
+        self.fields, column_field = scorer.feature_fields()
+        covered = column_field >= 0
+
+        # (n_features, n_fields) 0/1 matrix: encoded contributions @ fold = per-field contributions
+        self._fold = np.zeros((scorer.n_features, len(self.fields)))
+        self._fold[np.flatnonzero(covered), column_field[covered]] = 1.0
+
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+
+    # -----------------------------
+    # Contributions
+    # -----------------------------
+    def field_contributions(self, x: np.ndarray) -> np.ndarray:
+        """
+        (n, n_fields) log-odds contributions for encoded rows; rows already
+        in the cache, or repeated in x, are not sent to the booster again.
+        """
+        x = np.ascontiguousarray(x, dtype="float64")
+        digests = [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in x]
+        out = np.empty((len(x), len(self.fields)))
+
+        todo = {}
+        with self._lock:
+            for i, digest in enumerate(digests):
+                cached = self._cache.get(digest)
+                if cached is None:
+                    todo.setdefault(digest, []).append(i)
+                else:
+                    self._cache.move_to_end(digest)
+                    out[i] = cached
+            # A hit is a row the booster did not have to explain
+            self.hits += len(x) - len(todo)
+            self.misses += len(todo)
+
+        if todo:
+            first = [rows[0] for rows in todo.values()]
+            contribs = self.scorer.predict_contribs(x[first])
+            folded = contribs[:, :self.scorer.n_features] @ self._fold
+            with self._lock:
+                for (digest, rows), values in zip(todo.items(), folded):
+                    out[rows] = values
+                    self._cache[digest] = values.copy()
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return out
+
+    def _reasons(self, contributions: np.ndarray, values: List[list], top_k: int) -> List[list]:
+        # Largest positive contributions first; fields that lowered the PD
+        # are never reasons
+        order = np.argsort(-contributions, axis=1, kind="stable")[:, :top_k]
+        reasons = []
+        for row, (columns, row_values) in enumerate(zip(order, values)):
+            reasons.append([
+                {
+                    "field": self.fields[j],
+                    "value": _display(row_values[j]),
+                    "contribution": round(float(contributions[row, j]), 4),
+                }
+                for j in columns
+                if contributions[row, j] > 0
+            ])
+        return reasons
+
+    # -----------------------------
+    # Entry points
+    # -----------------------------
+    def explain_frame(self, df_fe: pd.DataFrame, top_k: int = DEFAULT_TOP_K) -> List[list]:
+        """
+        Top-k reasons for every row of an engineered frame.
+        """
+        contributions = self.field_contributions(self.scorer.encode_frame(df_fe))
+        values = list(zip(*(df_fe[field].to_numpy(dtype=object) for field in self.fields)))
+        return self._reasons(contributions, values, top_k)
+
+    def explain_record(self, record: dict, reference_date=None, top_k: int = DEFAULT_TOP_K) -> list:
+        """
+        Top-k reasons for one raw application dict.
+        """
+        record_fe = engineer_features_record(record, reference_date)
+        contributions = self.field_contributions(self.scorer.encode(record_fe))
+        return self._reasons(contributions, [[record_fe[field] for field in self.fields]], top_k)[0]
+
+    def explain_batch(
+        self,
+        df_new: pd.DataFrame,
+        proba: np.ndarray,
+        min_pd: float,
+        reference_date=None,
+        top_k: int = DEFAULT_TOP_K,
+    ) -> np.ndarray:
+        """
+        Reasons for the raw rows whose PD is above min_pd (None elsewhere).
+        Features are engineered again for those rows only, so the cost
+        scales with declines rather than with the batch.
+        """
+        reasons = np.full(len(df_new), None, dtype=object)
+        selected = np.flatnonzero(np.asarray(proba, dtype="float64") > min_pd)
+        if len(selected):
+            with stage("explain", "batch"):
+                df_fe = engineer_features_for_scoring(df_new.iloc[selected].reset_index(drop=True), reference_date)
+                for i, row_reasons in zip(selected, self.explain_frame(df_fe, top_k)):
+                    reasons[i] = row_reasons
+        return reasons
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+
+
+def explain_threshold(config: dict, min_pd: Optional[float] = None) -> float:
+    """
+    PD above which applicants are explained: min_pd if given, otherwise
+    the model's decision threshold (every declined applicant).
+    """
+    return config["decision_threshold"] if min_pd is None else min_pd
@@ -0,0 +1,190 @@
+"""
+Export pickled scoring pipelines to native artefacts and check parity.
+
+    python export_native.py                          # every *.pkl in MODEL_DIR
+    python export_native.py xgboost_model_01.pkl --check-rows 20000
+
+Each <name>_<version>.pkl becomes <name>_<version>.native/ holding
+spec.json (the flattened ColumnTransformer plus model metadata) and the
+model in its library's own format: XGBoost UBJSON, LightGBM text, or the
+coefficients of a logistic regression inside spec.json. NativeScorer
+serves it without sklearn or unpickling, so the artefact is not tied to
+the sklearn version the pipeline was fitted with.
+
+Before an artefact is moved into place, PDs from the batch and the
+record paths are compared with the pickled pipeline on generated
+applicants; the export fails if any differs by more than --tolerance.
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from compiled_scorer import CompiledScorer
+from features import resolve_reference_date
+from native_scorer import NATIVE_SUFFIX, SPEC_FILE, SPEC_FORMAT, NativeScorer
+from registry import WARMUP_RECORD
+from scoring import MODEL_DIR, load_model, read_model_config, score_applications, score_new_applications
+
+PARITY_TOLERANCE = 1e-6
+PARITY_REFERENCE_DATE = "2025-01-31"
+
+
+# =====================================================
+# 1. Model export
+# =====================================================
+
+def export_model_spec(model, out_dir: Path) -> dict:
+    """
+    Write the fitted estimator in its native format; returns the model
+    section of spec.json.
+    """
+    if hasattr(model, "get_booster"):
+        import xgboost
+
+        model.get_booster().save_model(str(out_dir / "model.ubj"))
+        best_iteration = getattr(model, "best_iteration", None)
+        return {
+            "type": "xgboost",
+            "file": "model.ubj",
+            "iteration_range": [0, best_iteration + 1] if best_iteration is not None else [0, 0],
+            "library_version": xgboost.__version__,
+        }
+
+    if hasattr(model, "booster_"):
+        import lightgbm
+
+        model.booster_.save_model(str(out_dir / "model.txt"), num_iteration=model.best_iteration_ or None)
+        return {"type": "lightgbm", "file": "model.txt", "library_version": lightgbm.__version__}
+
+    if hasattr(model, "coef_") and len(getattr(model, "classes_", ())) == 2:
+        return {
+            "type": "linear",
+            "coef": [float(c) for c in np.ravel(model.coef_)],
+            "intercept": float(np.ravel(model.intercept_)[0]),
+        }
+
+    raise ValueError(f"No native export for {type(model).__name__}")
+
+
+# =====================================================
+# 2. Parity check
+# =====================================================
+
+def parity_frame(scorer: CompiledScorer, n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Applicants spread over every category the encoder knows and over the
+    numeric ranges the forms allow, plus a few unseen and missing categories.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame([WARMUP_RECORD] * n)
+    df["Customer_ID"] = np.arange(n)
+    df["Age"] = rng.integers(21, 71, n)
+    df["Income"] = np.round(rng.lognormal(np.log(80_000), 0.6, n), -2)
+    df["Annual_Expenses"] = np.round(df["Income"] * rng.uniform(0.1, 1.1, n), -2)
+    df["Loan_Amount"] = rng.integers(2, 81, n) * 500.0
+    df["Loan_Term_Months"] = rng.choice([36, 48, 60], n)
+    df["Credit_Score"] = rng.integers(600, 851, n)
+    df["Past_Defaults"] = rng.integers(0, 4, n)
+    df["Application_Date"] = (
+        pd.Timestamp(PARITY_REFERENCE_DATE) - pd.to_timedelta(rng.integers(0, 1500, n), unit="D")
+    ).strftime("%Y-%m-%d")
+
+    for col, index in scorer.cat_index.items():
+        if col in df.columns:
+            choices = np.array([c for c in index if isinstance(c, str)] + ["__unseen__", None], dtype=object)
+            df[col] = rng.choice(choices, n)
+    return df
+
+
+def _max_abs_diff(actual: np.ndarray, expected: np.ndarray) -> float:
+    # NaN in both is a match; NaN in one makes the result NaN (a failure)
+    diff = np.abs(actual - expected)
+    diff[np.isnan(actual) & np.isnan(expected)] = 0.0
+    return float(diff.max()) if len(diff) else 0.0
+
+
+def check_parity(pipe, native: NativeScorer, config: dict, df: pd.DataFrame) -> dict:
+    """
+    Largest absolute PD difference between the pickled pipeline and the
+    native artefact, on the batch and record paths.
+    """
+    reference_date = resolve_reference_date(PARITY_REFERENCE_DATE)
+    expected = score_new_applications(df, pipe, config, reference_date=reference_date)["PD_Default"].to_numpy()
+    batch = score_new_applications(df, native, config, reference_date=reference_date)["PD_Default"].to_numpy()
+    records = [
+        {k: (v.item() if hasattr(v, "item") else v) for k, v in row.items()}
+        for row in df.to_dict("records")
+    ]
+    scored = score_applications(records, native, config, reference_date=reference_date)
+    record = np.array([r["PD_Default"] for r in scored], dtype="float64")
+
+    return {
+        "rows": len(df),
+        "max_abs_diff_batch": _max_abs_diff(batch, expected),
+        "max_abs_diff_record": _max_abs_diff(record, expected),
+    }
+
+
+# =====================================================
+# 3. Driver
+# =====================================================
+
+def export(model_file: str, check_rows: int, tolerance: float, out_dir: Path = MODEL_DIR) -> dict:
+    """
+    Export MODEL_DIR/model_file to <out_dir>/<stem>.native and return its
+    parity figures. The old artefact is replaced only if parity holds.
+    """
+    pkl_path = MODEL_DIR / model_file
+    final = Path(out_dir) / (pkl_path.stem + NATIVE_SUFFIX)
+    tmp = final.with_name(final.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+
+    try:
+        pipe = load_model(model_file)
+        compiled = CompiledScorer(pipe)
+        spec = {
+            "format": SPEC_FORMAT,
+            "source": pkl_path.name,
+            **compiled.encoder_spec(),
+            "model": export_model_spec(pipe.named_steps["model"], tmp),
+        }
+        (tmp / SPEC_FILE).write_text(json.dumps(spec, indent=2))
+
+        native = NativeScorer.load(tmp)
+        parity = check_parity(pipe, native, read_model_config(pkl_path), parity_frame(compiled, check_rows))
+        worst = max(parity["max_abs_diff_batch"], parity["max_abs_diff_record"])
+        if not worst <= tolerance:
+            raise SystemExit(f"{model_file}: native PDs differ by {worst:.3g} (> {tolerance:g}); not exported")
+
+        spec["parity"] = {**parity, "tolerance": tolerance}
+        (tmp / SPEC_FILE).write_text(json.dumps(spec, indent=2))
+        shutil.rmtree(final, ignore_errors=True)
+        tmp.rename(final)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return {"model": model_file, "artefact": final.name, "type": spec["model"]["type"], **parity}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export pickled pipelines to native scoring artefacts.")
+    parser.add_argument("models", nargs="*", help="Pickles in MODEL_DIR (default: all)")
+    parser.add_argument("--check-rows", type=int, default=10_000, help="Applicants in the parity check")
+    parser.add_argument("--tolerance", type=float, default=PARITY_TOLERANCE, help="Max absolute PD difference")
+    args = parser.parse_args(argv)
+
+    model_files = args.models or sorted(p.name for p in MODEL_DIR.glob("*.pkl"))
+    for model_file in model_files:
+        print(f"exporting {model_file} ...", file=sys.stderr)
+        print(json.dumps(export(model_file, args.check_rows, args.tolerance)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# =====================================================
+# 1. Feature constants (must match training notebook)
+# =====================================================
+
+# Raw application fields feature engineering reads
+NUMERIC_FIELDS = [
+    "Age", "Income", "Annual_Expenses", "Loan_Amount", "Loan_Term_Months",
+    "Credit_Score", "Past_Defaults",
+]
+CATEGORICAL_FIELDS = [
+    "Employment_Status", "Marital_Status", "Education_Level", "Property_Ownership",
+    "Loan_Purpose", "Co_Applicant", "Approval_Channel", "Region",
+]
+DATE_FIELD = "Application_Date"
+RAW_FIELDS = NUMERIC_FIELDS + CATEGORICAL_FIELDS + [DATE_FIELD]
+
+# Monthly instalment assumes a 12% annual rate (the rate the model's
+# instalment and affordability features were trained with)
+ANNUAL_RATE = 0.12
+MONTHLY_RATE = ANNUAL_RATE / 12
+
+# Right-closed bins with include_lowest=True, as in pd.cut
+AGE_EDGES = np.array([20, 30, 40, 50, 60, 70], dtype="float64")
+AGE_LABELS = ["21-30", "31-40", "41-50", "51-60", "61-70"]
+AGE_BAND_DTYPE = pd.CategoricalDtype(AGE_LABELS, ordered=True)
+
+CREDIT_EDGES = np.array([0, 680, 700, 720, 900], dtype="float64")
+CREDIT_LABELS = ["Subprime", "Near-prime", "Prime", "Super-prime"]
+CREDIT_BAND_DTYPE = pd.CategoricalDtype(CREDIT_LABELS, ordered=True)
+
+TENURE_MAP = {
+    "< 1 year": "0-1 yr",
+    "1 year": "1-3 yrs",
+    "2 years": "1-3 yrs",
+    "3 years": "3-5 yrs",
+    "4 years": "3-5 yrs",
+    "5 years": "5-7 yrs",
+    "6 years": "5-7 yrs",
+    "7 years": "7-10 yrs",
+    "8 years": "7-10 yrs",
+    "9 years": "7-10 yrs",
+    "10+ years": "10+ yrs",
+}
+TENURE_UNKNOWN = "Unknown"
+TENURE_LABELS = list(dict.fromkeys(TENURE_MAP.values())) + [TENURE_UNKNOWN]
+TENURE_BAND_DTYPE = pd.CategoricalDtype(TENURE_LABELS, ordered=True)
+_TENURE_CODES = {label: i for i, label in enumerate(TENURE_LABELS)}
+
+HIGH_DTI_THRESHOLD = 0.6
+LOW_AFFORDABILITY_THRESHOLD = 85
+
+_NS_PER_DAY = 86_400_000_000_000
+
+# App_Vintage = 30-day blocks between the application and this date.
+# Unset means "today", resolved once per scoring call.
+SCORING_REFERENCE_DATE = os.getenv("SCORING_REFERENCE_DATE")
+
+
+def resolve_reference_date(reference_date=None) -> pd.Timestamp:
+    """
+    Reference date for App_Vintage, as a tz-naive midnight Timestamp:
+    the argument if given, else SCORING_REFERENCE_DATE, else today (UTC).
+
+    Resolve it once per job and pass it to every chunk / shard, so a row's
+    features never depend on which other rows it was scored with.
+    """
+    if reference_date is None:
+        reference_date = SCORING_REFERENCE_DATE or pd.Timestamp.now(tz="UTC").date()
+    ts = pd.Timestamp(reference_date)
+    if pd.isna(ts):
+        raise ValueError(f"Invalid reference date: {reference_date!r}")
+    if ts.tz is not None:
+        ts = ts.tz_convert(None)
+    return ts.normalize()
+
+
+# =====================================================
+# 2. Batch path (vectorised over NumPy arrays)
+# =====================================================
+
+def _as_float(df: pd.DataFrame, col: str) -> np.ndarray:
+    return df[col].to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _band_codes(x: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Category codes for right-closed bins (include_lowest), -1 if out of range.
+    Same rule pd.cut uses internally, with the edges precomputed.
+    """
+    ids = edges.searchsorted(x, side="left")
+    ids[x == edges[0]] = 1
+    codes = ids - 1
+    codes[np.isnan(x) | (ids == 0) | (ids == len(edges))] = -1
+    return codes
+
+
+def monthly_installments(
+    loan_amount: np.ndarray,
+    term_months: np.ndarray,
+    monthly_rate=MONTHLY_RATE,
+) -> np.ndarray:
+    """
+    Vectorised monthly_installment: annuity instalments at monthly_rate,
+    rounded to whole currency units. Arguments broadcast, so loan amounts
+    shaped (n, 1, 1) against rates (R, 1) and terms (T,) give an
+    (n, R, T) tensor; the growth factor is computed once per rate and term.
+    """
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth = np.power(1 + monthly_rate, term_months)
+        installment = np.multiply(loan_amount, monthly_rate * growth)
+        np.divide(installment, growth - 1, out=installment)
+        np.round(installment, out=installment)
+    return installment
+
+
+def repayment_burden(installment: np.ndarray, income: np.ndarray) -> np.ndarray:
+    """
+    Instalment as a share of monthly income (NaN where income is zero).
+    Arguments broadcast as in monthly_installments.
+    """
+    burden = np.full(np.broadcast_shapes(np.shape(installment), np.shape(income)), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        monthly_income = income / 12
+        np.divide(installment, monthly_income, out=burden, where=monthly_income != 0)
+    return burden
+
+
+def affordability_scores(burden: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    Affordability = (1 - burden) clipped to 0-1, scaled to 0-100 and
+    rounded; 0 where the burden is undefined. out=burden reuses its buffer.
+    """
+    with np.errstate(invalid="ignore", over="ignore"):
+        affordability = np.subtract(1, burden, out=out)
+        np.clip(affordability, 0, 1, out=affordability)
+        affordability *= 100
+        np.round(affordability, out=affordability)
+        affordability[np.isnan(affordability)] = 0
+    return affordability
+
+
+def compute_feature_arrays(
+    income: np.ndarray,
+    expenses: np.ndarray,
+    loan_amount: np.ndarray,
+    term_months: np.ndarray,
+    age: np.ndarray,
+    credit_score: np.ndarray,
+    past_defaults: np.ndarray,
+) -> dict:
+    """
+    Numeric kernel: every engineered column except dates and tenure,
+    computed into preallocated float64 arrays in one pass over the inputs.
+    """
+    n = len(income)
+
+    dti = np.zeros(n)
+    income_loan = np.zeros(n)
+    loan_income = np.zeros(n)
+    installment = monthly_installments(loan_amount, term_months)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        income_nonzero = income != 0
+        np.divide(expenses, income, out=dti, where=income_nonzero)
+        np.divide(income, loan_amount, out=income_loan, where=loan_amount != 0)
+        np.divide(loan_amount, income, out=loan_income, where=income_nonzero)
+
+    # Affordability = (1 - instalment / monthly income) scaled to 0-100
+    burden = repayment_burden(installment, income)
+    affordability = affordability_scores(burden, out=burden)
+
+    return {
+        "DTI": dti,
+        "Income_Loan_Ratio": income_loan,
+        "Loan_to_Income_Ratio": loan_income,
+        "Monthly_Installment": installment,
+        "Affordability_Score": affordability,
+        "Age_Band": _band_codes(age, AGE_EDGES),
+        "Credit_Band": _band_codes(credit_score, CREDIT_EDGES),
+        "Has_Past_Defaults": (past_defaults > 0).astype(np.int64),
+        "High_DTI_Flag": (dti > HIGH_DTI_THRESHOLD).astype(np.int64),
+        "Low_Affordability_Flag": (affordability < LOW_AFFORDABILITY_THRESHOLD).astype(np.int64),
+    }
+
+
+def tenure_band(employment_status: pd.Series) -> pd.Categorical:
+    """
+    Employment_Tenure_Band as a categorical (TENURE_UNKNOWN for unmapped or
+    missing). Categorical input is mapped once per category rather than per row.
+    """
+    unknown = _TENURE_CODES[TENURE_UNKNOWN]
+    if isinstance(employment_status.dtype, pd.CategoricalDtype):
+        lookup = np.array(
+            [_TENURE_CODES[TENURE_MAP.get(c, TENURE_UNKNOWN)] for c in employment_status.cat.categories] + [unknown],
+            dtype=np.int8,
+        )
+        # Code -1 (missing) picks the trailing unknown code
+        codes = lookup[employment_status.cat.codes.to_numpy()]
+    else:
+        labels = employment_status.map(TENURE_MAP).fillna(TENURE_UNKNOWN)
+        codes = labels.map(_TENURE_CODES).to_numpy(dtype=np.int8)
+    return pd.Categorical.from_codes(codes, dtype=TENURE_BAND_DTYPE)
+
+
+def app_vintage(application_date: pd.Series, reference_date: pd.Timestamp) -> pd.arrays.IntegerArray:
+    """
+    Months (30-day blocks) between each application and reference_date,
+    floored at 0 for applications dated after it. Row-wise, so the result
+    does not depend on the rest of the batch.
+    Expects dates already parsed with pd.to_datetime.
+    """
+    ns = application_date.to_numpy(dtype="datetime64[ns]").view("int64")
+    missing = application_date.isna().to_numpy()
+
+    days = (reference_date.value - ns) // _NS_PER_DAY
+    vintage = np.round(days / 30).astype("int64")
+    np.maximum(vintage, 0, out=vintage)
+    vintage[missing] = 0
+    return pd.arrays.IntegerArray(vintage, missing)
+
+
+def engineer_features_for_scoring(df_raw: pd.DataFrame, reference_date=None) -> pd.DataFrame:
+    """
+    Apply the SAME feature engineering used in training to new applications.
+    This must stay consistent with your training notebook.
+
+    Batch path: inputs are pulled out as float64 arrays once, the kernel
+    fills preallocated outputs, and the output frame is built in one go
+    (engineered columns overwrite raw ones in place, new ones are appended).
+    Raw columns are shared with df_raw rather than copied, so treat the
+    result as read-only.
+
+    Every feature is a function of its own row and reference_date only
+    (see resolve_reference_date), so chunking or sharding a file does not
+    change its scores.
+    """
+    reference_date = resolve_reference_date(reference_date)
+    arrays = compute_feature_arrays(
+        income=_as_float(df_raw, "Income"),
+        expenses=_as_float(df_raw, "Annual_Expenses"),
+        loan_amount=_as_float(df_raw, "Loan_Amount"),
+        term_months=_as_float(df_raw, "Loan_Term_Months"),
+        age=_as_float(df_raw, "Age"),
+        credit_score=_as_float(df_raw, "Credit_Score"),
+        past_defaults=_as_float(df_raw, "Past_Defaults"),
+    )
+    application_date = pd.to_datetime(df_raw["Application_Date"], errors="coerce")
+
+    engineered = {
+        "DTI": arrays["DTI"],
+        "Income_Loan_Ratio": arrays["Income_Loan_Ratio"],
+        "Loan_to_Income_Ratio": arrays["Loan_to_Income_Ratio"],
+        "Monthly_Installment": arrays["Monthly_Installment"],
+        "Affordability_Score": arrays["Affordability_Score"],
+        "Application_Date": application_date.array,
+        "App_Vintage": app_vintage(application_date, reference_date),
+        "Age_Band": pd.Categorical.from_codes(arrays["Age_Band"], dtype=AGE_BAND_DTYPE),
+        "Credit_Band": pd.Categorical.from_codes(arrays["Credit_Band"], dtype=CREDIT_BAND_DTYPE),
+        "Employment_Tenure_Band": tenure_band(df_raw["Employment_Status"]),
+        "Has_Past_Defaults": arrays["Has_Past_Defaults"],
+        "High_DTI_Flag": arrays["High_DTI_Flag"],
+        "Low_Affordability_Flag": arrays["Low_Affordability_Flag"],
+    }
+
+    columns = {c: engineered.pop(c) if c in engineered else df_raw[c].array for c in df_raw.columns}
+    columns.update(engineered)
+    return pd.DataFrame(columns, index=df_raw.index, copy=False)
+
+
+# =====================================================
+# 3. Single-record path (plain Python scalars)
+# =====================================================
+
+def _band_label(x: float, edges: np.ndarray, labels: list):
+    if math.isnan(x) or x < edges[0] or x > edges[-1]:
+        return None
+    if x == edges[0]:
+        return labels[0]
+    return labels[int(edges.searchsorted(x, side="left")) - 1]
+
+
+def _parse_date(value):
+    # pd.Timestamp is ~100x cheaper than pd.to_datetime on a single value
+    try:
+        ts = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return None
+    return None if pd.isna(ts) else ts
+
+
+def monthly_installment(loan_amount: float, term_months: float, monthly_rate: float = MONTHLY_RATE) -> float:
+    """
+    Rounded annuity instalment at monthly_rate.
+    """
+    growth = (1 + monthly_rate) ** term_months
+    numerator = loan_amount * (monthly_rate * growth)
+    if growth == 1:
+        # Zero term: x / 0 as NumPy evaluates it in the batch path
+        return math.copysign(math.inf, numerator) if numerator else math.nan
+    installment = numerator / (growth - 1)
+    return float(round(installment)) if math.isfinite(installment) else installment
+
+
+def affordability_score(
+    income: float, loan_amount: float, term_months: float, monthly_rate: float = MONTHLY_RATE
+) -> float:
+    """
+    Affordability score (0-100) for one applicant, same rule as the batch path.
+    """
+    installment = monthly_installment(loan_amount, term_months, monthly_rate)
+    monthly_income = income / 12
+    if monthly_income == 0 or math.isnan(installment) or math.isnan(monthly_income):
+        return 0.0
+    aff_raw = min(max(1 - installment / monthly_income, 0.0), 1.0)
+    return float(round(aff_raw * 100))
+
+
+def record_vintage(application_date: pd.Timestamp, reference_date: pd.Timestamp) -> int:
+    """
+    Scalar App_Vintage, same rule as app_vintage.
+    """
+    days = (reference_date.value - application_date.value) // _NS_PER_DAY
+    return max(int(round(days / 30)), 0)
+
+
+def engineer_features_record(record: dict, reference_date=None) -> dict:
+    """
+    Single-record fast path: same engineered fields as the batch path,
+    computed with scalar arithmetic (no DataFrame construction).
+
+    App_Vintage is measured back from reference_date, exactly as in the
+    batch path. Out-of-range bands and unparseable dates come back as None.
+    """
+    reference_date = resolve_reference_date(reference_date)
+    income = float(record["Income"])
+    expenses = float(record["Annual_Expenses"])
+    loan_amount = float(record["Loan_Amount"])
+    term_months = float(record["Loan_Term_Months"])
+
+    dti = 0.0 if income == 0 else expenses / income
+    installment = monthly_installment(loan_amount, term_months)
+    affordability = affordability_score(income, loan_amount, term_months)
+
+    application_date = _parse_date(record["Application_Date"])
+    missing_date = application_date is None
+
+    return {
+        **record,
+        "DTI": dti,
+        "Income_Loan_Ratio": 0.0 if loan_amount == 0 else income / loan_amount,
+        "Loan_to_Income_Ratio": 0.0 if income == 0 else loan_amount / income,
+        "Monthly_Installment": installment,
+        "Affordability_Score": affordability,
+        "Application_Date": None if missing_date else application_date,
+        "App_Vintage": None if missing_date else record_vintage(application_date, reference_date),
+        "Age_Band": _band_label(float(record["Age"]), AGE_EDGES, AGE_LABELS),
+        "Credit_Band": _band_label(float(record["Credit_Score"]), CREDIT_EDGES, CREDIT_LABELS),
+        "Employment_Tenure_Band": TENURE_MAP.get(record["Employment_Status"], TENURE_UNKNOWN),
+        "Has_Past_Defaults": int(float(record["Past_Defaults"]) > 0),
+        "High_DTI_Flag": int(dti > HIGH_DTI_THRESHOLD),
+        "Low_Affordability_Flag": int(affordability < LOW_AFFORDABILITY_THRESHOLD),
+    }
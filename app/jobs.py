@@ -0,0 +1,513 @@
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from columnar import FORMAT_SUFFIX, count_rows, iter_frames
+from features import RAW_FIELDS, resolve_reference_date
+
+# =====================================================
+# Persistent batch-scoring job queue
+# =====================================================
+
+# Jobs, uploads and results live under JOBS_DIR; JOB_WORKERS processes
+# score them (0 = no queue)
+JOBS_DIR = Path(os.getenv("JOBS_DIR", "jobs"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_CHUNK_ROWS = int(os.getenv("JOB_CHUNK_ROWS", "50000"))
+# Model threads per job worker, and how far workers are deprioritised so
+# interactive scoring in the API process keeps the CPU it needs
+JOB_THREADS = int(os.getenv("JOB_THREADS", "2"))
+JOB_NICE = int(os.getenv("JOB_NICE", "10"))
+# A running job whose worker has not reported for this long is re-queued
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "300"))
+# Finished jobs (and their result files) are removed after this long
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "72"))
+# How often the API process checks for (and replaces) dead workers
+JOB_SUPERVISE_SECONDS = float(os.getenv("JOB_SUPERVISE_SECONDS", "5"))
+
+JOBS_DB = "jobs.sqlite"
+ACTIVE_STATES = ("queued", "running")
+FINAL_STATES = ("done", "failed", "cancelled")
+INPUT_FORMATS = ("csv", "parquet", "arrow")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id           TEXT    PRIMARY KEY,
+    state            TEXT    NOT NULL,
+    model            TEXT    NOT NULL,
+    model_path       TEXT    NOT NULL,
+    reference_date   TEXT    NOT NULL,
+    input_format     TEXT    NOT NULL,
+    output_format    TEXT    NOT NULL,
+    rows_total       INTEGER,
+    rows_done        INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error            TEXT,
+    worker_pid       INTEGER,
+    claim_token      TEXT,
+    submitted_at     REAL    NOT NULL,
+    started_at       REAL,
+    heartbeat_at     REAL,
+    finished_at      REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, submitted_at);
+"""
+
+_PUBLIC_FIELDS = (
+    "job_id", "state", "model", "reference_date", "input_format", "output_format",
+    "rows_total", "rows_done", "error", "submitted_at", "started_at", "finished_at",
+)
+
+
+def count_csv_rows(path: Path, block_size: int = 1 << 20) -> int:
+    """
+    Data rows in a CSV by a newline scan (no parsing). Quoted fields with
+    embedded newlines make this an overestimate; the worker records the
+    exact count when the job finishes.
+    """
+    lines, last = 0, b"\n"
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def input_path(root: Path, job_id: str, fmt: str) -> Path:
+    return Path(root) / job_id / f"input{FORMAT_SUFFIX[fmt]}"
+
+
+def result_path(root: Path, job_id: str, fmt: str) -> Path:
+    return Path(root) / job_id / f"result{FORMAT_SUFFIX[fmt]}"
+
+
+class JobStore:
+    """
+    Job rows in SQLite (WAL), shared by the API process and the job
+    workers; each process opens its own connection. claim() takes the
+    oldest queued job inside an IMMEDIATE transaction, so two workers
+    never start the same job, and hands out a claim token: once a stale
+    job is re-claimed, progress() and finish() with the old token are
+    refused, so its first worker stops instead of racing the second.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "claim_token" not in columns:
+            # Databases created before claim tokens
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN claim_token TEXT")
+
+    def _one(self, sql: str, args=()) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(sql, args).fetchone()
+        return dict(row) if row is not None else None
+
+    def create(self, job: dict):
+        columns = ", ".join(job)
+        marks = ", ".join("?" for _ in job)
+        with self._lock:
+            self._conn.execute(f"INSERT INTO jobs ({columns}) VALUES ({marks})", tuple(job.values()))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._one("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+
+    def list(self, limit: int = 50, state: Optional[str] = None) -> List[dict]:
+        sql = "SELECT * FROM jobs"
+        args = ()
+        if state is not None:
+            sql += " WHERE state = ?"
+            args = (state,)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY submitted_at DESC LIMIT ?", args + (limit,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return {state: n for state, n in rows}
+
+    def claim(self, pid: int, stale_seconds: float) -> Optional[dict]:
+        """
+        Mark the oldest queued job (or a running one whose worker went
+        quiet for stale_seconds) as running on pid, and return it with a
+        fresh claim_token.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A stale job its owner was asked to cancel is not restarted
+                conn.execute(
+                    "UPDATE jobs SET state = 'cancelled', finished_at = ? "
+                    "WHERE state = 'running' AND heartbeat_at < ? AND cancel_requested = 1",
+                    (now, now - stale_seconds),
+                )
+                row = conn.execute(
+                    "SELECT job_id FROM jobs WHERE state = 'queued' "
+                    "OR (state = 'running' AND heartbeat_at < ?) ORDER BY submitted_at LIMIT 1",
+                    (now - stale_seconds,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET state = 'running', worker_pid = ?, claim_token = ?, started_at = ?, "
+                        "heartbeat_at = ?, rows_done = 0 WHERE job_id = ?",
+                        (pid, token, now, now, row["job_id"]),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["job_id"]) if row is not None else None
+
+    def progress(self, job_id: str, token: str, rows_done: int) -> bool:
+        """
+        Record progress (and a heartbeat); True if the worker should stop:
+        cancellation was requested or the claim is no longer its own.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET rows_done = ?, heartbeat_at = ? "
+                "WHERE job_id = ? AND claim_token = ? AND state = 'running'",
+                (rows_done, time.time(), job_id, token),
+            )
+            row = self._conn.execute(
+                "SELECT cancel_requested, claim_token, state FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return bool(row is None or row["cancel_requested"] or row["claim_token"] != token or row["state"] != "running")
+
+    def finish(self, job_id: str, token: str, state: str, error: Optional[str] = None,
+               rows_total: Optional[int] = None) -> bool:
+        """
+        Close a claim; False (and nothing recorded) if it was re-claimed.
+        rows_total, when given, replaces the submit-time count.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, finished_at = ?, rows_total = COALESCE(?, rows_total) "
+                "WHERE job_id = ? AND claim_token = ? AND state = 'running'",
+                (state, error, time.time(), rows_total, job_id, token),
+            )
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """
+        Cancel a queued job at once; a running one stops after its current
+        chunk. Finished jobs are left as they are.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = 'cancelled', finished_at = ? WHERE job_id = ? AND state = 'queued'",
+                (time.time(), job_id),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND state = 'running'", (job_id,)
+            )
+        return self.get(job_id)
+
+    def expired(self, retention_seconds: float) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE state IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+                (time.time() - retention_seconds,),
+            ).fetchall()
+        return [r["job_id"] for r in rows]
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def public(job: Optional[dict]) -> Optional[dict]:
+    """
+    Job row as returned to clients (no paths or worker internals).
+    """
+    return {k: job[k] for k in _PUBLIC_FIELDS} if job is not None else None
+
+
+# =====================================================
+# Worker processes
+# =====================================================
+
+def _load_model(path: Path, threads: int):
+    # Same loading rules as registry.LoadedModel, with the model's threads capped
+    from native_scorer import NATIVE_SUFFIX, NativeScorer
+    from scoring import read_model_config
+
+    if path.suffix == NATIVE_SUFFIX:
+        pipe = NativeScorer.load(path)
+        pipe.set_threads(threads)
+    else:
+        import joblib
+
+        pipe = joblib.load(path)
+        model = pipe.named_steps["model"]
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=threads)
+    return pipe, read_model_config(path)
+
+
+def run_job(store: JobStore, root: Path, job: dict, models: dict, chunk_rows: int, threads: int):
+    """
+    Score one claimed job into its result file, reporting progress after
+    every chunk. The result is written under a name private to this claim
+    and renamed when complete, so a result file is never partial. A model
+    that fails to load fails the job, not the worker.
+    """
+    from scoring import score_stream
+
+    job_id, token = job["job_id"], job["claim_token"]
+    src = input_path(root, job_id, job["input_format"])
+    final = result_path(root, job_id, job["output_format"])
+    tmp = final.with_name(f"{final.name}.{token}.tmp")
+    state, error, rows = "done", None, 0
+    try:
+        model_path = Path(job["model_path"])
+        if model_path not in models:
+            models.clear()
+            models[model_path] = _load_model(model_path, threads)
+        pipe, config = models[model_path]
+
+        chunks = score_stream(
+            src, tmp, chunk_rows, pipe, config,
+            reference_date=job["reference_date"],
+            input_format=job["input_format"],
+            output_format=job["output_format"],
+        )
+        for scored in chunks:
+            rows += len(scored)
+            if store.progress(job_id, token, rows):
+                state = "cancelled"
+                chunks.close()
+                break
+    except Exception as e:
+        state, error = "failed", f"{type(e).__name__}: {e}"
+
+    if state == "done":
+        os.replace(tmp, final)
+    else:
+        tmp.unlink(missing_ok=True)
+    # A re-claimed job still needs its input
+    if store.finish(job_id, token, state, error, rows_total=rows if state == "done" else None):
+        src.unlink(missing_ok=True)
+
+
+def purge_expired(store: JobStore, root: Path, retention_seconds: float):
+    for job_id in store.expired(retention_seconds):
+        shutil.rmtree(Path(root) / job_id, ignore_errors=True)
+        store.delete(job_id)
+
+
+def worker_main(root: str, stop, chunk_rows: int, threads: int, nice: int, stale_seconds: float,
+                retention_seconds: float, poll_seconds: float = 1.0):
+    """
+    Job worker process: claim, score, repeat until stop (a shared flag) is
+    set. The flag takes no lock, so a worker killed while idle cannot leave
+    the API process waiting on it.
+    Models stay loaded between jobs for the same artefact.
+    """
+    if nice:
+        os.nice(nice)
+    root = Path(root)
+    store = JobStore(root / JOBS_DB)
+    models = {}
+    last_purge = 0.0
+    while not stop.value:
+        job = store.claim(os.getpid(), stale_seconds)
+        if job is not None:
+            run_job(store, root, job, models, chunk_rows, threads)
+            continue
+        if time.time() - last_purge > 600:
+            purge_expired(store, root, retention_seconds)
+            last_purge = time.time()
+        time.sleep(poll_seconds)
+    store.close()
+
+
+# =====================================================
+# Queue (submission side)
+# =====================================================
+
+class JobQueue:
+    """
+    Accepts uploaded files as jobs and owns the worker processes that
+    score them. Job state is in SQLite and files are on disk, so jobs
+    survive a closed browser, a restarted API and a crashed worker (it is
+    replaced, and its job is picked up again once stale).
+    """
+
+    def __init__(
+        self,
+        root: Path = JOBS_DIR,
+        workers: int = JOB_WORKERS,
+        chunk_rows: int = JOB_CHUNK_ROWS,
+        threads: int = JOB_THREADS,
+        nice: int = JOB_NICE,
+        stale_seconds: float = JOB_STALE_SECONDS,
+        retention_hours: float = JOB_RETENTION_HOURS,
+    ):
+        self.root = Path(root)
+        (self.root / "uploads").mkdir(parents=True, exist_ok=True)
+        self.store = JobStore(self.root / JOBS_DB)
+        self.workers = workers
+        self._worker_args = (chunk_rows, threads, nice, stale_seconds, retention_hours * 3600)
+        self._context = get_context("spawn")
+        self._stop = self._context.Value("b", 0, lock=False)
+        self._stopping = threading.Event()
+        self._processes = []
+        self._supervisor = None
+        self.restarts = 0
+
+    def _spawn(self):
+        process = self._context.Process(
+            target=worker_main, args=(str(self.root), self._stop, *self._worker_args), daemon=True
+        )
+        process.start()
+        return process
+
+    def start(self, supervise_seconds: float = JOB_SUPERVISE_SECONDS) -> "JobQueue":
+        self._processes = [self._spawn() for _ in range(self.workers)]
+        self._supervisor = threading.Thread(
+            target=self._supervise, args=(supervise_seconds,), name="job-supervisor", daemon=True
+        )
+        self._supervisor.start()
+        return self
+
+    def _supervise(self, interval: float):
+        while not self._stopping.wait(interval):
+            self.replace_dead_workers()
+
+    def replace_dead_workers(self) -> int:
+        """
+        Start a new worker for every one that has exited; returns how many.
+        """
+        replaced = 0
+        for i, process in enumerate(self._processes):
+            if not process.is_alive() and not self._stopping.is_set():
+                process.join()
+                self._processes[i] = self._spawn()
+                replaced += 1
+        self.restarts += replaced
+        return replaced
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop the workers; a job still running is re-queued when it goes
+        stale and restarts from its first row.
+        """
+        self._stopping.set()
+        self._stop.value = 1
+        if self._supervisor is not None:
+            self._supervisor.join()
+            self._supervisor = None
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def upload_path(self) -> Path:
+        """
+        Fresh temporary path for streaming an upload to disk before submit().
+        """
+        return self.root / "uploads" / uuid.uuid4().hex
+
+    def submit(
+        self,
+        source,
+        input_format: str,
+        model: str,
+        model_path: Path,
+        reference_date=None,
+        output_format: str = "parquet",
+    ) -> dict:
+        """
+        Queue source (a path, which is moved, or a binary file object,
+        which is copied) for scoring with the artefact at model_path.
+        Raises ValueError for unsupported formats or missing columns.
+        """
+        if input_format not in INPUT_FORMATS or output_format not in FORMAT_SUFFIX:
+            raise ValueError(f"Unsupported job format: {input_format} -> {output_format}")
+        job_id = uuid.uuid4().hex
+        dst = input_path(self.root, job_id, input_format)
+        dst.parent.mkdir(parents=True)
+        if isinstance(source, (str, Path)):
+            os.replace(source, dst)
+        else:
+            with open(dst, "wb") as f:
+                shutil.copyfileobj(source, f)
+
+        try:
+            first = next(iter_frames(dst, input_format, 1), None)
+            if first is None:
+                raise ValueError("Empty file")
+            missing = [c for c in RAW_FIELDS if c not in first.columns]
+            if missing:
+                raise ValueError(f"Missing columns: {missing}")
+            rows_total = count_csv_rows(dst) if input_format == "csv" else count_rows(dst, input_format)
+        except Exception:
+            shutil.rmtree(dst.parent, ignore_errors=True)
+            raise
+
+        self.store.create({
+            "job_id": job_id,
+            "state": "queued",
+            "model": model,
+            "model_path": str(model_path),
+            # Resolved now, so a job that waits overnight is scored as of submission
+            "reference_date": resolve_reference_date(reference_date).date().isoformat(),
+            "input_format": input_format,
+            "output_format": output_format,
+            "rows_total": rows_total,
+            "submitted_at": time.time(),
+        })
+        return self.status(job_id)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        return public(self.store.get(job_id))
+
+    def list(self, limit: int = 50, state: Optional[str] = None) -> List[dict]:
+        return [public(job) for job in self.store.list(limit, state)]
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        return public(self.store.cancel(job_id))
+
+    def result(self, job_id: str) -> Path:
+        """
+        Result file of a finished job. KeyError if there is no such job,
+        ValueError if it has not completed.
+        """
+        job = self.store.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        if job["state"] != "done":
+            raise ValueError(f"Job {job_id} is {job['state']}")
+        return result_path(self.root, job_id, job["output_format"])
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(p.is_alive() for p in self._processes),
+            "restarts": self.restarts,
+            "jobs": self.store.counts(),
+        }
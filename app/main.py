@@ -0,0 +1,809 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date
+from functools import partial
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel
+
+from batcher import MicroBatcher
+from columnar import FORMAT_SUFFIX, MEDIA_TYPES, SCORING_COLUMNS, format_for_media_type, read_frame, to_bytes
+from explain import explain_threshold
+from features import RAW_FIELDS, resolve_reference_date
+from jobs import INPUT_FORMATS, JOB_WORKERS, JobQueue
+from metrics import REGISTRY, HTTPMetricsMiddleware, stage
+from pd_cache import open_pd_cache
+from portfolio import REPORTS, PortfolioAnalytics, PortfolioStore
+from registry import LoadedModel, ModelRegistry, parse_artefact_name
+from schema import InvalidValuesError, conform_frame
+from scoring import MODEL_DIR, MODEL_FILE, score_applications, score_new_applications
+from shadow import ShadowLog, ShadowScorer
+
+# =====================================================
+# 1. App and model registry
+# =====================================================
+
+# Champion model name (e.g. "xgboost_model"); its latest version is served by default
+DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", parse_artefact_name(Path(MODEL_FILE))[0])
+
+# Models loaded and warmed before /ready reports the service ready
+PRELOAD_MODELS = [m for m in os.getenv("PRELOAD_MODELS", DEFAULT_MODEL).split(",") if m]
+
+# Challengers scored in the background on champion traffic, e.g.
+# "lightgbm_model,logistic_regression" (empty = shadow scoring off)
+SHADOW_MODELS = [m for m in os.getenv("SHADOW_MODELS", "").split(",") if m]
+SHADOW_LOG = os.getenv("SHADOW_LOG", "shadow_scores.sqlite")
+SHADOW_WORKERS = int(os.getenv("SHADOW_WORKERS", "2"))
+
+# "pickle" serves the sklearn pipelines; "native" serves artefacts
+# exported with export_native.py (no sklearn, no unpickling)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "pickle")
+
+registry = ModelRegistry(
+    MODEL_DIR,
+    default_model=DEFAULT_MODEL,
+    max_loaded=int(os.getenv("MODEL_CACHE_SIZE", str(max(3, 1 + len(SHADOW_MODELS))))),
+    backend=MODEL_BACKEND,
+)
+
+shadow_scorer: Optional[ShadowScorer] = None
+
+# Result cache for repeat quotes: "memory" (per process), "sqlite"
+# (shared by all workers on the box via PD_CACHE_PATH) or "off"
+pd_cache = open_pd_cache(
+    os.getenv("PD_CACHE_BACKEND", "memory"),
+    os.getenv("PD_CACHE_PATH", "pd_cache.sqlite"),
+    max_entries=int(os.getenv("PD_CACHE_SIZE", "100000")),
+    ttl_seconds=float(os.getenv("PD_CACHE_TTL", "900")),
+)
+if pd_cache is not None:
+    registry.add_listener(pd_cache.invalidate)
+
+# Model inference runs on these threads, never on the event loop
+SCORING_THREADS = int(os.getenv("SCORING_THREADS", "4"))
+scoring_executor = ThreadPoolExecutor(max_workers=SCORING_THREADS, thread_name_prefix="scoring")
+
+# /predict micro-batching: a request waits at most MICROBATCH_MAX_WAIT_MS
+# for others to join its batch (MICROBATCH_MAX_BATCH=1 turns batching off)
+MICROBATCH_MAX_BATCH = int(os.getenv("MICROBATCH_MAX_BATCH", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+
+# explain=true requests get reasons for applicants with PD above this
+# (unset = each model's decision threshold, i.e. every decline)
+EXPLAIN_MIN_PD = float(os.environ["EXPLAIN_MIN_PD"]) if os.getenv("EXPLAIN_MIN_PD") else None
+
+# Running portfolio summaries (see portfolio.py): every /predict_batch
+# result is folded into PORTFOLIO_DB in the background (empty = off).
+# One thread, since SQLite takes one writer at a time anyway.
+PORTFOLIO_DB = os.getenv("PORTFOLIO_DB", "")
+portfolio_store = PortfolioStore(PORTFOLIO_DB) if PORTFOLIO_DB else None
+portfolio_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="portfolio")
+portfolio_folds = {"merged": 0, "duplicate": 0, "failed": 0}
+
+# Background batch jobs (see jobs.py): uploads are queued on disk and
+# scored by JOB_WORKERS low-priority processes, so large files never
+# compete with /predict for the scoring threads (JOB_WORKERS=0 = off).
+# Run the API with one uvicorn worker per queue, or JOB_WORKERS=0 on all
+# but one, since each process starts its own pool on the shared queue.
+# Built by the lifespan, so importing the app creates no files.
+job_queue: Optional[JobQueue] = None
+
+
+# Warm up in the background so the port opens at once (liveness passes);
+# /ready turns 200 only after every preloaded model is warm.
+# PRELOAD_BLOCKING=1 finishes warm-up before the server accepts requests.
+PRELOAD_BLOCKING = os.getenv("PRELOAD_BLOCKING", "0") == "1"
+
+# Timings are measured from the start of the lifespan (server start-up);
+# module import time is measured by benchmarks/bench_scoring.py
+startup = {
+    "ready": False,
+    "started_at": None,
+    "preload_seconds": None,
+    "first_prediction_seconds": None,
+    "error": None,
+}
+
+
+def preload():
+    """
+    Load and warm the champion, preloaded models and challengers once,
+    then mark the service ready.
+    """
+    try:
+        registry.warm_up(PRELOAD_MODELS + [m for m in SHADOW_MODELS if m not in PRELOAD_MODELS])
+    except Exception as e:
+        startup["error"] = f"{type(e).__name__}: {e}"
+        raise
+    startup["preload_seconds"] = round(time.perf_counter() - startup["started_at"], 4)
+    startup["ready"] = True
+
+
+def record_first_prediction():
+    if startup["first_prediction_seconds"] is None:
+        startup["first_prediction_seconds"] = round(time.perf_counter() - startup["started_at"], 4)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global shadow_scorer, job_queue
+    startup["started_at"] = time.perf_counter()
+    if PRELOAD_BLOCKING:
+        preload()
+        preload_task = None
+    else:
+        preload_task = asyncio.get_running_loop().run_in_executor(None, preload)
+    if SHADOW_MODELS:
+        shadow_scorer = ShadowScorer(
+            lambda: [registry.get(name) for name in SHADOW_MODELS],
+            ShadowLog(SHADOW_LOG),
+            max_workers=SHADOW_WORKERS,
+        )
+    if JOB_WORKERS:
+        job_queue = JobQueue()
+        job_queue.start()
+    yield
+    if preload_task is not None and not preload_task.done():
+        preload_task.cancel()
+    await predict_batcher.close()
+    if shadow_scorer is not None:
+        shadow_scorer.close()
+        shadow_scorer = None
+    portfolio_executor.shutdown(wait=True)
+    if portfolio_store is not None:
+        portfolio_store.close()
+    if job_queue is not None:
+        job_queue.stop()
+        job_queue = None
+
+
+app = FastAPI(
+    title="Credit Risk PD Modelling and Decisioning Engine",
+    description="Probability of Default scoring service (tuned XGBoost pipeline).",
+    lifespan=lifespan,
+)
+app.add_middleware(HTTPMetricsMiddleware)
+
+# Raw application fields the feature engineering needs
+REQUIRED_COLUMNS = RAW_FIELDS
+
+
+class LoanApplication(BaseModel):
+    Customer_ID: int
+    Age: float
+    Income: float
+    Annual_Expenses: float
+    Loan_Amount: float
+    Loan_Term_Months: float
+    Credit_Score: float
+    Employment_Status: str
+    Marital_Status: str
+    Education_Level: str
+    Property_Ownership: str
+    Loan_Purpose: str
+    Co_Applicant: str
+    Approval_Channel: str
+    Region: str
+    Application_Date: str
+    Past_Defaults: float
+    # Engineered fields are recomputed server-side
+    DTI: Optional[float] = 0
+    Income_Loan_Ratio: Optional[float] = 0
+    Monthly_Installment: Optional[float] = 0
+    Loan_to_Income_Ratio: Optional[float] = 0
+    Affordability_Score: Optional[float] = 0
+    App_Month: Optional[str] = None
+
+
+# =====================================================
+# 2. Request body parsing
+# =====================================================
+
+def read_batch_body(body: bytes, content_type: Optional[str]) -> pd.DataFrame:
+    """
+    Parse a batch request body into a DataFrame.
+
+    Accepts a JSON array of records (application/json), a CSV body
+    (text/csv), a Parquet file (application/vnd.apache.parquet) or an
+    Arrow IPC stream / file (application/vnd.apache.arrow.stream).
+    Only the fields scoring needs are read, with the compact dtypes of
+    schema.py (JSON records are cast to them after parsing).
+    """
+    fmt = format_for_media_type(content_type)
+    if fmt == "json":
+        records = json.loads(body or b"[]")
+        if not isinstance(records, list):
+            raise ValueError("JSON body must be an array of application records")
+        return conform_frame(pd.DataFrame.from_records(records))
+    return read_frame(body, fmt, columns=SCORING_COLUMNS)
+
+
+def response_format(accept: Optional[str]) -> str:
+    """
+    parquet / arrow when the Accept header asks for one, else json.
+    """
+    for media in (accept or "").split(","):
+        try:
+            fmt = format_for_media_type(media) if media.strip() else None
+        except ValueError:
+            continue
+        if fmt in ("parquet", "arrow"):
+            return fmt
+    return "json"
+
+
+def get_model(model: Optional[str], version: Optional[str]) -> LoadedModel:
+    try:
+        return registry.get(model, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+async def get_model_async(model: Optional[str], version: Optional[str]) -> LoadedModel:
+    """
+    get_model for the async endpoints: a warm model is returned at once,
+    a cold one is loaded on a scoring thread so the event loop never
+    blocks on unpickling.
+    """
+    try:
+        loaded = registry.peek(model, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    if loaded is None:
+        loaded = await asyncio.get_running_loop().run_in_executor(scoring_executor, get_model, model, version)
+    return loaded
+
+
+def shadow_hook(model: Optional[str], loaded: LoadedModel, submit: str):
+    """
+    Challenger hook for champion traffic only; requests that pick a model
+    explicitly are not shadowed.
+    """
+    if shadow_scorer is None or model is not None:
+        return None
+    return partial(getattr(shadow_scorer, submit), champion=loaded.key)
+
+
+def cache_for(loaded: LoadedModel):
+    return pd_cache.for_model(loaded.key) if pd_cache is not None else None
+
+
+def score_predict_jobs(jobs: list) -> list:
+    """
+    Score a micro-batch of /predict jobs, (loaded, reference_date, model, record).
+    Jobs are grouped by model and reference date; each group is one
+    score_applications call (one booster call).
+    """
+    groups = {}
+    for i, (loaded, reference_date, model, _) in enumerate(jobs):
+        groups.setdefault((id(loaded), reference_date, model is None), []).append(i)
+
+    results = [None] * len(jobs)
+    for indices in groups.values():
+        loaded, reference_date, model, _ = jobs[indices[0]]
+        scored = score_applications(
+            [jobs[i][3] for i in indices], loaded.scorer, loaded.config,
+            shadow=shadow_hook(model, loaded, "submit_records"),
+            reference_date=reference_date,
+            cache=cache_for(loaded),
+            drift=loaded.drift,
+        )
+        for i, result in zip(indices, scored):
+            results[i] = result
+    return results
+
+
+predict_batcher = MicroBatcher(
+    score_predict_jobs,
+    max_batch=MICROBATCH_MAX_BATCH,
+    max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+    executor=scoring_executor,
+    max_concurrent=SCORING_THREADS,
+)
+
+
+# =====================================================
+# 3. Scoring endpoints
+# =====================================================
+
+@app.get("/")
+def root():
+    return {"status": "ok", "endpoints": ["/predict", "/predict_batch", "/jobs", "/models", "/metrics", "/ready"]}
+
+
+@app.get("/health")
+def health():
+    """
+    Liveness: the process is up and serving HTTP (models may still be loading).
+    """
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness: 200 once preloaded models are loaded and warm, 503 before
+    (or if the preload failed). Also reports preload and
+    time-to-first-prediction seconds since server start.
+    """
+    body = {k: v for k, v in startup.items() if k != "started_at"}
+    return JSONResponse(body, status_code=200 if startup["ready"] else 503)
+
+
+@app.post("/predict")
+async def predict(
+    application: LoanApplication,
+    model: Optional[str] = None,
+    version: Optional[str] = None,
+    reference_date: Optional[date] = None,
+    explain: bool = False,
+):
+    """
+    Score a single application (precompiled path, no pandas or sklearn).
+    Concurrent requests are coalesced by the micro-batcher and scored as
+    one matrix; each caller still gets only its own result.
+    model / version select a registry entry; default is the active champion.
+    reference_date (YYYY-MM-DD) is the date App_Vintage is measured from;
+    default is SCORING_REFERENCE_DATE or today.
+    With explain=true the response carries Reasons: the top fields behind
+    the PD when it is above the explain threshold, otherwise null.
+    """
+    loaded = await get_model_async(model, version)
+    loop = asyncio.get_running_loop()
+    reference = resolve_reference_date(reference_date)
+    job = (loaded, reference, model, application.model_dump())
+    if MICROBATCH_MAX_BATCH > 1:
+        scored = await predict_batcher.submit(job)
+    else:
+        scored = (await loop.run_in_executor(scoring_executor, score_predict_jobs, [job]))[0]
+    record_first_prediction()
+
+    response = {
+        "Customer_ID": application.Customer_ID,
+        "Predicted_PD": round(scored["PD_Default"], 3),
+        "Predicted_Class": scored["Default_Pred"],
+        "Risk_Band": scored["Risk_Band"],
+        "Model": loaded.key,
+    }
+    if explain:
+        response["Reasons"] = None
+        if scored["PD_Default"] > explain_threshold(loaded.config, EXPLAIN_MIN_PD):
+            try:
+                response["Reasons"] = await loop.run_in_executor(
+                    scoring_executor, loaded.explainer.explain_record, job[3], reference
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+    return response
+
+
+@app.post("/predict_batch")
+async def predict_batch(
+    request: Request,
+    model: Optional[str] = None,
+    version: Optional[str] = None,
+    reference_date: Optional[date] = None,
+    batch_id: Optional[str] = None,
+    explain: bool = False,
+):
+    """
+    Score a chunk of applications with one vectorised model call.
+    Clients splitting a file into chunks should send the same
+    reference_date with every chunk.
+    With PORTFOLIO_DB set the scored chunk is also folded into the
+    portfolio summaries; a retried chunk sent with the same batch_id is
+    counted once.
+
+    The response is columnar JSON in input row order:
+    {"n_rows": N, "Customer_ID": [...], "Predicted_PD": [...],
+     "Predicted_Class": [...], "Risk_Band": [...], "Model": "name:version"}
+    or, with Accept: application/vnd.apache.parquet or
+    application/vnd.apache.arrow.stream, a table with those four columns
+    (model key in the X-Model header).
+    explain=true adds Reasons: top fields for rows above the explain
+    threshold, null for the rest.
+    """
+    loaded = await get_model_async(model, version)
+    loop = asyncio.get_running_loop()
+    out_format = response_format(request.headers.get("accept"))
+    body = await request.body()
+    try:
+        fmt = format_for_media_type(request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    try:
+        df_batch = await loop.run_in_executor(
+            scoring_executor, read_batch_body, body, MEDIA_TYPES[fmt]
+        )
+    except InvalidValuesError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except (ValueError, pa.ArrowException) as e:
+        raise HTTPException(status_code=400, detail=f"Unreadable {fmt} body: {e}")
+
+    # An empty JSON array has no columns at all: answer it before the column check
+    if df_batch.empty:
+        empty = pd.DataFrame({"Customer_ID": [], "PD_Default": [], "Default_Pred": [], "Risk_Band": []})
+        return batch_response(empty, loaded.key, out_format)
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df_batch.columns]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Missing columns: {missing}")
+
+    try:
+        scored = await loop.run_in_executor(scoring_executor, partial(
+            score_new_applications,
+            df_batch, loaded.pipe, loaded.config,
+            shadow=shadow_hook(model, loaded, "submit_batch"),
+            reference_date=reference_date,
+            cache=cache_for(loaded),
+            explainer=loaded.explainer if explain else None,
+            explain_min_pd=EXPLAIN_MIN_PD,
+            drift=loaded.drift,
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    record_first_prediction()
+    if portfolio_store is not None:
+        portfolio_executor.submit(fold_into_portfolio, scored, batch_id or uuid.uuid4().hex)
+
+    return await loop.run_in_executor(scoring_executor, batch_response, scored, loaded.key, out_format)
+
+
+def batch_response(scored: pd.DataFrame, model_key: str, fmt: str = "json") -> Response:
+    """
+    Columnar JSON for a scored batch, encoded directly (native Python lists
+    need no jsonable_encoder pass) and timed as the serialise stage.
+    For fmt parquet / arrow the same columns are sent as a binary table.
+    """
+    with stage("serialise", "batch"):
+        if fmt != "json":
+            table = pd.DataFrame({
+                "Customer_ID": scored["Customer_ID"] if "Customer_ID" in scored.columns else None,
+                "Predicted_PD": scored["PD_Default"].astype("float64"),
+                "Predicted_Class": scored["Default_Pred"].astype("int64"),
+                "Risk_Band": scored["Risk_Band"],
+                **({"Reasons": scored["Reasons"]} if "Reasons" in scored.columns else {}),
+            })
+            return Response(to_bytes(table, fmt), media_type=MEDIA_TYPES[fmt], headers={"X-Model": model_key})
+
+        if "Customer_ID" in scored.columns:
+            customer_ids = scored["Customer_ID"].tolist()
+        else:
+            customer_ids = [None] * len(scored)
+
+        return JSONResponse({
+            "n_rows": len(scored),
+            "Customer_ID": customer_ids,
+            "Predicted_PD": scored["PD_Default"].astype(float).round(6).tolist(),
+            "Predicted_Class": scored["Default_Pred"].astype(int).tolist(),
+            "Risk_Band": scored["Risk_Band"].tolist(),
+            **({"Reasons": scored["Reasons"].tolist()} if "Reasons" in scored.columns else {}),
+            "Model": model_key,
+        })
+
+
+# =====================================================
+# 4. Model management
+# =====================================================
+
+def service_metrics():
+    """
+    Scrape-time values owned by other components (no request-path cost).
+    """
+    yield ("pd_startup_seconds", "gauge", "Service start-up time by phase.",
+           [({"phase": phase}, startup[f"{phase}_seconds"])
+            for phase in ("preload", "first_prediction")
+            if startup[f"{phase}_seconds"] is not None])
+    yield ("pd_ready", "gauge", "1 once preloaded models are warm.", [({}, int(startup["ready"]))])
+
+    models = registry.loaded()
+    model_labels = [{"model": m["model"], "version": m["version"]} for m in models]
+    yield ("pd_model_load_seconds", "gauge", "Time to unpickle and compile a warm model.",
+           [(labels, m["load_seconds"]) for labels, m in zip(model_labels, models)])
+    yield ("pd_model_warmup_seconds", "gauge", "Time to warm up a loaded model.",
+           [(labels, m["warmup_seconds"]) for labels, m in zip(model_labels, models)])
+    yield ("pd_explain_cache_hits_total", "counter", "Explanations served without the booster.",
+           [(labels, m["explanations"]["hits"]) for labels, m in zip(model_labels, models)])
+    yield ("pd_explain_cache_misses_total", "counter", "Explanations computed with TreeSHAP.",
+           [(labels, m["explanations"]["misses"]) for labels, m in zip(model_labels, models)])
+    yield ("pd_drift_rows_total", "counter", "Scored rows added to the drift histograms.",
+           [(labels, m["drift"]["rows"]) for labels, m in zip(model_labels, models)])
+    yield ("pd_drift_psi", "gauge", "PSI of the PD over the retained drift windows against the training baseline.",
+           [(labels, m["drift"]["pd_psi"]) for labels, m in zip(model_labels, models)
+            if m["drift"]["pd_psi"] is not None])
+
+    batcher = predict_batcher.stats()
+    yield ("pd_microbatch_requests_total", "counter", "Requests scored through the /predict micro-batcher.",
+           [({}, batcher["requests"])])
+    yield ("pd_microbatch_batches_total", "counter", "Micro-batches flushed.",
+           [({}, batcher["batches"])])
+
+    if pd_cache is not None:
+        cache = pd_cache.stats()
+        yield ("pd_cache_hits_total", "counter", "PD cache hits.", [({}, cache["hits"])])
+        yield ("pd_cache_misses_total", "counter", "PD cache misses.", [({}, cache["misses"])])
+        yield ("pd_cache_evictions_total", "counter", "PD cache LRU evictions.", [({}, cache["evictions"])])
+        yield ("pd_cache_entries", "gauge", "Entries in the PD cache.", [({}, cache["entries"])])
+
+    if shadow_scorer is not None:
+        shadow = shadow_scorer.stats()
+        yield ("pd_shadow_jobs", "gauge", "Shadow scoring jobs by state.",
+               [({"state": k}, v) for k, v in shadow.items()])
+
+    if portfolio_store is not None:
+        yield ("pd_portfolio_folds_total", "counter", "Scored batches folded into the portfolio summaries.",
+               [({"result": k}, v) for k, v in portfolio_folds.items()])
+
+    if job_queue is not None:
+        yield ("pd_jobs", "gauge", "Batch jobs by state.",
+               [({"state": k}, v) for k, v in job_queue.store.counts().items()])
+        yield ("pd_job_worker_restarts_total", "counter", "Job workers replaced after exiting.",
+               [({}, job_queue.restarts)])
+
+
+REGISTRY.add_callback(service_metrics)
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus text exposition: per-stage timings, request and row
+    counters, batch sizes, cache and model-load figures.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/batcher")
+def batcher_stats():
+    """
+    /predict micro-batcher settings, batch counts and batch-size histogram.
+    """
+    return predict_batcher.stats()
+
+
+@app.get("/cache")
+def cache_stats():
+    """
+    PD cache size, hit/miss counters and hit rate (this process).
+    """
+    if pd_cache is None:
+        return {"backend": "off"}
+    return pd_cache.stats()
+
+
+@app.post("/cache/clear")
+def clear_cache():
+    if pd_cache is not None:
+        pd_cache.invalidate()
+    return cache_stats()
+
+
+@app.get("/models")
+def list_models():
+    """
+    Available artefacts, the active version per model and the warm pool.
+    """
+    available = registry.available()
+    return {
+        "default_model": registry.default_model,
+        "available": available,
+        "active": {name: registry.active_version(name) for name in available},
+        "loaded": registry.loaded(),
+        "shadow": {
+            "challengers": SHADOW_MODELS,
+            **(shadow_scorer.stats() if shadow_scorer is not None else {}),
+        },
+    }
+
+
+@app.post("/models/refresh")
+def refresh_models():
+    """
+    Rescan the model directory so newly copied versions become servable.
+    """
+    return {"available": registry.refresh()}
+
+
+@app.post("/models/{name}/activate")
+def activate_model(name: str, version: str):
+    """
+    Load, warm and switch name to version. In-flight requests finish on
+    the model object they already hold.
+    """
+    try:
+        loaded = registry.activate(name, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    return loaded.describe()
+
+
+# =====================================================
+# 5. Portfolio analytics
+# =====================================================
+
+def fold_into_portfolio(scored: pd.DataFrame, batch_id: str):
+    """
+    Reduce a scored batch to segment summaries and merge them into the
+    store (runs on portfolio_executor, off the response path).
+    """
+    try:
+        with stage("portfolio", "batch"):
+            merged = portfolio_store.merge(PortfolioAnalytics.from_frame(scored), batch_id)
+    except Exception:
+        portfolio_folds["failed"] += 1
+        raise
+    portfolio_folds["merged" if merged else "duplicate"] += 1
+
+
+def require_portfolio() -> PortfolioStore:
+    if portfolio_store is None:
+        raise HTTPException(status_code=404, detail="Portfolio analytics are off (set PORTFOLIO_DB)")
+    return portfolio_store
+
+
+@app.get("/portfolio")
+def portfolio_overview():
+    """
+    Available reports and how many batches, rows and segments the store holds.
+    """
+    store = require_portfolio()
+    return {"reports": list(REPORTS), **store.stats(), "folds": portfolio_folds}
+
+
+@app.get("/portfolio/{report}")
+def portfolio_report(report: str):
+    """
+    One portfolio report, read from the segment summaries (O(segments)).
+    """
+    store = require_portfolio()
+    if report not in REPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown report: {report}")
+    df = store.report(report)
+    return {
+        "report": report,
+        "columns": list(df.columns),
+        "rows": df.astype(object).where(df.notna(), None).to_dict("records"),
+    }
+
+
+# =====================================================
+# 6. Drift monitoring
+# =====================================================
+
+@app.get("/drift")
+def drift_report(model: Optional[str] = None, version: Optional[str] = None, windows: Optional[int] = None):
+    """
+    PSI of the PD (overall and per risk band) and CSI of the monitored
+    features over the last `windows` drift windows of this process's
+    traffic (default: all retained), against the model's training baseline.
+    """
+    loaded = get_model(model, version)
+    if windows is not None and windows < 1:
+        raise HTTPException(status_code=422, detail="windows must be at least 1")
+    return {"model": loaded.key, **loaded.drift.report(windows)}
+
+
+@app.get("/drift/state")
+def drift_state(model: Optional[str] = None, version: Optional[str] = None):
+    """
+    Raw histogram counts per window, for merging the monitors of several
+    workers or replicas (drift.DriftMonitor.merge).
+    """
+    loaded = get_model(model, version)
+    return {"model": loaded.key, **loaded.drift.state()}
+
+
+# =====================================================
+# 7. Batch jobs
+# =====================================================
+
+def require_jobs() -> JobQueue:
+    if job_queue is None:
+        raise HTTPException(status_code=404, detail="Batch jobs are disabled (JOB_WORKERS=0)")
+    return job_queue
+
+
+def require_job(job_id: str) -> dict:
+    job = require_jobs().status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    request: Request,
+    model: Optional[str] = None,
+    version: Optional[str] = None,
+    reference_date: Optional[date] = None,
+    output_format: str = "parquet",
+):
+    """
+    Queue a whole file (CSV, Parquet or Arrow IPC body, by Content-Type)
+    for background scoring and return the job at once. The body is
+    streamed to disk, never held in memory. Poll GET /jobs/{job_id} for
+    rows_done / rows_total and fetch GET /jobs/{job_id}/result when the
+    state is "done". The model version is fixed at submission.
+    """
+    queue = require_jobs()
+    try:
+        fmt = format_for_media_type(request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    if fmt not in INPUT_FORMATS:
+        raise HTTPException(status_code=415, detail=f"Jobs take {', '.join(INPUT_FORMATS)} files, not {fmt}")
+    if output_format not in FORMAT_SUFFIX:
+        raise HTTPException(status_code=422, detail=f"output_format must be one of {list(FORMAT_SUFFIX)}")
+    try:
+        key, path = registry.resolve(model, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+    upload = queue.upload_path()
+    try:
+        with open(upload, "wb") as f:
+            async for chunk in request.stream():
+                f.write(chunk)
+        # Header check and row count read the file: off the event loop,
+        # and off the scoring threads
+        job = await asyncio.get_running_loop().run_in_executor(None, partial(
+            queue.submit, upload, fmt, key, path,
+            reference_date=reference_date, output_format=output_format,
+        ))
+    except (ValueError, pa.ArrowException) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        upload.unlink(missing_ok=True)
+    return job
+
+
+@app.get("/jobs")
+def list_jobs(state: Optional[str] = None, limit: int = 50):
+    """
+    Most recent jobs first, optionally only those in one state.
+    """
+    queue = require_jobs()
+    return {"jobs": queue.list(limit, state), **queue.stats()}
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    return require_job(job_id)
+
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """
+    A queued job is cancelled at once; a running one stops after the
+    chunk it is scoring and keeps no partial result.
+    """
+    require_job(job_id)
+    return job_queue.cancel(job_id)
+
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    """
+    The scored file of a finished job (409 until it is done).
+    """
+    job = require_job(job_id)
+    try:
+        path = job_queue.result(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[job["output_format"]],
+        filename=f"scored_{job_id}{FORMAT_SUFFIX[job['output_format']]}",
+        headers={"X-Model": job["model"]},
+    )
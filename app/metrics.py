@@ -0,0 +1,281 @@
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# =====================================================
+# 1. Minimal Prometheus-style metrics (text exposition format 0.0.4)
+# =====================================================
+
+# Latency buckets in seconds: 50 us .. 10 s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Rows per scoring call / requests per micro-batch
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value: str) -> str:
+    # Label values may hold any text; the format escapes only these three
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values):
+        """
+        Child metric for one label combination (created once, then reused).
+        """
+        child = self._children.get(values)  # fast path: string label values
+        if child is None:
+            key = tuple(str(v) for v in values)
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, labelnames, key):
+        return [f"{name}_total{_format_labels(labelnames, key)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def render(self) -> List[str]:
+        # Text format 0.0.4: HELP / TYPE use the exposed sample name
+        name = f"{self.name}_total"
+        lines = [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class _Timer:
+    # Plain class rather than @contextmanager: about 4x cheaper per use
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    def render(self, name, labelnames, key):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, key)} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+
+class MetricsRegistry:
+    """
+    Holds metrics and scrape-time callbacks. Callbacks return
+    (name, type, help, [(labels dict, value), ...]) tuples, for values
+    that already live elsewhere (cache counters, model load times) and
+    so cost nothing on the request path.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._callbacks: List[Callable[[], Iterable[tuple]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_callback(self, callback: Callable[[], Iterable[tuple]]):
+        self._callbacks.append(callback)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for callback in self._callbacks:
+            for name, kind, documentation, samples in callback():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    label_str = _format_labels(tuple(labels), tuple(str(v) for v in labels.values()))
+                    lines.append(f"{name}{label_str} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# =====================================================
+# 2. Scoring metrics (process-wide)
+# =====================================================
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "pd_stage_seconds",
+    "Time per scoring stage (features, preprocess, model, decision, serialise) and path.",
+    ("stage", "path"),
+)
+ROWS_SCORED = REGISTRY.counter(
+    "pd_rows_scored",
+    "Applications scored by the pipeline (cache hits excluded).",
+    ("path",),
+)
+BATCH_ROWS = REGISTRY.histogram(
+    "pd_batch_rows",
+    "Rows per scoring call (micro-batch size for the predict path).",
+    ("path",),
+    buckets=SIZE_BUCKETS,
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "pd_http_requests",
+    "HTTP requests by route and status code.",
+    ("method", "route", "status"),
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "pd_http_request_seconds",
+    "HTTP request latency by route, measured inside the service.",
+    ("method", "route"),
+)
+
+
+def stage(name: str, path: str):
+    """
+    Context manager timing one scoring stage into pd_stage_seconds.
+    """
+    return STAGE_SECONDS.labels(name, path).time()
+
+
+def stage_totals() -> Dict[str, float]:
+    """
+    Seconds spent per stage in this process, summed over paths
+    (the batch CLI collects these from its workers).
+    """
+    totals: Dict[str, float] = {}
+    with STAGE_SECONDS._lock:
+        children = list(STAGE_SECONDS._children.items())
+    for (stage_name, _), child in children:
+        totals[stage_name] = totals.get(stage_name, 0.0) + child.sum
+    return totals
+
+
+class HTTPMetricsMiddleware:
+    """
+    Plain ASGI middleware counting requests and timing them per route
+    template (e.g. /models/{name}/activate), so label cardinality stays
+    bounded. Cheaper than a BaseHTTPMiddleware, which wraps every response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_SECONDS.labels(method, route_path).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route_path, str(status["code"])).inc()
@@ -0,0 +1,335 @@
+import copy
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from features import engineer_features_record
+
+# =====================================================
+# 1. Feature encoding shared by the compiled and native scorers
+# =====================================================
+
+# Exported artefacts live in <name>_<version>.native/ next to the pickle
+NATIVE_SUFFIX = ".native"
+SPEC_FILE = "spec.json"
+SPEC_FORMAT = 1
+
+# Encoded calls with fewer rows than this use the single-threaded model
+# (records and micro-batches); larger frames use all threads
+SINGLE_THREAD_MAX_ROWS = 1024
+
+
+def _jsonable(value):
+    value = value.item() if hasattr(value, "item") else value
+    # A fitted NaN category is written as null (JSON has no NaN)
+    return None if isinstance(value, float) and np.isnan(value) else value
+
+
+def linear_contribs(x: np.ndarray, coef: np.ndarray, intercept: float) -> np.ndarray:
+    """
+    Exact log-odds contributions of a logistic regression (coef * x per
+    column), with the intercept as the trailing bias column.
+    """
+    return np.column_stack([x * coef, np.full(len(x), intercept)])
+
+
+class FeatureEncoder:
+    """
+    Encodes engineered features into the dense float64 matrix the model
+    was trained on: a standardised numeric block and one-hot categoricals.
+
+    Subclasses fill num_cols, num_start, mean, scale, cat_index (column ->
+    {category: output index}) and n_features, then call _finish().
+    A category fitted on missing values (NaN/None) matches every missing
+    input, as in OneHotEncoder.
+    """
+
+    num_cols: list
+    num_start: int
+    mean: np.ndarray
+    scale: np.ndarray
+    cat_index: dict
+    n_features: int
+
+    def _finish(self):
+        self.num_end = self.num_start + len(self.num_cols)
+        self.missing_index = {
+            col: j for col, index in self.cat_index.items() for c, j in index.items() if pd.isna(c)
+        }
+
+    def encode(self, record_fe: dict) -> np.ndarray:
+        """
+        Encode one engineered record into a (1, n_features) float64 row.
+        """
+        return self.encode_many([record_fe])
+
+    def encode_many(self, records_fe: list) -> np.ndarray:
+        """
+        Encode engineered records into one (n_records, n_features) matrix,
+        so a micro-batch is scored with a single booster call.
+        """
+        x = np.zeros((len(records_fe), self.n_features))
+
+        for row, record_fe in zip(x, records_fe):
+            for i, col in enumerate(self.num_cols, start=self.num_start):
+                value = record_fe[col]
+                row[i] = np.nan if value is None else value
+            for col, index in self.cat_index.items():
+                value = record_fe[col]
+                j = index.get(value)
+                if j is None and col in self.missing_index and pd.isna(value):
+                    j = self.missing_index[col]
+                if j is not None:
+                    row[j] = 1.0
+
+        x[:, self.num_start:self.num_end] -= self.mean
+        x[:, self.num_start:self.num_end] /= self.scale
+        return x
+
+    def encode_frame(self, df_fe: pd.DataFrame) -> np.ndarray:
+        """
+        Vectorised encode_many for an engineered batch frame.
+        Unknown categories leave their one-hot block at zero, as do missing
+        ones unless a missing category was fitted.
+        """
+        n = len(df_fe)
+        x = np.zeros((n, self.n_features))
+
+        for i, col in enumerate(self.num_cols, start=self.num_start):
+            x[:, i] = df_fe[col].to_numpy(dtype="float64", na_value=np.nan)
+
+        rows = np.arange(n)
+        for col in self.cat_index:
+            categories, columns = self._category_table(col)
+            values = df_fe[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Look up each distinct label once, then gather by code
+                codes = self._code_lookup(col, values.cat.categories)[values.cat.codes.to_numpy()]
+            else:
+                codes = categories.get_indexer(values.to_numpy(dtype=object))
+            hit = codes >= 0
+            x[rows[hit], columns[codes[hit]]] = 1.0
+            if col in self.missing_index:
+                x[rows[values.isna().to_numpy()], self.missing_index[col]] = 1.0
+
+        x[:, self.num_start:self.num_end] -= self.mean
+        x[:, self.num_start:self.num_end] /= self.scale
+        return x
+
+    def _category_table(self, col: str) -> tuple:
+        # (known labels, their one-hot columns), built once per encoder
+        tables = self.__dict__.setdefault("_category_tables", {})
+        if col not in tables:
+            index = self.cat_index[col]
+            categories = pd.Index([c for c in index if not pd.isna(c)], dtype=object)
+            tables[col] = (categories, np.array([index[c] for c in categories], dtype=np.int64))
+        return tables[col]
+
+    def _code_lookup(self, col: str, categories: pd.Index) -> np.ndarray:
+        """
+        Category code -> position in _category_table (-1 if unknown), with a
+        trailing -1 for code -1 (missing). Inputs in the fixed schema dtypes
+        (schema.py) share their categories, so this is computed once and
+        reused for every batch.
+        """
+        lookups = self.__dict__.setdefault("_code_lookups", {})
+        key = (col, tuple(categories))
+        lookup = lookups.get(key)
+        if lookup is None:
+            lookup = np.append(self._category_table(col)[0].get_indexer(categories.astype(object)), -1)
+            # Bounded: inputs with ad hoc categories would otherwise add an entry per batch
+            if len(lookups) < 1024:
+                lookups[key] = lookup
+        return lookup
+
+    def predict_proba_encoded(self, x: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict_contribs(self, x: np.ndarray) -> np.ndarray:
+        """
+        Log-odds contribution of every encoded column for already-encoded
+        rows, shape (n, n_features + 1) with the bias term last.
+        """
+        raise NotImplementedError
+
+    def feature_fields(self) -> tuple:
+        """
+        (field names, field index of every encoded column): each numeric
+        column is its own field and each one-hot block folds back into the
+        column it encodes (e.g. Loan_Purpose, Credit_Band).
+        """
+        fields = list(self.num_cols) + list(self.cat_index)
+        column_field = np.full(self.n_features, -1, dtype=np.int64)
+        column_field[self.num_start:self.num_end] = np.arange(len(self.num_cols))
+        for j, index in enumerate(self.cat_index.values(), start=len(self.num_cols)):
+            column_field[list(index.values())] = j
+        return fields, column_field
+
+    def predict_pd(self, record: dict, reference_date=None) -> float:
+        """
+        PD for one raw application dict (engineers features itself).
+        """
+        x = self.encode(engineer_features_record(record, reference_date))
+        return float(self.predict_proba_encoded(x)[0])
+
+    def encoder_spec(self) -> dict:
+        """
+        JSON-ready description of the encoding (the preprocess half of an
+        exported artefact).
+        """
+        return {
+            "n_features": self.n_features,
+            "numeric": {
+                "columns": list(self.num_cols),
+                "start": self.num_start,
+                "mean": [float(v) for v in self.mean],
+                "scale": [float(v) for v in self.scale],
+            },
+            "categorical": [
+                {
+                    "column": col,
+                    "categories": [_jsonable(c) for c in index],
+                    "offset": min(index.values()) if index else 0,
+                }
+                for col, index in self.cat_index.items()
+            ],
+        }
+
+
+# =====================================================
+# 2. Model backends (library-native formats, no pickle)
+# =====================================================
+
+class _XGBoostModel:
+    def __init__(self, spec: dict, root: Path):
+        import xgboost as xgb
+
+        self.booster = xgb.Booster(model_file=str(root / spec["file"]))
+        self.record_booster = copy.copy(self.booster)
+        self.record_booster.set_param({"nthread": 1})
+        self.iteration_range = tuple(spec.get("iteration_range", (0, 0)))
+
+    def set_threads(self, threads: int):
+        self.booster.set_param({"nthread": threads})
+
+    def predict(self, x: np.ndarray, single_thread: bool) -> np.ndarray:
+        booster = self.record_booster if single_thread else self.booster
+        return booster.inplace_predict(
+            x, iteration_range=self.iteration_range, missing=np.nan, validate_features=False
+        )
+
+    def contribs(self, x: np.ndarray) -> np.ndarray:
+        # TreeSHAP in the booster itself, batched over all rows
+        import xgboost as xgb
+
+        return self.booster.predict(
+            xgb.DMatrix(x, missing=np.nan), pred_contribs=True, iteration_range=self.iteration_range
+        )
+
+
+class _LightGBMModel:
+    def __init__(self, spec: dict, root: Path):
+        import lightgbm as lgb
+
+        self.booster = lgb.Booster(model_file=str(root / spec["file"]))
+        self.threads = 0
+
+    def set_threads(self, threads: int):
+        self.threads = threads
+
+    def predict(self, x: np.ndarray, single_thread: bool) -> np.ndarray:
+        return self.booster.predict(x, num_threads=1 if single_thread else self.threads)
+
+    def contribs(self, x: np.ndarray) -> np.ndarray:
+        return self.booster.predict(x, pred_contrib=True, num_threads=self.threads)
+
+
+class _LinearModel:
+    # Binary logistic regression: expit(x @ coef + intercept)
+    def __init__(self, spec: dict, root: Path):
+        self.coef = np.asarray(spec["coef"], dtype="float64")
+        self.intercept = float(spec["intercept"])
+
+    def set_threads(self, threads: int):
+        pass
+
+    def predict(self, x: np.ndarray, single_thread: bool) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-(x @ self.coef + self.intercept)))
+
+    def contribs(self, x: np.ndarray) -> np.ndarray:
+        return linear_contribs(x, self.coef, self.intercept)
+
+
+MODEL_BACKENDS = {
+    "xgboost": _XGBoostModel,
+    "lightgbm": _LightGBMModel,
+    "linear": _LinearModel,
+}
+
+
+# =====================================================
+# 3. Native scorer
+# =====================================================
+
+class NativeScorer(FeatureEncoder):
+    """
+    Scores an exported artefact (see export_native.py) without unpickling
+    anything or importing sklearn: the encoding is rebuilt from spec.json
+    and the model is loaded from its library's own file format.
+
+    Stands in for both the pickled pipeline (predict_proba on an engineered
+    frame) and CompiledScorer (encode / predict_proba_encoded), so the
+    registry, batch path, micro-batcher and shadow scorer all accept it.
+    """
+
+    def __init__(self, spec: dict, root: Path):
+        if spec.get("format") != SPEC_FORMAT:
+            raise ValueError(f"Unsupported native artefact format: {spec.get('format')!r}")
+
+        numeric = spec["numeric"]
+        self.num_cols = list(numeric["columns"])
+        self.num_start = numeric["start"]
+        self.mean = np.asarray(numeric["mean"], dtype="float64")
+        self.scale = np.asarray(numeric["scale"], dtype="float64")
+        self.cat_index = {
+            block["column"]: {cat: block["offset"] + i for i, cat in enumerate(block["categories"])}
+            for block in spec["categorical"]
+        }
+        self.n_features = spec["n_features"]
+        self._finish()
+
+        model_spec = spec["model"]
+        if model_spec["type"] not in MODEL_BACKENDS:
+            raise ValueError(f"Unknown native model type: {model_spec['type']!r}")
+        self.model_type = model_spec["type"]
+        self.model = MODEL_BACKENDS[self.model_type](model_spec, Path(root))
+
+    @classmethod
+    def load(cls, path) -> "NativeScorer":
+        path = Path(path)
+        return cls(json.loads((path / SPEC_FILE).read_text()), path)
+
+    def set_threads(self, threads: int):
+        """
+        Cap the threads used for large frames (the batch CLI's per-worker cap).
+        """
+        self.model.set_threads(threads)
+
+    def predict_proba_encoded(self, x: np.ndarray) -> np.ndarray:
+        """
+        PD for already-encoded rows.
+        """
+        return self.model.predict(x, single_thread=len(x) < SINGLE_THREAD_MAX_ROWS)
+
+    def predict_contribs(self, x: np.ndarray) -> np.ndarray:
+        return self.model.contribs(x)
+
+    def predict_proba(self, df_fe: pd.DataFrame) -> np.ndarray:
+        """
+        (n, 2) class probabilities for an engineered frame, as
+        Pipeline.predict_proba returns them.
+        """
+        proba = self.predict_proba_encoded(self.encode_frame(df_fe)).astype("float64")
+        return np.column_stack([1 - proba, proba])
@@ -0,0 +1,352 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from features import CATEGORICAL_FIELDS, DATE_FIELD, NUMERIC_FIELDS
+
+# =====================================================
+# Content-addressed PD cache
+# =====================================================
+
+# A cached result: (PD_Default, Default_Pred, Risk_Band)
+Result = Tuple[float, int, str]
+
+
+# -----------------------------
+# Canonical keys
+# -----------------------------
+def record_digest(record: dict) -> str:
+    """
+    Stable hash of the raw fields feature engineering reads. Values are
+    normalised by type (numbers as float, everything else as str) but not
+    by content: " Gauteng" and "Gauteng" encode differently in the model,
+    so they must not share an entry. Customer_ID is not part of the key.
+    """
+    canonical = (
+        tuple(float(record[c]) for c in NUMERIC_FIELDS),
+        tuple(str(record[c]) for c in CATEGORICAL_FIELDS),
+        str(record[DATE_FIELD]),
+    )
+    return "r" + hashlib.blake2b(repr(canonical).encode(), digest_size=16).hexdigest()
+
+
+def frame_digests(df: pd.DataFrame) -> List[str]:
+    """
+    Row hashes for a batch, vectorised with pd.util.hash_pandas_object over
+    the same type-normalised raw fields. Batch and single-record keys live
+    in separate namespaces ("b" / "r").
+    """
+    canonical = pd.DataFrame(
+        {
+            **{c: df[c].to_numpy(dtype="float64", na_value=np.nan) for c in NUMERIC_FIELDS},
+            **{c: df[c].astype(str).to_numpy() for c in CATEGORICAL_FIELDS},
+            DATE_FIELD: df[DATE_FIELD].astype(str).to_numpy(),
+        },
+        copy=False,
+    )
+    hashes = pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+    return [f"b{h:016x}" for h in hashes.tolist()]
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+class MemoryBackend:
+    """
+    In-process LRU + TTL store (an OrderedDict guarded by a lock).
+    Also serves as the stand-in wherever a shared store is not configured.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def get_many(self, keys: List[tuple], now: float) -> Dict[tuple, Result]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                if entry[1] <= now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = entry[0]
+        return found
+
+    def set_many(self, items: List[Tuple[tuple, Result]], expires_at: float):
+        with self._lock:
+            for key, value in items:
+                self._data[key] = (value, expires_at)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model_name: Optional[str] = None):
+        with self._lock:
+            if model_name is None:
+                self._data.clear()
+                return
+            prefix = model_name + ":"
+            for key in [k for k in self._data if k[0].startswith(prefix)]:
+                del self._data[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteBackend:
+    """
+    Shared LRU + TTL store in a local SQLite file, so several API worker
+    processes (or the API and a Streamlit app on one box) share entries.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pd_cache (
+        model      TEXT NOT NULL,
+        digest     TEXT NOT NULL,
+        pd         REAL,
+        pred       INTEGER NOT NULL,
+        band       TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        last_used  REAL NOT NULL,
+        PRIMARY KEY (model, digest)
+    ) WITHOUT ROWID
+    """
+
+    # Digests per SELECT ... IN (...) (below SQLite's bound-parameter limit)
+    QUERY_CHUNK = 500
+
+    def __init__(self, path, max_entries: int):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self._SCHEMA)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pd_cache_last_used ON pd_cache (last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys: List[tuple], now: float) -> Dict[tuple, Result]:
+        by_model: Dict[str, List[str]] = {}
+        for model, digest in keys:
+            by_model.setdefault(model, []).append(digest)
+
+        found = {}
+        with self._lock:
+            for model, digests in by_model.items():
+                for start in range(0, len(digests), self.QUERY_CHUNK):
+                    part = digests[start:start + self.QUERY_CHUNK]
+                    rows = self._conn.execute(
+                        "SELECT digest, pd, pred, band FROM pd_cache "
+                        f"WHERE model = ? AND expires_at > ? AND digest IN ({','.join('?' * len(part))})",
+                        (model, now, *part),
+                    ).fetchall()
+                    for digest, pd_value, pred, band in rows:
+                        found[(model, digest)] = (pd_value, pred, band)
+            if found:
+                self._conn.executemany(
+                    "UPDATE pd_cache SET last_used = ? WHERE model = ? AND digest = ?",
+                    [(now, *key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def set_many(self, items: List[Tuple[tuple, Result]], expires_at: float):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pd_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(*key, *value, expires_at, now) for key, value in items],
+            )
+            self._conn.execute("DELETE FROM pd_cache WHERE expires_at <= ?", (now,))
+            excess = self._conn.execute("SELECT COUNT(*) FROM pd_cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM pd_cache WHERE (model, digest) IN "
+                    "(SELECT model, digest FROM pd_cache ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def invalidate(self, model_name: Optional[str] = None):
+        with self._lock:
+            if model_name is None:
+                self._conn.execute("DELETE FROM pd_cache")
+            else:
+                prefix = model_name + ":"
+                self._conn.execute(
+                    "DELETE FROM pd_cache WHERE substr(model, 1, ?) = ?", (len(prefix), prefix)
+                )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pd_cache").fetchone()[0]
+
+
+# -----------------------------
+# Cache front end
+# -----------------------------
+class PDCache:
+    """
+    Result cache in front of the scoring path.
+
+    Entries are keyed on (model key, reference date, digest of the raw
+    fields), so a new model version or a different App_Vintage reference
+    date never reuses an old PD. Results expire after ttl_seconds and the
+    least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, backend, ttl_seconds: float = 900.0):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hits: int, misses: int):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def lookup(self, model: str, digests: List[str]) -> Dict[str, Result]:
+        found = self.backend.get_many([(model, d) for d in digests], time.time())
+        self._count(len(found), len(digests) - len(found))
+        return {key[1]: value for key, value in found.items()}
+
+    def store(self, model: str, results: Dict[str, Result]):
+        if results:
+            self.backend.set_many(
+                [((model, d), value) for d, value in results.items()],
+                time.time() + self.ttl_seconds,
+            )
+
+    def invalidate(self, model_name: Optional[str] = None):
+        """
+        Drop entries for every version of model_name (all entries if None).
+        Registered as a registry listener so swaps never serve stale PDs.
+        """
+        self.backend.invalidate(model_name)
+
+    def for_model(self, model_key: str) -> "BoundPDCache":
+        return BoundPDCache(self, model_key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else None,
+            "evictions": self.backend.evictions,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+class BoundPDCache:
+    """
+    PDCache view for one model version, as passed to
+    score_new_applications / score_application.
+    """
+
+    def __init__(self, cache: PDCache, model_key: str):
+        self.cache = cache
+        self.model_key = model_key
+
+    def _namespace(self, reference_date: pd.Timestamp) -> str:
+        return f"{self.model_key}|{reference_date.date().isoformat()}"
+
+    def score_record(self, record: dict, reference_date: pd.Timestamp, score_fn: Callable[[dict], Result]) -> Result:
+        model = self._namespace(reference_date)
+        digest = record_digest(record)
+        found = self.cache.lookup(model, [digest])
+        if digest in found:
+            return found[digest]
+        result = score_fn(record)
+        self.cache.store(model, {digest: result})
+        return result
+
+    def score_records(
+        self,
+        records: List[dict],
+        reference_date: pd.Timestamp,
+        score_fn: Callable[[List[dict]], List[Result]],
+    ) -> List[Result]:
+        """
+        Results for a list of records, calling score_fn once on the misses.
+        """
+        model = self._namespace(reference_date)
+        digests = [record_digest(r) for r in records]
+        found = self.cache.lookup(model, list(dict.fromkeys(digests)))
+
+        first_miss: Dict[str, int] = {}
+        for i, d in enumerate(digests):
+            if d not in found and d not in first_miss:
+                first_miss[d] = i
+
+        if first_miss:
+            scored = dict(zip(first_miss, score_fn([records[i] for i in first_miss.values()])))
+            self.cache.store(model, scored)
+            found.update(scored)
+
+        return [found[d] for d in digests]
+
+    def score_frame(self, df: pd.DataFrame, reference_date: pd.Timestamp, score_fn: Callable[[pd.DataFrame], tuple]) -> tuple:
+        """
+        (proba, pred, band) arrays for df, running score_fn only on rows
+        whose digest is not cached. Duplicate rows in a batch score once.
+        """
+        model = self._namespace(reference_date)
+        digests = frame_digests(df)
+        found = self.cache.lookup(model, list(dict.fromkeys(digests)))
+
+        first_miss: Dict[str, int] = {}
+        for i, d in enumerate(digests):
+            if d not in found and d not in first_miss:
+                first_miss[d] = i
+
+        if first_miss:
+            miss_proba, miss_pred, miss_band = score_fn(df.iloc[list(first_miss.values())])
+            scored = {
+                d: (p, c, b)
+                for d, p, c, b in zip(first_miss, miss_proba.tolist(), miss_pred.tolist(), miss_band)
+            }
+            self.cache.store(model, scored)
+            found.update(scored)
+
+        proba = np.fromiter((found[d][0] for d in digests), dtype="float64", count=len(digests))
+        pred = np.fromiter((found[d][1] for d in digests), dtype="int64", count=len(digests))
+        band = np.array([found[d][2] for d in digests], dtype=object)
+        return proba, pred, band
+
+
+def open_pd_cache(backend: str, path, max_entries: int, ttl_seconds: float) -> Optional[PDCache]:
+    """
+    PDCache for backend "memory" or "sqlite"; None for "off".
+    """
+    if backend == "off":
+        return None
+    if backend == "memory":
+        return PDCache(MemoryBackend(max_entries), ttl_seconds)
+    if backend == "sqlite":
+        return PDCache(SQLiteBackend(path, max_entries), ttl_seconds)
+    raise ValueError(f"Unknown PD cache backend: {backend!r}")
@@ -0,0 +1,750 @@
+"""
+Incremental portfolio analytics: the reports in
+SQL Portfolio Analysis/Loan_Application_Analysis.sql kept as running
+per-segment summaries instead of full-table GROUP BY scans.
+
+    python portfolio.py ingest loan_applications.parquet scored/ --db portfolio.sqlite
+    python portfolio.py report default_rate_by_credit_band --db portfolio.sqlite
+    python portfolio.py report --all --db portfolio.sqlite
+
+Each batch is reduced to one summary per (report, segment): row count and,
+per metric, count, nulls, sum, sum of squared deviations, min, max and a
+quantile sketch. Summaries merge exactly (the sketch within its relative
+error), so a batch is folded in once and a report is read back in
+O(segments), whatever the number of loans behind it.
+
+The API (PORTFOLIO_DB) and batch_score.py (--portfolio-db) fold every
+scored batch into the same store; ingest adds existing files, e.g. the
+loan_applications export with Approval_Status and Defaulted.
+"""
+
+import argparse
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from columnar import format_for_path, input_files, iter_frames
+
+# =====================================================
+# 1. Report definitions
+# =====================================================
+
+# Output column -> (metric column, statistic). ROWS is COUNT(*) of the segment.
+ROWS = ("*", "rows")
+
+REPORTS = {
+    "customer_demographics": {
+        "dims": (),
+        "columns": {
+            "avg_age": ("Age", "mean"),
+            "min_age": ("Age", "min"),
+            "max_age": ("Age", "max"),
+            "median_age": ("Age", "p50"),
+            "total_customers": ROWS,
+        },
+    },
+    "income_by_education": {
+        "dims": ("Education_Level",),
+        "columns": {
+            "avg_income": ("Income", "mean"),
+            "median_income": ("Income", "p50"),
+            "total_applicants": ROWS,
+        },
+        "order_by": ("avg_income", False),
+    },
+    "credit_score_by_region": {
+        "dims": ("Region",),
+        "columns": {
+            "avg_credit_score": ("Credit_Score", "mean"),
+            "min_score": ("Credit_Score", "min"),
+            "max_score": ("Credit_Score", "max"),
+        },
+    },
+    "missing_property_ownership": {
+        "dims": (),
+        "columns": {"missing_property_ownership": ("Property_Ownership", "nulls")},
+    },
+    "loan_amount_by_term": {
+        "dims": ("Loan_Term_Months",),
+        "columns": {"avg_loan_amount": ("Loan_Amount", "mean")},
+        "order_by": ("Loan_Term_Months", True),
+    },
+    "default_rate_by_credit_band": {
+        "dims": ("credit_band",),
+        "columns": {
+            "total_applicants": ROWS,
+            "total_defaults": ("Defaulted", "sum"),
+            "default_rate_percent": ("Defaulted", "rate_percent"),
+        },
+    },
+    "approval_status": {
+        "dims": ("Approval_Status",),
+        "columns": {"total_applications": ROWS},
+    },
+    "loan_purpose_popularity": {
+        "dims": ("Loan_Purpose",),
+        "columns": {"total_requests": ROWS},
+        "order_by": ("total_requests", False),
+    },
+    "approval_channel_performance": {
+        "dims": ("Approval_Channel",),
+        "where": ("Approval_Status", "Approved"),
+        "columns": {"total_approved": ROWS},
+        "order_by": ("total_approved", False),
+    },
+    "regional_loan_demand": {
+        "dims": ("Region",),
+        "columns": {
+            "total_applications": ROWS,
+            "total_loan_value": ("Loan_Amount", "sum"),
+        },
+        "order_by": ("total_loan_value", False),
+    },
+    "age_marital_segments": {
+        "dims": ("Marital_Status", "age_group"),
+        "columns": {"total_customers": ROWS},
+        "order_by": ("total_customers", False),
+    },
+    "default_rate_by_employment": {
+        "dims": ("Employment_Status",),
+        "columns": {
+            "total_applicants": ROWS,
+            "total_defaults": ("Defaulted", "sum"),
+            "default_rate_percent": ("Defaulted", "rate_percent"),
+        },
+        "order_by": ("default_rate_percent", False),
+    },
+    # Scored batches (PD_Default / Default_Pred / Risk_Band from the model)
+    "risk_band_exposure": {
+        "dims": ("Risk_Band",),
+        "columns": {
+            "total_applications": ROWS,
+            "avg_pd": ("PD_Default", "mean"),
+            "p90_pd": ("PD_Default", "p90"),
+            "predicted_defaults": ("Default_Pred", "sum"),
+            "total_loan_value": ("Loan_Amount", "sum"),
+        },
+    },
+    "pd_by_region": {
+        "dims": ("Region",),
+        "columns": {
+            "avg_pd": ("PD_Default", "mean"),
+            "median_pd": ("PD_Default", "p50"),
+            "p99_pd": ("PD_Default", "p99"),
+        },
+        "order_by": ("avg_pd", False),
+    },
+}
+
+QUANTILE_STATS = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+def credit_band(df: pd.DataFrame) -> np.ndarray:
+    # Same CASE as the SQL: a missing score falls through to ELSE
+    x = _numeric(df["Credit_Score"])
+    return np.select([x < 500, x <= 650, x <= 750], ["Poor", "Fair", "Good"], "Excellent").astype(object)
+
+
+def age_group(df: pd.DataFrame) -> np.ndarray:
+    x = _numeric(df["Age"])
+    return np.select([x < 30, x <= 50], ["Under 30", "30-50"], "Over 50").astype(object)
+
+
+# Derived segment dimension -> (source column, function of the frame)
+DERIVED_DIMENSIONS = {
+    "credit_band": ("Credit_Score", credit_band),
+    "age_group": ("Age", age_group),
+}
+
+
+def report_metrics(spec: dict) -> List[str]:
+    return sorted({metric for metric, _ in spec["columns"].values() if metric != ROWS[0]})
+
+
+def quantile_metrics(spec: dict) -> set:
+    return {metric for metric, stat in spec["columns"].values() if stat in QUANTILE_STATS}
+
+
+# =====================================================
+# 2. Mergeable summaries
+# =====================================================
+
+class RunningStats:
+    """
+    count / nulls / sum / min / max of one metric in one segment, plus the
+    sum of squared deviations from the mean (merged with Chan's update,
+    which stays accurate where a raw sum of squares would cancel).
+    nulls counts missing values; count only values that are numeric.
+    """
+
+    __slots__ = ("count", "nulls", "total", "m2", "min", "max")
+
+    def __init__(self, count=0, nulls=0, total=0.0, m2=0.0, min=math.inf, max=-math.inf):
+        self.count = count
+        self.nulls = nulls
+        self.total = total
+        self.m2 = m2
+        self.min = min
+        self.max = max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else math.nan
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        if other.count:
+            if self.count:
+                n = self.count + other.count
+                delta = other.mean - self.mean
+                self.m2 += other.m2 + delta * delta * self.count * other.count / n
+            else:
+                self.m2 = other.m2
+            self.count += other.count
+            self.total += other.total
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.nulls += other.nulls
+        return self
+
+    def to_list(self) -> list:
+        if not self.count:
+            return [0, self.nulls, 0.0, 0.0, None, None]
+        return [self.count, self.nulls, self.total, self.m2, self.min, self.max]
+
+    @classmethod
+    def from_list(cls, values: list) -> "RunningStats":
+        count, nulls, total, m2, lo, hi = values
+        if not count:
+            return cls(nulls=nulls)
+        return cls(count, nulls, total, m2, lo, hi)
+
+
+# Sketch buckets are powers of GAMMA: any quantile is returned within
+# SKETCH_RELATIVE_ERROR of a value in the bucket the true quantile fell in
+SKETCH_RELATIVE_ERROR = 0.01
+GAMMA = (1 + SKETCH_RELATIVE_ERROR) / (1 - SKETCH_RELATIVE_ERROR)
+_LOG_GAMMA = math.log(GAMMA)
+
+
+def sketch_bins(x: np.ndarray) -> tuple:
+    """
+    (sign, bucket) per value: bucket k holds |x| in (GAMMA**(k-1), GAMMA**k].
+    """
+    sign = np.sign(x).astype(np.int64)
+    bins = np.zeros(len(x), dtype=np.int64)
+    nonzero = sign != 0
+    bins[nonzero] = np.ceil(np.log(np.abs(x[nonzero])) / _LOG_GAMMA)
+    return sign, bins
+
+
+class QuantileSketch:
+    """
+    Relative-error quantile sketch with logarithmic buckets (as in
+    DDSketch): a bucket count per power of GAMMA, separately for negative
+    values, zeros and positive values. Merging adds counts bucket-wise.
+    """
+
+    __slots__ = ("negative", "zeros", "positive")
+
+    def __init__(self):
+        self.negative: Dict[int, int] = {}
+        self.zeros = 0
+        self.positive: Dict[int, int] = {}
+
+    @property
+    def count(self) -> int:
+        return sum(self.negative.values()) + self.zeros + sum(self.positive.values())
+
+    def add(self, sign: int, bucket: int, count: int):
+        if sign == 0:
+            self.zeros += count
+        else:
+            store = self.positive if sign > 0 else self.negative
+            store[bucket] = store.get(bucket, 0) + count
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        for bucket, count in other.negative.items():
+            self.negative[bucket] = self.negative.get(bucket, 0) + count
+        for bucket, count in other.positive.items():
+            self.positive[bucket] = self.positive.get(bucket, 0) + count
+        self.zeros += other.zeros
+        return self
+
+    def quantile(self, q: float) -> float:
+        n = self.count
+        if not n:
+            return math.nan
+        rank = q * (n - 1)
+        seen = 0
+        for bucket in sorted(self.negative, reverse=True):
+            seen += self.negative[bucket]
+            if seen > rank:
+                return -2 * GAMMA ** bucket / (GAMMA + 1)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for bucket in sorted(self.positive):
+            seen += self.positive[bucket]
+            if seen > rank:
+                return 2 * GAMMA ** bucket / (GAMMA + 1)
+        return 2 * GAMMA ** max(self.positive) / (GAMMA + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "negative": sorted(self.negative.items()),
+            "zeros": self.zeros,
+            "positive": sorted(self.positive.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls()
+        sketch.negative = {int(k): int(c) for k, c in data["negative"]}
+        sketch.zeros = data["zeros"]
+        sketch.positive = {int(k): int(c) for k, c in data["positive"]}
+        return sketch
+
+
+class SegmentSummary:
+    """
+    Everything a report needs about one segment: its row count and a
+    RunningStats (plus a QuantileSketch where quantiles are reported) per
+    metric. A metric absent from a batch is left untouched by that batch.
+    """
+
+    __slots__ = ("rows", "stats", "sketches")
+
+    def __init__(self, rows: int = 0):
+        self.rows = rows
+        self.stats: Dict[str, RunningStats] = {}
+        self.sketches: Dict[str, QuantileSketch] = {}
+
+    def merge(self, other: "SegmentSummary") -> "SegmentSummary":
+        self.rows += other.rows
+        for metric, stats in other.stats.items():
+            self.stats.setdefault(metric, RunningStats()).merge(stats)
+        for metric, sketch in other.sketches.items():
+            self.sketches.setdefault(metric, QuantileSketch()).merge(sketch)
+        return self
+
+    def value(self, metric: str, stat: str):
+        if stat == "rows":
+            return self.rows
+        if stat in QUANTILE_STATS:
+            sketch = self.sketches.get(metric)
+            return sketch.quantile(QUANTILE_STATS[stat]) if sketch is not None else math.nan
+        stats = self.stats.get(metric)
+        if stats is None:
+            return math.nan
+        if stat == "rate_percent":
+            # SUM(x) * 100 / COUNT(*) over the rows that carried the column
+            seen = stats.count + stats.nulls
+            return round(stats.total * 100.0 / seen, 2) if seen else math.nan
+        if stat == "sum":
+            return stats.total
+        if stat in ("min", "max"):
+            return getattr(stats, stat) if stats.count else math.nan
+        return getattr(stats, stat)
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "stats": {metric: stats.to_list() for metric, stats in self.stats.items()},
+            "sketches": {metric: sketch.to_dict() for metric, sketch in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SegmentSummary":
+        summary = cls(data["rows"])
+        summary.stats = {metric: RunningStats.from_list(v) for metric, v in data["stats"].items()}
+        summary.sketches = {metric: QuantileSketch.from_dict(v) for metric, v in data["sketches"].items()}
+        return summary
+
+
+# =====================================================
+# 3. Batch reduction
+# =====================================================
+
+def _numeric(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return values.to_numpy(dtype="float64", na_value=np.nan)
+    return pd.to_numeric(values.astype(object), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _key_value(value):
+    # Segment keys must compare equal across batches whatever the dtype
+    # the column was read with (int vs float, numpy vs Python scalars)
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _factorize(values: pd.Series) -> tuple:
+    """
+    Integer codes and labels for one dimension; missing values get their
+    own trailing label (None), as GROUP BY keeps a NULL group.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy().astype(np.int64)
+        labels = list(values.cat.categories)
+    else:
+        codes, uniques = pd.factorize(values)
+        labels = list(uniques)
+    codes = np.where(codes < 0, len(labels), codes)
+    return codes, [_key_value(v) for v in labels] + [None]
+
+
+def segment_ids(columns: List[pd.Series], n_rows: int) -> tuple:
+    """
+    (segment id per row, key tuple per segment id) for the given dimensions.
+    """
+    if not columns:
+        return np.zeros(n_rows, dtype=np.int64), [()]
+    factorized = [_factorize(values) for values in columns]
+    sizes = [len(labels) for _, labels in factorized]
+    flat = np.ravel_multi_index([codes for codes, _ in factorized], sizes)
+    unique, ids = np.unique(flat, return_inverse=True)
+    keys = [
+        tuple(labels[i] for (_, labels), i in zip(factorized, index))
+        for index in zip(*np.unravel_index(unique, sizes))
+    ]
+    return ids.reshape(-1), keys
+
+
+def _reduce_metric(summaries: list, metric: str, values: pd.Series, ids: np.ndarray, sketch: bool):
+    n = len(summaries)
+    nulls = np.bincount(ids[values.isna().to_numpy()], minlength=n)
+    x = _numeric(values)
+    ok = ~np.isnan(x)
+    ids_ok, x_ok = ids[ok], x[ok]
+
+    count = np.bincount(ids_ok, minlength=n)
+    total = np.bincount(ids_ok, weights=x_ok, minlength=n)
+    mean = np.divide(total, count, out=np.zeros(n), where=count > 0)
+    m2 = np.bincount(ids_ok, weights=(x_ok - mean[ids_ok]) ** 2, minlength=n)
+    lo = np.full(n, np.inf)
+    np.minimum.at(lo, ids_ok, x_ok)
+    hi = np.full(n, -np.inf)
+    np.maximum.at(hi, ids_ok, x_ok)
+
+    for i, summary in enumerate(summaries):
+        summary.stats[metric] = RunningStats(
+            int(count[i]), int(nulls[i]), float(total[i]), float(m2[i]), float(lo[i]), float(hi[i])
+        )
+
+    if sketch:
+        for summary in summaries:
+            summary.sketches[metric] = QuantileSketch()
+        sign, bins = sketch_bins(x_ok)
+        counts = pd.DataFrame({"segment": ids_ok, "sign": sign, "bin": bins}).value_counts(sort=False)
+        for (segment, s, bucket), c in counts.items():
+            summaries[segment].sketches[metric].add(int(s), int(bucket), int(c))
+
+
+def reduce_report(spec: dict, df: pd.DataFrame, derived: dict) -> Optional[dict]:
+    """
+    {segment key: SegmentSummary} for one report over one batch, or None
+    when the batch lacks a column the report segments or filters on.
+    """
+    dims = spec["dims"]
+    where = spec.get("where")
+    needed = [DERIVED_DIMENSIONS[d][0] if d in DERIVED_DIMENSIONS else d for d in dims]
+    if where is not None:
+        needed.append(where[0])
+    if any(c not in df.columns for c in needed):
+        return None
+
+    mask = None
+    if where is not None:
+        mask = (df[where[0]] == where[1]).to_numpy(dtype=bool, na_value=False)
+        df = df[mask]
+
+    columns = []
+    for dim in dims:
+        if dim in DERIVED_DIMENSIONS:
+            values = derived[dim] if mask is None else derived[dim][mask]
+            columns.append(pd.Series(values, copy=False))
+        else:
+            columns.append(df[dim])
+    ids, keys = segment_ids(columns, len(df))
+
+    rows = np.bincount(ids, minlength=len(keys))
+    summaries = [SegmentSummary(int(r)) for r in rows]
+    sketched = quantile_metrics(spec)
+    for metric in report_metrics(spec):
+        if metric in df.columns:
+            _reduce_metric(summaries, metric, df[metric], ids, metric in sketched)
+    return dict(zip(keys, summaries))
+
+
+# =====================================================
+# 4. Portfolio analytics
+# =====================================================
+
+class PortfolioAnalytics:
+    """
+    Running summaries for every report in REPORTS (or a subset).
+
+    update(df) folds a batch in with a few vectorised passes per report;
+    merge(other) adds another instance, e.g. one built in a worker process;
+    report(name) reads one report back from its segment summaries.
+    """
+
+    def __init__(self, reports: Optional[Dict[str, dict]] = None):
+        self.reports = REPORTS if reports is None else reports
+        self.segments: Dict[str, Dict[tuple, SegmentSummary]] = {name: {} for name in self.reports}
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, reports: Optional[Dict[str, dict]] = None) -> "PortfolioAnalytics":
+        return cls(reports).update(df)
+
+    def update(self, df: pd.DataFrame) -> "PortfolioAnalytics":
+        derived = {
+            dim: fn(df) for dim, (source, fn) in DERIVED_DIMENSIONS.items() if source in df.columns
+        }
+        reduced = {name: reduce_report(spec, df, derived) for name, spec in self.reports.items()}
+        with self._lock:
+            for name, segments in reduced.items():
+                if segments is not None:
+                    self._merge_segments(name, segments)
+            self.rows += len(df)
+        return self
+
+    def _merge_segments(self, name: str, segments: Dict[tuple, SegmentSummary]):
+        target = self.segments[name]
+        for key, summary in segments.items():
+            if key in target:
+                target[key].merge(summary)
+            else:
+                target[key] = SegmentSummary().merge(summary)
+
+    def merge(self, other: "PortfolioAnalytics") -> "PortfolioAnalytics":
+        with self._lock:
+            for name, segments in other.segments.items():
+                if name in self.segments:
+                    self._merge_segments(name, segments)
+            self.rows += other.rows
+        return self
+
+    def report(self, name: str) -> pd.DataFrame:
+        """
+        One row per segment with the report's columns, ordered as the SQL.
+        """
+        spec = self.reports[name]
+        dims = list(spec["dims"])
+        columns = spec["columns"]
+        with self._lock:
+            rows = [
+                [*key, *(summary.value(metric, stat) for metric, stat in columns.values())]
+                for key, summary in self.segments[name].items()
+            ]
+        df = pd.DataFrame(rows, columns=dims + list(columns))
+        if "order_by" in spec:
+            column, ascending = spec["order_by"]
+            df = df.sort_values(column, ascending=ascending, kind="stable", na_position="last")
+        return df.reset_index(drop=True)
+
+    def quantile(self, name: str, metric: str, q: float) -> Dict[tuple, float]:
+        """
+        Quantile q of a sketched metric for every segment of a report.
+        """
+        with self._lock:
+            return {
+                key: summary.sketches[metric].quantile(q) if metric in summary.sketches else math.nan
+                for key, summary in self.segments[name].items()
+            }
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "rows": self.rows,
+                "reports": {
+                    name: [[list(key), summary.to_dict()] for key, summary in segments.items()]
+                    for name, segments in self.segments.items()
+                },
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict, reports: Optional[Dict[str, dict]] = None) -> "PortfolioAnalytics":
+        analytics = cls(reports)
+        analytics.rows = data["rows"]
+        for name, segments in data["reports"].items():
+            if name in analytics.segments:
+                analytics.segments[name] = {
+                    tuple(key): SegmentSummary.from_dict(summary) for key, summary in segments
+                }
+        return analytics
+
+
+# =====================================================
+# 5. SQLite store
+# =====================================================
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS portfolio_segments (
+    report     TEXT NOT NULL,
+    segment    TEXT NOT NULL,
+    summary    TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (report, segment)
+);
+CREATE TABLE IF NOT EXISTS portfolio_batches (
+    batch_id    TEXT PRIMARY KEY,
+    rows        INTEGER NOT NULL,
+    ingested_at REAL NOT NULL
+);
+"""
+
+
+class PortfolioStore:
+    """
+    Segment summaries persisted in SQLite, one row per (report, segment).
+
+    merge() folds a batch's PortfolioAnalytics in with a read-modify-write
+    of only the segments that batch touched, inside one IMMEDIATE
+    transaction, so API replicas and batch jobs can share the file. Batch
+    ids are recorded in the same transaction: a batch merged twice (a
+    retried request, a resumed job) is counted once.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def merge(self, batch: PortfolioAnalytics, batch_id: str) -> bool:
+        """
+        Fold batch into the store; False if batch_id was merged before.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO portfolio_batches VALUES (?, ?, ?)", (batch_id, batch.rows, now)
+                ).rowcount
+                if inserted:
+                    for name, segments in batch.segments.items():
+                        for key, summary in segments.items():
+                            segment = json.dumps(list(key))
+                            row = conn.execute(
+                                "SELECT summary FROM portfolio_segments WHERE report = ? AND segment = ?",
+                                (name, segment),
+                            ).fetchone()
+                            if row is not None:
+                                summary = SegmentSummary.from_dict(json.loads(row[0])).merge(summary)
+                            conn.execute(
+                                "INSERT OR REPLACE INTO portfolio_segments VALUES (?, ?, ?, ?)",
+                                (name, segment, json.dumps(summary.to_dict()), now),
+                            )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return bool(inserted)
+
+    def load(self, names: Optional[List[str]] = None) -> PortfolioAnalytics:
+        """
+        PortfolioAnalytics rebuilt from the stored summaries (all reports,
+        or only names). Reads O(segments) rows, never loans.
+        """
+        reports = REPORTS if names is None else {name: REPORTS[name] for name in names}
+        analytics = PortfolioAnalytics(reports)
+        with self._lock:
+            analytics.rows = self._conn.execute("SELECT COALESCE(SUM(rows), 0) FROM portfolio_batches").fetchone()[0]
+            for name in reports:
+                for segment, summary in self._conn.execute(
+                    "SELECT segment, summary FROM portfolio_segments WHERE report = ?", (name,)
+                ):
+                    key = tuple(json.loads(segment))
+                    analytics.segments[name][key] = SegmentSummary.from_dict(json.loads(summary))
+        return analytics
+
+    def report(self, name: str) -> pd.DataFrame:
+        return self.load([name]).report(name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            batches, rows = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(rows), 0) FROM portfolio_batches"
+            ).fetchone()
+            segments = self._conn.execute("SELECT COUNT(*) FROM portfolio_segments").fetchone()[0]
+        return {"path": str(self.path), "batches": batches, "rows": rows, "segments": segments}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# =====================================================
+# 6. Command line
+# =====================================================
+
+def ingest(store: PortfolioStore, path: Path, chunk_rows: int) -> dict:
+    """
+    Fold one file into the store as a single batch keyed by its path.
+    """
+    analytics = PortfolioAnalytics()
+    for chunk in iter_frames(path, format_for_path(path), chunk_rows):
+        analytics.update(chunk)
+    merged = store.merge(analytics, str(path.resolve()))
+    return {"file": str(path), "rows": analytics.rows, "merged": merged}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental portfolio analytics.")
+    parser.add_argument("--db", default="portfolio.sqlite", help="SQLite file holding the summaries")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_cmd = commands.add_parser("ingest", help="Fold CSV / Parquet / Arrow files into the store")
+    ingest_cmd.add_argument("inputs", nargs="+", type=Path, help="Files, or directories of part-* shards")
+    ingest_cmd.add_argument("--chunk-rows", type=int, default=250_000, help="Rows read per chunk")
+
+    report_cmd = commands.add_parser("report", help="Print reports from the stored summaries")
+    report_cmd.add_argument("names", nargs="*", help=f"Reports: {', '.join(REPORTS)}")
+    report_cmd.add_argument("--all", action="store_true", help="Print every report")
+    args = parser.parse_args(argv)
+
+    store = PortfolioStore(args.db)
+    try:
+        if args.command == "ingest":
+            for path in input_files(args.inputs):
+                print(json.dumps(ingest(store, path, args.chunk_rows)))
+            return
+
+        names = list(REPORTS) if args.all or not args.names else args.names
+        unknown = [n for n in names if n not in REPORTS]
+        if unknown:
+            raise SystemExit(f"Unknown reports: {unknown}")
+        analytics = store.load(names)
+        for name in names:
+            print(f"-- {name}")
+            print(analytics.report(name).to_string(index=False))
+            print()
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
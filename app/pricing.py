@@ -0,0 +1,312 @@
+"""
+Risk-based pricing: instalment, affordability and PD of every applicant
+at every candidate (annual rate, term), and the best approvable offer.
+
+    python pricing.py applications.parquet offers.parquet --rates 0.08:0.20:0.01 --terms 36,48,60
+    python pricing.py applications.csv grid.parquet --rates 0.10,0.12,0.15 --terms 24:72:12 --full-grid
+
+For each chunk of applicants, instalment, repayment burden (instalment /
+monthly income) and affordability come out of one NumPy broadcast as
+(applicants x rates x terms) tensors, with the annuity growth factor
+evaluated once per grid point. The model is then re-run on the
+applicants' engineered rows with only the features that depend on rate
+or term swapped in (REPRICED_FEATURES), in one predict call per chunk;
+everything else is engineered once per applicant. At the model's own
+rate (features.ANNUAL_RATE) and an applicant's own term the features,
+and so the PD, are exactly those of normal scoring.
+
+An offer is approvable when its PD is at or below the model's decision
+threshold and its affordability is at least --min-affordability. The
+best offer is the approvable one with the lowest total repayment
+(instalment x term); ties go to the lower rate, then the shorter term.
+Applicants are priced in chunks of at most --max-cells applicant-grid
+points, so memory is bounded however large the file or the grid.
+
+Output is the input with Offer_* columns added (NaN / empty when nothing
+is approvable), or with --full-grid one row per applicant, rate and term.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar import ID_FIELD, FrameWriter, format_for_path, iter_frames
+from features import (
+    LOW_AFFORDABILITY_THRESHOLD,
+    affordability_scores,
+    engineer_features_for_scoring,
+    monthly_installments,
+    repayment_burden,
+    resolve_reference_date,
+)
+from metrics import BATCH_ROWS, ROWS_SCORED, stage
+from scenarios import parse_values
+from scoring import MODEL_FILE, apply_decision, drop_leakage, load_model, load_model_config, predict_pd
+
+# =====================================================
+# 1. Settings
+# =====================================================
+
+DEFAULT_RATES = "0.08:0.20:0.01"
+DEFAULT_TERMS = "36,48,60"
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Applicant x grid-point rows per model call. Bounds the expanded feature
+# frame and the encoded model input, whatever the grid size.
+PRICING_MAX_CELLS = int(os.getenv("PRICING_MAX_CELLS", "250000"))
+
+# Model inputs that depend on the rate or term; the rest are engineered once
+REPRICED_FEATURES = ("Loan_Term_Months", "Monthly_Installment", "Affordability_Score", "Low_Affordability_Flag")
+
+GRID_COLUMNS = ["Monthly_Installment", "Repayment_Burden", "Affordability_Score", "PD_Default", "Approvable"]
+OFFER_COLUMNS = [
+    "Offer_Rate", "Offer_Term", "Offer_Installment", "Offer_Affordability",
+    "Offer_PD", "Offer_Risk_Band", "Approvable_Offers",
+]
+
+
+def price_arrays(income: np.ndarray, loan_amount: np.ndarray, rates, terms) -> Dict[str, np.ndarray]:
+    """
+    Instalment, repayment burden and affordability score of every
+    applicant at every (annual rate, term), as (n, rates, terms) arrays.
+    Same rules as the scoring features (features.compute_feature_arrays).
+    """
+    loan = np.asarray(loan_amount, dtype="float64")[:, None, None]
+    income = np.asarray(income, dtype="float64")[:, None, None]
+    monthly_rates = np.asarray(rates, dtype="float64")[:, None] / 12
+    installment = monthly_installments(loan, np.asarray(terms, dtype="float64"), monthly_rates)
+    burden = repayment_burden(installment, income)
+    return {
+        "Monthly_Installment": installment,
+        "Repayment_Burden": burden,
+        "Affordability_Score": affordability_scores(burden),
+    }
+
+
+# =====================================================
+# 2. Engine
+# =====================================================
+
+class PricingEngine:
+    """
+    Prices applications over one (rates x terms) grid with one model.
+
+    price_chunk() gives the full tensors for a frame of applicants,
+    offers() the best approvable offer per applicant and grid_frame() the
+    long table; frames larger than chunk_rows (max_cells / grid size) are
+    split, so only one chunk's tensors exist at a time.
+    """
+
+    def __init__(
+        self,
+        pipe,
+        config: dict,
+        rates,
+        terms,
+        reference_date=None,
+        min_affordability: float = 0.0,
+        max_cells: int = PRICING_MAX_CELLS,
+    ):
+        self.rates = np.unique(np.asarray(list(rates), dtype="float64"))
+        self.terms = np.unique(np.asarray(list(terms), dtype="float64"))
+        if not len(self.rates) or not len(self.terms):
+            raise ValueError("The pricing grid needs at least one rate and one term")
+        if (self.rates <= 0).any() or (self.terms <= 0).any():
+            raise ValueError("Rates and terms must be positive")
+        self.pipe = pipe
+        self.config = config
+        self.reference_date = resolve_reference_date(reference_date)
+        self.min_affordability = min_affordability
+        self.chunk_rows = max(1, max_cells // self.grid_size)
+
+    @property
+    def grid_size(self) -> int:
+        return len(self.rates) * len(self.terms)
+
+    def price_chunk(self, df_raw: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        GRID_COLUMNS for every applicant in df_raw at every grid point,
+        as (n, rates, terms) arrays. Scores n x grid_size rows at once, so
+        keep n to chunk_rows (iter_chunks does).
+        """
+        n, shape = len(df_raw), (len(df_raw), len(self.rates), len(self.terms))
+        with stage("features", "pricing"):
+            df_fe = drop_leakage(engineer_features_for_scoring(df_raw, self.reference_date))
+            tensors = price_arrays(
+                df_raw["Income"].to_numpy(dtype="float64", na_value=np.nan),
+                df_raw["Loan_Amount"].to_numpy(dtype="float64", na_value=np.nan),
+                self.rates,
+                self.terms,
+            )
+            affordability = tensors["Affordability_Score"]
+
+            # One engineered row per grid point, applicant-major, so the
+            # model output reshapes straight back to (n, rates, terms)
+            expanded = df_fe.iloc[np.repeat(np.arange(n), self.grid_size)].reset_index(drop=True)
+            repriced = {
+                "Loan_Term_Months": np.broadcast_to(self.terms, shape),
+                "Monthly_Installment": tensors["Monthly_Installment"],
+                "Affordability_Score": affordability,
+                "Low_Affordability_Flag": (affordability < LOW_AFFORDABILITY_THRESHOLD).astype(np.int64),
+            }
+            for col in REPRICED_FEATURES:
+                expanded[col] = repriced[col].reshape(-1).astype(df_fe[col].dtype, copy=False)
+
+        proba = np.asarray(predict_pd(self.pipe, expanded, "pricing"), dtype="float64").reshape(shape)
+        ROWS_SCORED.labels("pricing").inc(proba.size)
+        BATCH_ROWS.labels("pricing").observe(proba.size)
+
+        tensors["PD_Default"] = proba
+        with np.errstate(invalid="ignore"):
+            tensors["Approvable"] = (
+                (proba <= self.config["decision_threshold"])
+                & (affordability >= self.min_affordability)
+                & np.isfinite(tensors["Monthly_Installment"])
+            )
+        return tensors
+
+    def iter_chunks(self, df_raw: pd.DataFrame) -> Iterator[Tuple[pd.DataFrame, Dict[str, np.ndarray]]]:
+        """
+        (applicant slice, its tensors) for consecutive slices of chunk_rows.
+        """
+        for start in range(0, len(df_raw), self.chunk_rows):
+            part = df_raw.iloc[start:start + self.chunk_rows]
+            yield part, self.price_chunk(part)
+
+    def best_offers(self, tensors: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        OFFER_COLUMNS for one chunk's tensors: the approvable grid point
+        with the lowest total repayment per applicant.
+        """
+        n = len(tensors["PD_Default"])
+        approvable = tensors["Approvable"].reshape(n, -1)
+        total = (tensors["Monthly_Installment"] * self.terms).reshape(n, -1)
+        # argmin takes the first minimum: grid order is rate-major, ascending
+        best = np.where(approvable, total, np.inf).argmin(axis=1)
+        has_offer = approvable.any(axis=1)
+        rows = np.arange(n)
+
+        def pick(name: str) -> np.ndarray:
+            return np.where(has_offer, tensors[name].reshape(n, -1)[rows, best], np.nan)
+
+        rate_index, term_index = np.divmod(best, len(self.terms))
+        offer_pd = pick("PD_Default")
+        _, band = apply_decision(offer_pd, self.config)
+        return {
+            "Offer_Rate": np.where(has_offer, self.rates[rate_index], np.nan),
+            "Offer_Term": np.where(has_offer, self.terms[term_index], np.nan),
+            "Offer_Installment": pick("Monthly_Installment"),
+            "Offer_Affordability": pick("Affordability_Score"),
+            "Offer_PD": offer_pd,
+            "Offer_Risk_Band": np.where(has_offer, band, None),
+            "Approvable_Offers": approvable.sum(axis=1),
+        }
+
+    def offers(self, df_raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        df_raw (columns shared, not copied) with OFFER_COLUMNS added.
+        """
+        parts = [self.best_offers(tensors) for _, tensors in self.iter_chunks(df_raw)]
+        out = df_raw.copy(deep=False)
+        for col in OFFER_COLUMNS:
+            out[col] = np.concatenate([part[col] for part in parts]) if parts else np.array([])
+        return out
+
+    def grid_frame(self, df_chunk: pd.DataFrame, tensors: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """
+        Long table for one chunk: a row per applicant, rate and term.
+        """
+        shape = tensors["PD_Default"].shape
+        columns = {}
+        if ID_FIELD in df_chunk.columns:
+            columns[ID_FIELD] = np.repeat(df_chunk[ID_FIELD].to_numpy(), self.grid_size)
+        columns["Rate"] = np.broadcast_to(self.rates[:, None], shape).reshape(-1)
+        columns["Term"] = np.broadcast_to(self.terms, shape).reshape(-1)
+        for col in GRID_COLUMNS:
+            columns[col] = tensors[col].reshape(-1)
+        return pd.DataFrame(columns)
+
+
+def price_stream(
+    src,
+    dst,
+    engine: PricingEngine,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    input_format: str = "csv",
+    output_format: str = "csv",
+    full_grid: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a file of raw applications through the engine, as
+    scoring.score_stream does for plain scoring: each output frame (offers
+    per input chunk, or the grid per engine chunk) is appended to dst
+    before it is yielded.
+    """
+    with FrameWriter(dst, output_format) as writer:
+        for chunk in iter_frames(src, input_format, chunk_rows):
+            if full_grid:
+                frames = (engine.grid_frame(part, tensors) for part, tensors in engine.iter_chunks(chunk))
+            else:
+                frames = [engine.offers(chunk)]
+            for frame in frames:
+                writer.write(frame)
+                yield frame
+
+
+# =====================================================
+# 3. Command line
+# =====================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Price applications over a grid of annual rates and terms.")
+    parser.add_argument("input", type=Path, help="CSV, Parquet or Arrow IPC file of raw applications")
+    parser.add_argument("output", type=Path, help="Offers (or the full grid), format from the suffix")
+    parser.add_argument("--rates", default=DEFAULT_RATES, help="Annual rates: list or start:stop:step")
+    parser.add_argument("--terms", default=DEFAULT_TERMS, help="Terms in months: list or start:stop:step")
+    parser.add_argument("--min-affordability", type=float, default=0.0, help="Lowest approvable affordability score")
+    parser.add_argument("--full-grid", action="store_true", help="Write every applicant x rate x term row")
+    parser.add_argument("--model-file", default=MODEL_FILE, help="Pickle or .native artefact in MODEL_DIR")
+    parser.add_argument("--reference-date", help="Date App_Vintage is measured from (YYYY-MM-DD)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows read per input chunk")
+    parser.add_argument("--max-cells", type=int, default=PRICING_MAX_CELLS, help="Applicant x grid rows per model call")
+    args = parser.parse_args(argv)
+
+    try:
+        engine = PricingEngine(
+            load_model(args.model_file),
+            load_model_config(args.model_file),
+            parse_values(args.rates),
+            parse_values(args.terms),
+            reference_date=args.reference_date,
+            min_affordability=args.min_affordability,
+            max_cells=args.max_cells,
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    start = time.perf_counter()
+    rows = 0
+    for frame in price_stream(
+        args.input, args.output, engine, args.chunk_rows,
+        input_format=format_for_path(args.input),
+        output_format=format_for_path(args.output),
+        full_grid=args.full_grid,
+    ):
+        rows += len(frame)
+    applicants = rows // engine.grid_size if args.full_grid else rows
+    elapsed = time.perf_counter() - start
+    print(
+        f"{applicants:,} applicants x {engine.grid_size} grid points "
+        f"({len(engine.rates)} rates x {len(engine.terms)} terms) in {elapsed:.3f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from compiled_scorer import CompiledScorer
+from drift import DriftMonitor, load_baseline
+from explain import Explainer
+from native_scorer import NATIVE_SUFFIX, SPEC_FILE, NativeScorer
+from scoring import read_model_config, score_new_applications
+
+# =====================================================
+# Model registry: lazy loading, warm LRU pool, hot swap
+# =====================================================
+
+# <name>_<version>.pkl, e.g. xgboost_model_01.pkl -> ("xgboost_model", "01")
+_ARTEFACT_RE = re.compile(r"^(?P<name>.+?)_(?P<version>\d+)$")
+
+# Representative applicant used to warm up freshly loaded models
+WARMUP_RECORD = {
+    "Customer_ID": 0,
+    "Age": 35,
+    "Income": 80000,
+    "Annual_Expenses": 35000,
+    "Loan_Amount": 15000,
+    "Loan_Term_Months": 36,
+    "Credit_Score": 700,
+    "Employment_Status": "5 years",
+    "Marital_Status": "Single",
+    "Education_Level": "Degree",
+    "Property_Ownership": "RENT",
+    "Loan_Purpose": "debt_consolidation",
+    "Co_Applicant": "No",
+    "Approval_Channel": "Web",
+    "Region": "Gauteng",
+    "Application_Date": "2024-01-15",
+    "Past_Defaults": 0,
+}
+WARMUP_ROWS = 64
+
+# Artefact kinds a registry can serve, by file suffix, in preference order
+BACKEND_SUFFIXES = {
+    "pickle": (".pkl", NATIVE_SUFFIX),
+    "native": (NATIVE_SUFFIX, ".pkl"),
+}
+
+
+def parse_artefact_name(path: Path) -> Tuple[str, str]:
+    """
+    Split a model file name into (name, version).
+    """
+    match = _ARTEFACT_RE.match(path.stem)
+    if match is None:
+        return path.stem, "0"
+    return match.group("name"), match.group("version")
+
+
+def _artefact_mtime(path: Path) -> float:
+    # A native artefact is a directory; its spec is rewritten on every export
+    return (path / SPEC_FILE).stat().st_mtime if path.suffix == NATIVE_SUFFIX else path.stat().st_mtime
+
+
+class LoadedModel:
+    """
+    One warm model: pipeline, compiled single-record scorer, decision
+    config, the explainer for its adverse-action reasons and the drift
+    monitor fed by its traffic.
+    Requests keep a reference to this object, so a swap never pulls a model
+    out from under a request that is already scoring with it.
+
+    A native artefact (<name>_<version>.native) is served by one
+    NativeScorer acting as both pipe and scorer; nothing is unpickled.
+    Passing the drift monitor of an earlier load of the same version
+    carries its windows over (with the baseline re-read from disk).
+    """
+
+    def __init__(self, name: str, version: str, path: Path, drift: Optional[DriftMonitor] = None):
+        self.name = name
+        self.version = version
+        self.path = path
+
+        start = time.perf_counter()
+        self.mtime = _artefact_mtime(path)
+        if path.suffix == NATIVE_SUFFIX:
+            self.backend = "native"
+            self.pipe = self.scorer = NativeScorer.load(path)
+        else:
+            import joblib  # deferred with the sklearn / xgboost stack it unpickles
+
+            self.backend = "pickle"
+            self.pipe = joblib.load(path)
+            self.scorer = CompiledScorer(self.pipe)
+        self.config = read_model_config(path)
+        self.explainer = Explainer(self.scorer)
+        baseline = load_baseline(path)
+        if drift is not None and drift.layout.band_labels == list(self.config["risk_band_labels"]):
+            drift.baseline = baseline
+            self.drift = drift
+        else:
+            self.drift = DriftMonitor(self.config["risk_band_labels"], baseline)
+        self.load_seconds = time.perf_counter() - start
+        self.warmup_seconds = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}:{self.version}"
+
+    def warm_up(self):
+        """
+        Score a dummy batch and a single record so the first real request
+        does not pay for lazy initialisation inside sklearn / the booster.
+        """
+        start = time.perf_counter()
+        df_warm = pd.DataFrame([WARMUP_RECORD] * WARMUP_ROWS)
+        score_new_applications(df_warm, self.pipe, self.config)
+        self.scorer.predict_pd(WARMUP_RECORD)
+        self.warmup_seconds = time.perf_counter() - start
+
+    def describe(self) -> dict:
+        return {
+            "model": self.name,
+            "version": self.version,
+            "file": self.path.name,
+            "backend": self.backend,
+            "load_seconds": round(self.load_seconds, 4),
+            "warmup_seconds": round(self.warmup_seconds, 4),
+            "decision_threshold": self.config["decision_threshold"],
+            "explanations": self.explainer.stats(),
+            "drift": self.drift.summary(),
+        }
+
+
+class ModelRegistry:
+    """
+    Registry of the pickled pipelines in a model directory.
+
+    - Artefacts are discovered by file name and loaded lazily on first use.
+    - At most max_loaded models stay warm; the least recently used is evicted.
+      Drift monitors are kept per version outside that pool, so eviction
+      or a refresh does not lose the traffic they have accumulated.
+    - Each model name has an active version (latest by default). Activating
+      another version, or dropping a new file in and calling refresh(),
+      swaps it in for new requests without a restart.
+    - With warm_on_load, every load (a first use, or a reload after an
+      eviction or refresh) is warmed before get() returns it, so no
+      request pays for a cold model outside start-up either.
+    - backend "pickle" serves <name>_<version>.pkl; "native" serves the
+      exported <name>_<version>.native artefact. Either falls back to the
+      other kind when only that one exists for a version.
+    """
+
+    def __init__(
+        self,
+        model_dir: Path,
+        default_model: str,
+        max_loaded: int = 3,
+        backend: str = "pickle",
+        warm_on_load: bool = True,
+    ):
+        if backend not in BACKEND_SUFFIXES:
+            raise ValueError(f"Unknown model backend: {backend!r}")
+        self.model_dir = Path(model_dir)
+        self.default_model = default_model
+        self.max_loaded = max(1, max_loaded)
+        self.backend = backend
+        self.warm_on_load = warm_on_load
+
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._loaded: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._drift: Dict[str, DriftMonitor] = {}
+        self._available: Dict[str, Dict[str, Path]] = {}
+        self._active: Dict[str, str] = {}
+        self._pinned: Dict[str, str] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        self.refresh()
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """
+        callback(name) runs after name's active version changes or a warm
+        copy of it is dropped, e.g. to invalidate cached PDs.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, names):
+        for name in sorted(set(names)):
+            for callback in self._listeners:
+                callback(name)
+
+    # -----------------------------
+    # Discovery and version control
+    # -----------------------------
+    def refresh(self) -> Dict[str, List[str]]:
+        """
+        Rescan the model directory. The latest version of each name becomes
+        active unless a version was pinned with activate(). Warm copies of
+        files that were removed or overwritten are dropped.
+        """
+        available: Dict[str, Dict[str, Path]] = {}
+        # Least preferred kind first, so the preferred one overwrites it
+        for suffix in reversed(BACKEND_SUFFIXES[self.backend]):
+            for path in sorted(self.model_dir.glob("*" + suffix)):
+                if suffix == NATIVE_SUFFIX and not (path / SPEC_FILE).is_file():
+                    continue
+                name, version = parse_artefact_name(path)
+                available.setdefault(name, {})[version] = path
+
+        with self._lock:
+            previous = self._active
+            self._pinned = {n: v for n, v in self._pinned.items() if v in available.get(n, {})}
+            self._available = available
+            self._active = {
+                name: self._pinned.get(name, max(versions, key=int))
+                for name, versions in available.items()
+            }
+            stale = [
+                key for key, m in self._loaded.items()
+                if not m.path.exists()
+                or available.get(m.name, {}).get(m.version) != m.path
+                or _artefact_mtime(m.path) != m.mtime
+            ]
+            changed = [self._loaded.pop(key).name for key in stale]
+            # Monitors outlive warm copies, but not the versions themselves
+            self._drift = {
+                key: monitor for key, monitor in self._drift.items()
+                if key.split(":", 1)[1] in available.get(key.split(":", 1)[0], {})
+            }
+            changed += [n for n in set(previous) | set(self._active) if previous.get(n) != self._active.get(n)]
+
+        self._notify(changed)
+        return self.available()
+
+    def available(self) -> Dict[str, List[str]]:
+        with self._lock:
+            return {name: sorted(versions, key=int) for name, versions in self._available.items()}
+
+    def active_version(self, name: str) -> str:
+        with self._lock:
+            if name not in self._active:
+                raise KeyError(f"Unknown model '{name}'")
+            return self._active[name]
+
+    def activate(self, name: str, version: str, warm: bool = True) -> LoadedModel:
+        """
+        Make version the active one for name. The model is loaded (and warmed)
+        before the switch, so requests never wait on the new version's load.
+        """
+        model = self.get(name, version, warm=warm)
+        if warm and model.warmup_seconds == 0.0:
+            model.warm_up()
+        with self._lock:
+            swapped = self._active.get(name) != version
+            self._active[name] = version
+            self._pinned[name] = version
+        if swapped:
+            self._notify([name])
+        return model
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+    def resolve(self, name: Optional[str] = None, version: Optional[str] = None) -> Tuple[str, Path]:
+        """
+        ("name:version", artefact path) that get() would serve, without loading it.
+        """
+        name = name or self.default_model
+        with self._lock:
+            if name not in self._available:
+                raise KeyError(f"Unknown model '{name}'")
+            version = version or self._active[name]
+            if version not in self._available[name]:
+                raise KeyError(f"Unknown version '{version}' for model '{name}'")
+            return f"{name}:{version}", self._available[name][version]
+
+    def peek(self, name: Optional[str] = None, version: Optional[str] = None) -> Optional[LoadedModel]:
+        """
+        The model get() would serve if it is already loaded, else None.
+        Never loads (or waits for a load), so it is safe on the event loop.
+        """
+        key, _ = self.resolve(name, version)
+        with self._lock:
+            model = self._loaded.get(key)
+            if model is not None:
+                self._loaded.move_to_end(key)
+            return model
+
+    def get(self, name: Optional[str] = None, version: Optional[str] = None, warm: Optional[bool] = None) -> LoadedModel:
+        """
+        Warm model for (name, version); defaults to the active version of
+        the default model. Loads it on first use, and warms what it loads
+        unless warm (default: warm_on_load) is False.
+        """
+        key, path = self.resolve(name, version)
+        name, version = key.split(":", 1)
+        with self._lock:
+            model = self._loaded.get(key)
+            if model is not None:
+                self._loaded.move_to_end(key)
+                return model
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other models stay servable;
+        # the per-key lock stops two requests loading the same file
+        with load_lock:
+            with self._lock:
+                model = self._loaded.get(key)
+            if model is None:
+                with self._lock:
+                    drift = self._drift.get(key)
+                model = LoadedModel(name, version, path, drift=drift)
+                if (self.warm_on_load if warm is None else warm):
+                    model.warm_up()
+                with self._lock:
+                    self._loaded[key] = model
+                    self._drift[key] = model.drift
+                    while len(self._loaded) > self.max_loaded:
+                        self._loaded.popitem(last=False)
+
+        with self._lock:
+            if key in self._loaded:
+                self._loaded.move_to_end(key)
+        return model
+
+    def warm_up(self, names: Optional[List[str]] = None) -> List[LoadedModel]:
+        """
+        Load and warm the active version of each name (default model if none).
+        """
+        models = []
+        for name in names or [self.default_model]:
+            model = self.get(name, warm=True)
+            if model.warmup_seconds == 0.0:
+                model.warm_up()
+            models.append(model)
+        return models
+
+    def loaded(self) -> List[dict]:
+        with self._lock:
+            return [m.describe() for m in self._loaded.values()]
@@ -0,0 +1,301 @@
+"""
+Expected-loss and underwriting scenarios over a scored portfolio.
+
+    python scenarios.py scored/ --presets --segment Risk_Band
+    python scenarios.py scored/ --cutoffs 0.05:0.60:0.01 --lgd 0.35,0.45,0.55 --segment Region --out grid.parquet
+
+A scenario is a PD cut-off (approve when PD < cut-off, the rule the risk
+bands use), a loss given default (LGD) and an exposure-at-default factor
+(EAD = factor x Loan_Amount). For every scenario and segment the engine
+reports approval rate, approved exposure, expected loss (PD x LGD x EAD),
+EL rate, NPL ratio (PD-weighted share of approved exposure expected to
+turn non-performing), expected defaults and approved monthly instalments.
+
+The input is scored output that still carries Loan_Amount and
+Loan_Term_Months (batch_score.py --keep-columns, or a saved UI download);
+Monthly_Installment is computed when absent.
+
+The portfolio is sorted by PD once per segment and turned into running
+sums, so a cut-off is a searchsorted lookup: any number of scenarios is
+evaluated as one (scenarios x segments) grid, with no pass over the loans
+per scenario.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from columnar import format_for_path, input_files, iter_frames, write_frame
+from features import monthly_installments
+from portfolio import segment_ids
+from scoring import DEFAULT_MODEL_CONFIG, MODEL_FILE, load_model_config
+
+# =====================================================
+# 1. Scenarios
+# =====================================================
+
+# Senior unsecured LGD under the Basel foundation IRB approach
+DEFAULT_LGD = 0.45
+DEFAULT_EAD_FACTOR = 1.0
+
+PORTFOLIO_COLUMNS = ["PD_Default", "Loan_Amount", "Loan_Term_Months", "Monthly_Installment"]
+TOTAL_SEGMENT = "All"
+
+# PDs that are missing sort here: above every cut-off, inside their segment
+_NO_PD = 1.5
+
+
+def scenario_grid(
+    cutoffs: Iterable[float],
+    lgds: Iterable[float] = (DEFAULT_LGD,),
+    ead_factors: Iterable[float] = (DEFAULT_EAD_FACTOR,),
+) -> pd.DataFrame:
+    """
+    Every combination of cut-off, LGD and EAD factor, one row each.
+    """
+    c, lgd, ead = np.meshgrid(
+        np.asarray(list(cutoffs), dtype="float64"),
+        np.asarray(list(lgds), dtype="float64"),
+        np.asarray(list(ead_factors), dtype="float64"),
+        indexing="ij",
+    )
+    grid = pd.DataFrame({"cutoff": c.ravel(), "lgd": lgd.ravel(), "ead_factor": ead.ravel()})
+    grid.insert(0, "scenario", [
+        f"cutoff={row.cutoff:g} lgd={row.lgd:g} ead={row.ead_factor:g}" for row in grid.itertuples()
+    ])
+    return grid
+
+
+def preset_scenarios(config: Optional[dict] = None, lgd: float = DEFAULT_LGD) -> pd.DataFrame:
+    """
+    The README's conservative / baseline / relaxed rules, taken from the
+    model's decision config: approve the lowest risk band only, decline
+    only the highest band, or approve up to the decision threshold.
+    """
+    config = DEFAULT_MODEL_CONFIG if config is None else config
+    cutoffs = config["risk_band_cutoffs"]
+    return pd.DataFrame({
+        "scenario": ["conservative", "baseline", "relaxed"],
+        "cutoff": [cutoffs[0], cutoffs[-1], config["decision_threshold"]],
+        "lgd": lgd,
+        "ead_factor": DEFAULT_EAD_FACTOR,
+    })
+
+
+# =====================================================
+# 2. Engine
+# =====================================================
+
+def _cumsum0(x: np.ndarray) -> np.ndarray:
+    # Running sum with a leading 0, so sum(x[a:b]) = out[b] - out[a]
+    out = np.zeros(len(x) + 1)
+    np.cumsum(x, out=out[1:])
+    return out
+
+
+class ScenarioEngine:
+    """
+    Scenario metrics for one scored portfolio.
+
+    Built once: loans are ordered by (segment, PD) and every additive
+    quantity (count, exposure, PD x exposure, PD, instalment) becomes a
+    running sum. evaluate() then finds, for all segments and distinct
+    cut-offs at once, where PD crosses the cut-off (one searchsorted over
+    a (segments x cut-offs) probe) and reads the approved totals off the
+    running sums. LGD and the EAD factor scale those totals, so the grid
+    costs O(segments x scenarios) after the O(n log n) build.
+    """
+
+    def __init__(
+        self,
+        pd_default: np.ndarray,
+        loan_amount: np.ndarray,
+        installment: np.ndarray,
+        segments: Optional[pd.Series] = None,
+    ):
+        proba = np.asarray(pd_default, dtype="float64")
+        n = len(proba)
+        if segments is None:
+            ids, keys = np.zeros(n, dtype=np.int64), [(TOTAL_SEGMENT,)]
+        else:
+            ids, keys = segment_ids([segments], n)
+        self.segments = [key[0] for key in keys]
+
+        has_pd = ~np.isnan(proba)
+        proba = np.where(has_pd, np.clip(proba, 0.0, 1.0), _NO_PD)
+        order = np.lexsort((proba, ids))
+        self._key = ids[order] * 2.0 + proba[order]
+
+        amount = np.nan_to_num(np.asarray(loan_amount, dtype="float64")[order])
+        p = np.where(has_pd[order], proba[order], 0.0)
+        self._sums = {
+            "approved": np.arange(n + 1, dtype="float64"),
+            "exposure": _cumsum0(amount),
+            "pd_exposure": _cumsum0(p * amount),
+            "expected_defaults": _cumsum0(p),
+            "installments": _cumsum0(np.nan_to_num(np.asarray(installment, dtype="float64")[order])),
+        }
+        self._starts = np.searchsorted(self._key, np.arange(len(keys)) * 2.0, side="left")
+        self.applications = np.bincount(ids, minlength=len(keys)).astype("float64")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, segment: Optional[str] = None) -> "ScenarioEngine":
+        """
+        Engine for a scored frame; Monthly_Installment is derived from
+        Loan_Amount and Loan_Term_Months when the frame lacks it.
+        """
+        missing = [c for c in ("PD_Default", "Loan_Amount") if c not in df.columns]
+        if segment is not None and segment not in df.columns:
+            missing.append(segment)
+        if missing:
+            raise ValueError(f"Scored portfolio lacks columns: {missing}")
+
+        amount = df["Loan_Amount"].to_numpy(dtype="float64", na_value=np.nan)
+        if "Monthly_Installment" in df.columns:
+            installment = df["Monthly_Installment"].to_numpy(dtype="float64", na_value=np.nan)
+        elif "Loan_Term_Months" in df.columns:
+            installment = monthly_installments(amount, df["Loan_Term_Months"].to_numpy(dtype="float64", na_value=np.nan))
+        else:
+            installment = np.full(len(df), np.nan)
+        return cls(
+            df["PD_Default"].to_numpy(dtype="float64", na_value=np.nan),
+            amount,
+            installment,
+            df[segment] if segment is not None else None,
+        )
+
+    def evaluate_grid(self, cutoffs, lgd=DEFAULT_LGD, ead_factor=DEFAULT_EAD_FACTOR) -> Dict[str, np.ndarray]:
+        """
+        Metric name -> (scenarios, segments) array; cutoffs, lgd and
+        ead_factor broadcast to one value per scenario. The last column is
+        the whole portfolio when there is more than one segment.
+        """
+        cutoffs, lgd, ead_factor = (
+            np.asarray(a, dtype="float64") for a in np.broadcast_arrays(cutoffs, lgd, ead_factor)
+        )
+        cutoffs, lgd, ead_factor = cutoffs.ravel(), lgd.ravel()[:, None], ead_factor.ravel()[:, None]
+        if ((cutoffs < 0) | (cutoffs > 1)).any():
+            raise ValueError("Cut-offs must lie in [0, 1]")
+
+        distinct, which = np.unique(cutoffs, return_inverse=True)
+        segment_index = np.arange(len(self.segments))[:, None]
+        ends = np.searchsorted(self._key, segment_index * 2.0 + distinct[None, :], side="left")
+        starts = self._starts[:, None]
+
+        totals = {}
+        for name, running in self._sums.items():
+            # (segments, distinct cut-offs) -> (scenarios, segments)
+            approved = (running[ends] - running[starts])[:, which.ravel()].T
+            if len(self.segments) > 1:
+                approved = np.column_stack([approved, approved.sum(axis=1)])
+            totals[name] = approved
+        applications = self.applications
+        if len(self.segments) > 1:
+            applications = np.append(applications, applications.sum())
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            exposure = totals["exposure"] * ead_factor
+            expected_loss = totals["pd_exposure"] * ead_factor * lgd
+            return {
+                "applications": np.broadcast_to(applications, exposure.shape),
+                "approved": totals["approved"],
+                "approval_rate": totals["approved"] / applications,
+                "approved_exposure": exposure,
+                "expected_loss": expected_loss,
+                "el_rate": expected_loss / exposure,
+                "npl_ratio": totals["pd_exposure"] / totals["exposure"],
+                "expected_defaults": totals["expected_defaults"],
+                "approved_installments": totals["installments"],
+            }
+
+    def evaluate(self, scenarios: pd.DataFrame) -> pd.DataFrame:
+        """
+        Long table: one row per (scenario, segment) with the scenario's
+        settings and every metric from evaluate_grid.
+        """
+        grid = self.evaluate_grid(
+            scenarios["cutoff"].to_numpy(), scenarios["lgd"].to_numpy(), scenarios["ead_factor"].to_numpy()
+        )
+        segments = self.segments + ([TOTAL_SEGMENT] if len(self.segments) > 1 else [])
+        n_segments = len(segments)
+
+        scenarios = scenarios.reset_index(drop=True)
+        out = scenarios.loc[scenarios.index.repeat(n_segments)].reset_index(drop=True)
+        out.insert(1, "segment", np.tile(np.asarray(segments, dtype=object), len(scenarios)))
+        for name, values in grid.items():
+            out[name] = values.ravel()
+        return out
+
+
+# =====================================================
+# 3. Command line
+# =====================================================
+
+def parse_values(text: str) -> List[float]:
+    # "0.1,0.2,0.3" or an inclusive range "start:stop:step"
+    if ":" in text:
+        start, stop, step = (float(v) for v in text.split(":"))
+        return list(np.round(np.arange(start, stop + step / 2, step), 10))
+    return [float(v) for v in text.split(",") if v]
+
+
+def load_portfolio(paths: List[Path], segment: Optional[str]) -> pd.DataFrame:
+    """
+    The columns scenarios need from scored files (or part-* directories).
+    """
+    columns = PORTFOLIO_COLUMNS + ([segment] if segment else [])
+    frames = [
+        chunk
+        for path in input_files(paths)
+        for chunk in iter_frames(path, format_for_path(path), 500_000, columns=columns)
+    ]
+    if not frames:
+        raise SystemExit("No scored input found")
+    return pd.concat(frames, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Expected-loss and approval scenarios over a scored portfolio.")
+    parser.add_argument("inputs", nargs="+", type=Path, help="Scored files, or batch_score.py output directories")
+    parser.add_argument("--segment", help="Column to break results down by (e.g. Risk_Band, Region)")
+    parser.add_argument("--presets", action="store_true", help="Conservative / baseline / relaxed only")
+    parser.add_argument("--cutoffs", default="0.05:0.60:0.01", help="PD cut-offs: list or start:stop:step")
+    parser.add_argument("--lgd", default=str(DEFAULT_LGD), help="Loss given default: list or start:stop:step")
+    parser.add_argument("--ead", default=str(DEFAULT_EAD_FACTOR), help="EAD factors on Loan_Amount")
+    parser.add_argument("--model-file", default=MODEL_FILE, help="Model whose decision config sets the presets")
+    parser.add_argument("--out", type=Path, help="Write results (CSV, Parquet or Arrow) instead of printing")
+    args = parser.parse_args(argv)
+
+    df = load_portfolio(args.inputs, args.segment)
+    if args.presets:
+        scenarios = preset_scenarios(load_model_config(args.model_file), lgd=parse_values(args.lgd)[0])
+    else:
+        scenarios = scenario_grid(parse_values(args.cutoffs), parse_values(args.lgd), parse_values(args.ead))
+
+    start = time.perf_counter()
+    try:
+        engine = ScenarioEngine.from_frame(df, args.segment)
+    except ValueError as e:
+        raise SystemExit(f"{e} (score with batch_score.py --keep-columns)")
+    built = time.perf_counter()
+    results = engine.evaluate(scenarios)
+    done = time.perf_counter()
+    print(
+        f"{len(df):,} loans, {len(scenarios)} scenarios x {len(engine.segments)} segments: "
+        f"build {built - start:.3f}s, evaluate {done - built:.3f}s",
+        file=sys.stderr,
+    )
+
+    if args.out is not None:
+        write_frame(results, args.out, format_for_path(args.out))
+    else:
+        print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import pandas as pd
+
+from features import CATEGORICAL_FIELDS, NUMERIC_FIELDS
+
+# =====================================================
+# Compact in-memory schema for raw applications
+# =====================================================
+
+# Known levels of every categorical field (also the UI's option lists).
+# Codes of these levels are the same in every batch and every file.
+CATEGORY_LEVELS = {
+    "Employment_Status": [
+        "10+ years", "9 years", "8 years", "7 years", "6 years",
+        "5 years", "4 years", "3 years", "2 years", "1 year", "< 1 year",
+    ],
+    "Marital_Status": ["Single", "Married", "Divorced"],
+    "Education_Level": ["High School", "Diploma", "Degree", "Masters"],
+    "Property_Ownership": ["OWN", "RENT", "MORTGAGE", "ANY", "OTHER", "NONE"],
+    "Loan_Purpose": [
+        "debt_consolidation", "credit_card", "home_improvement", "medical",
+        "small_business", "vacation", "major_purchase", "other",
+    ],
+    "Co_Applicant": ["No", "Yes"],
+    "Approval_Channel": ["Web", "Agent", "Branch", "Mobile App"],
+    "Region": [
+        "Gauteng", "KwaZulu-Natal", "Western Cape", "Eastern Cape",
+        "Northern Cape", "Free State", "North West", "Limpopo", "Mpumalanga",
+    ],
+}
+CATEGORY_DTYPES = {c: pd.CategoricalDtype(levels) for c, levels in CATEGORY_LEVELS.items()}
+
+# Small whole numbers are exact in float32 (which still holds NaN for a
+# missing value); money stays float64 so DTI and affordability match the
+# values they were trained on to the last bit
+COMPACT_NUMERIC = {"Age", "Loan_Term_Months", "Credit_Score", "Past_Defaults"}
+NUMERIC_DTYPES = {c: "float32" if c in COMPACT_NUMERIC else "float64" for c in NUMERIC_FIELDS}
+
+assert set(CATEGORY_LEVELS) == set(CATEGORICAL_FIELDS)
+
+
+def categorical(values, field: str) -> pd.Categorical:
+    """
+    values as a categorical with the field's fixed levels first. Labels
+    outside the known levels are appended (sorted) rather than turned
+    into NaN, so an unexpected value still reaches the output and the
+    model sees it as an unknown category, exactly as with plain strings.
+    """
+    dtype = CATEGORY_DTYPES[field]
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        seen = values.dtype.categories
+        # Already conformed (known levels first, in order): nothing to recode
+        if seen[:len(dtype.categories)].equals(dtype.categories):
+            return values.array if isinstance(values, pd.Series) else values
+    else:
+        values = pd.Categorical(values)
+        seen = values.categories
+    extra = sorted(seen.difference(dtype.categories), key=str)
+    if extra:
+        dtype = pd.CategoricalDtype(list(dtype.categories) + extra)
+    return pd.Categorical(values, dtype=dtype)
+
+
+class InvalidValuesError(ValueError):
+    """
+    A numeric field holds values that are present but are not numbers.
+    """
+
+
+def numeric(values: pd.Series, field: str) -> pd.Series:
+    """
+    values as the field's compact numeric dtype. Missing values (and blank
+    strings, as in a CSV) become NaN; anything else that does not parse
+    raises InvalidValuesError naming the field and the first bad rows,
+    rather than being scored as if it were missing.
+    """
+    parsed = pd.to_numeric(values, errors="coerce")
+    present = values.notna()
+    if values.dtype == object:
+        present &= values.astype(str).str.strip() != ""
+    bad = present & parsed.isna()
+    if bad.any():
+        rows = values.index[bad]
+        shown = ", ".join(map(str, rows[:10])) + (", ..." if len(rows) > 10 else "")
+        raise InvalidValuesError(f"{field}: {len(rows)} value(s) are not numbers (rows {shown})")
+    return parsed.astype(NUMERIC_DTYPES[field])
+
+
+def conform_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast the raw scoring fields of df to the compact schema in place
+    (columns already in it are left alone) and return df. Other columns
+    are not touched. Raises InvalidValuesError for a numeric field with
+    values that are not numbers.
+    """
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = numeric(df[col], col)
+    for col in CATEGORY_LEVELS:
+        if col in df.columns:
+            df[col] = categorical(df[col], col)
+    return df
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """
+    Deep memory footprint of a frame (what "bytes per million rows" means).
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
@@ -0,0 +1,365 @@
+import json
+import os
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from columnar import FrameWriter, iter_frames
+from compiled_scorer import CompiledScorer
+from explain import explain_threshold
+from features import engineer_features_for_scoring, engineer_features_record, resolve_reference_date
+from metrics import BATCH_ROWS, ROWS_SCORED, stage
+from native_scorer import NATIVE_SUFFIX, NativeScorer
+
+# =====================================================
+# 1. Model artefacts
+# =====================================================
+
+# models/ sits next to this file in the Docker image and one level up in the repo
+_HERE = Path(__file__).resolve().parent
+MODEL_DIR = Path(os.getenv(
+    "MODEL_DIR",
+    _HERE / "models" if (_HERE / "models").is_dir() else _HERE.parent / "models"
+))
+MODEL_FILE = os.getenv("MODEL_FILE", "xgboost_model_01.pkl")
+
+# Decision settings used when a model has no <name>.json next to its pickle.
+# 0.5 is the rule XGBClassifier.predict applies; bands are the original cut-offs.
+DEFAULT_MODEL_CONFIG = {
+    "decision_threshold": 0.5,
+    "risk_band_cutoffs": [0.25, 0.40],
+    "risk_band_labels": ["Low Risk", "Medium Risk", "High Risk"],
+}
+
+
+# Outcome columns of historical data; never model inputs
+LEAKAGE_COLUMNS = ("Defaulted", "Approval_Status")
+
+
+@lru_cache(maxsize=None)
+def load_model(model_file: str = MODEL_FILE):
+    """
+    Load a scoring pipeline from MODEL_DIR (cached per process): a pickle,
+    or an exported <name>.native artefact served by NativeScorer.
+    """
+    if model_file.endswith(NATIVE_SUFFIX):
+        return NativeScorer.load(MODEL_DIR / model_file)
+    import joblib  # deferred with the sklearn / xgboost stack it unpickles
+
+    return joblib.load(MODEL_DIR / model_file)
+
+
+def read_model_config(model_path: Path) -> dict:
+    """
+    Decision threshold and risk-band cut-offs stored with a model
+    (<name>.json next to <name>.pkl), over the defaults.
+    """
+    config = dict(DEFAULT_MODEL_CONFIG)
+    config_path = Path(model_path).with_suffix(".json")
+    if config_path.exists():
+        config.update(json.loads(config_path.read_text()))
+
+    if len(config["risk_band_labels"]) != len(config["risk_band_cutoffs"]) + 1:
+        raise ValueError(f"{config_path.name}: need one more risk band label than cut-offs")
+    return config
+
+
+@lru_cache(maxsize=None)
+def load_model_config(model_file: str = MODEL_FILE) -> dict:
+    """
+    Decision config for a model in MODEL_DIR (cached per process).
+    """
+    return read_model_config(MODEL_DIR / model_file)
+
+
+@lru_cache(maxsize=None)
+def load_compiled_scorer(model_file: str = MODEL_FILE) -> CompiledScorer:
+    """
+    Precompiled single-record scorer for a model file (cached per process).
+    A native artefact is its own single-record scorer.
+    """
+    model = load_model(model_file)
+    return model if isinstance(model, NativeScorer) else CompiledScorer(model)
+
+
+# =====================================================
+# 2. Scoring helpers
+# =====================================================
+
+def _risk_band_array(proba: np.ndarray, cutoffs, labels) -> np.ndarray:
+    # A PD at or above a cut-off falls into the next band up; missing PDs
+    # fall into the lowest band
+    idx = np.digitize(proba, cutoffs)
+    idx[np.isnan(proba)] = 0
+    return np.asarray(labels, dtype=object)[idx]
+
+
+def add_risk_band(pd_series: pd.Series, cutoffs=None, labels=None) -> pd.Series:
+    """
+    Risk banding based on PD.
+    Cut-offs and labels default to the original 0.25 / 0.40 bands.
+    """
+    if cutoffs is None:
+        cutoffs = DEFAULT_MODEL_CONFIG["risk_band_cutoffs"]
+    if labels is None:
+        labels = DEFAULT_MODEL_CONFIG["risk_band_labels"]
+
+    proba = np.asarray(pd_series, dtype="float64")
+    return pd.Series(_risk_band_array(proba, cutoffs, labels), index=pd_series.index)
+
+
+def apply_decision(proba: np.ndarray, config: dict) -> tuple:
+    """
+    Class and risk band from one PD array (no second model pass).
+    Class is 1 when PD is above the decision threshold.
+    """
+    pred = (proba > config["decision_threshold"]).astype(np.int64)
+    band = _risk_band_array(proba, config["risk_band_cutoffs"], config["risk_band_labels"])
+    return pred, band
+
+
+def drop_leakage(df_fe: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop columns that were not used for training (target / leakage);
+    scoring-only inputs have neither, so nothing is copied.
+    """
+    leaked = [c for c in LEAKAGE_COLUMNS if c in df_fe.columns]
+    return df_fe.drop(columns=leaked) if leaked else df_fe
+
+
+def predict_pd(pipe, df_fe: pd.DataFrame, path: str) -> np.ndarray:
+    """
+    pipe.predict_proba(df_fe)[:, 1], with the preprocess and model steps
+    timed separately (same calls Pipeline.predict_proba makes).
+    """
+    if isinstance(pipe, NativeScorer):
+        with stage("preprocess", path):
+            x = pipe.encode_frame(df_fe)
+        with stage("model", path):
+            return pipe.predict_proba_encoded(x).astype("float64")
+
+    if not hasattr(pipe, "steps"):
+        with stage("model", path):
+            return pipe.predict_proba(df_fe)[:, 1]
+
+    xt = df_fe
+    with stage("preprocess", path):
+        for _, step in pipe.steps[:-1]:
+            if step is not None and step != "passthrough":
+                xt = step.transform(xt)
+    with stage("model", path):
+        return pipe.steps[-1][1].predict_proba(xt)[:, 1]
+
+
+def _score_frame(df_new: pd.DataFrame, pipe, config: dict, shadow, reference_date, drift=None) -> tuple:
+    with stage("features", "batch"):
+        df_fe = engineer_features_for_scoring(df_new, reference_date)
+    df_fe = drop_leakage(df_fe)
+
+    proba = predict_pd(pipe, df_fe, "batch")
+    with stage("decision", "batch"):
+        pred, band = apply_decision(proba, config)
+    ROWS_SCORED.labels("batch").inc(len(proba))
+    BATCH_ROWS.labels("batch").observe(len(proba))
+    if drift is not None:
+        with stage("drift", "batch"):
+            drift.observe_frame(df_fe, proba, band)
+    if shadow is not None:
+        shadow(df_fe, proba)
+    return proba, pred, band
+
+
+def score_new_applications(
+    df_new: pd.DataFrame,
+    pipe=None,
+    config: dict = None,
+    shadow: Optional[Callable] = None,
+    reference_date=None,
+    cache=None,
+    explainer=None,
+    explain_min_pd: Optional[float] = None,
+    drift=None,
+) -> pd.DataFrame:
+    """
+    Takes raw applications, applies feature engineering, scores them with
+    the given pipeline or native scorer (default: MODEL_FILE's), and adds
+    risk bands.
+
+    The pipeline runs once (predict_proba); class and band are derived
+    from that PD using the decision settings stored with the model.
+    The result shares df_new's columns (nothing is copied) and adds the
+    output columns, so modify neither in place afterwards.
+    If given, shadow(df_fe, proba) is handed the engineered features and
+    champion PDs for challenger scoring (see shadow.ShadowScorer).
+    reference_date fixes the date App_Vintage is measured from
+    (see features.resolve_reference_date).
+    With a cache (pd_cache.PDCache.for_model), only rows not seen before
+    go through the pipeline.
+    With an explainer (explain.Explainer), rows with PD above
+    explain_min_pd (default: the decision threshold) get a Reasons column
+    of top contributing fields; other rows get None.
+    With a drift monitor (drift.DriftMonitor), the engineered features,
+    PDs and bands of the rows actually scored (not cache hits) are added
+    to its histograms.
+    """
+    if pipe is None:
+        pipe = load_model()
+    if config is None:
+        config = load_model_config()
+    reference_date = resolve_reference_date(reference_date)
+
+    score = partial(
+        _score_frame, pipe=pipe, config=config, shadow=shadow, reference_date=reference_date, drift=drift
+    )
+    if cache is not None:
+        proba, pred, band = cache.score_frame(df_new, reference_date, score)
+    else:
+        proba, pred, band = score(df_new)
+
+    # Shallow: the input's columns are shared, only the outputs are new
+    out = df_new.copy(deep=False)
+    out["PD_Default"] = proba
+    out["Default_Pred"] = pred
+    out["Risk_Band"] = band
+    if explainer is not None:
+        min_pd = explain_threshold(config, explain_min_pd)
+        out["Reasons"] = explainer.explain_batch(df_new, proba, min_pd, reference_date)
+
+    return out
+
+
+def score_application(
+    record: dict,
+    scorer: CompiledScorer = None,
+    config: dict = None,
+    shadow: Optional[Callable] = None,
+    reference_date=None,
+    cache=None,
+    drift=None,
+) -> dict:
+    """
+    Score one raw application given as a dict (single-record fast path).
+
+    Features are engineered with scalar arithmetic and encoded straight into
+    the model's input vector, so no DataFrame is built at all.
+    If given, shadow(record_fe, proba) receives the engineered record.
+    reference_date, cache and drift work as in score_new_applications; a
+    repeat quote served from the cache skips feature engineering and the model.
+    """
+    if scorer is None:
+        scorer = load_compiled_scorer()
+    if config is None:
+        config = load_model_config()
+    reference_date = resolve_reference_date(reference_date)
+
+    def score(rec: dict) -> tuple:
+        with stage("features", "record"):
+            record_fe = engineer_features_record(rec, reference_date)
+        with stage("preprocess", "record"):
+            x = scorer.encode(record_fe)
+        with stage("model", "record"):
+            proba = float(scorer.predict_proba_encoded(x)[0])
+        with stage("decision", "record"):
+            pred, band = apply_decision(np.array([proba]), config)
+        ROWS_SCORED.labels("record").inc()
+        if drift is not None:
+            with stage("drift", "record"):
+                drift.observe_records([record_fe], [proba], band)
+        if shadow is not None:
+            shadow(record_fe, proba)
+        return proba, int(pred[0]), band[0]
+
+    if cache is not None:
+        proba, pred, band = cache.score_record(record, reference_date, score)
+    else:
+        proba, pred, band = score(record)
+
+    return {
+        "PD_Default": proba,
+        "Default_Pred": pred,
+        "Risk_Band": band,
+    }
+
+
+def score_applications(
+    records: List[dict],
+    scorer: CompiledScorer = None,
+    config: dict = None,
+    shadow: Optional[Callable] = None,
+    reference_date=None,
+    cache=None,
+    drift=None,
+) -> List[dict]:
+    """
+    score_application for several records at once (the micro-batch path):
+    features are engineered per record, encoded into one matrix and
+    scored with a single booster call. Results are in input order.
+    If given, shadow(records_fe, proba) is called once for the whole batch.
+    """
+    if scorer is None:
+        scorer = load_compiled_scorer()
+    if config is None:
+        config = load_model_config()
+    reference_date = resolve_reference_date(reference_date)
+
+    def score(recs: List[dict]) -> list:
+        with stage("features", "microbatch"):
+            records_fe = [engineer_features_record(rec, reference_date) for rec in recs]
+        with stage("preprocess", "microbatch"):
+            x = scorer.encode_many(records_fe)
+        with stage("model", "microbatch"):
+            proba = scorer.predict_proba_encoded(x).astype("float64")
+        with stage("decision", "microbatch"):
+            pred, band = apply_decision(proba, config)
+        ROWS_SCORED.labels("microbatch").inc(len(recs))
+        BATCH_ROWS.labels("microbatch").observe(len(recs))
+        if drift is not None:
+            with stage("drift", "microbatch"):
+                drift.observe_records(records_fe, proba, band)
+        if shadow is not None:
+            shadow(records_fe, proba)
+        return list(zip(proba.tolist(), pred.tolist(), band))
+
+    if cache is not None:
+        results = cache.score_records(records, reference_date, score)
+    else:
+        results = score(records)
+
+    return [
+        {"PD_Default": proba, "Default_Pred": pred, "Risk_Band": band}
+        for proba, pred, band in results
+    ]
+
+
+def score_stream(
+    src,
+    dst,
+    chunk_rows: int = 50_000,
+    pipe=None,
+    config: dict = None,
+    reference_date=None,
+    input_format: str = "csv",
+    output_format: str = "csv",
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV, Parquet or Arrow IPC file of raw applications through
+    the scorer chunk by chunk.
+
+    Each scored chunk is appended to dst (a path or binary file handle, in
+    output_format) before it is yielded, so peak memory is bounded by
+    chunk_rows, not the file size. Callers iterate the generator to drive
+    it (e.g. to update progress). The reference date is resolved once, so
+    every chunk shares it.
+    """
+    if pipe is None:
+        pipe = load_model()
+    reference_date = resolve_reference_date(reference_date)
+
+    with FrameWriter(dst, output_format) as writer:
+        for chunk in iter_frames(src, input_format, chunk_rows):
+            scored = score_new_applications(chunk, pipe, config, reference_date=reference_date)
+            writer.write(scored)
+            yield scored
@@ -0,0 +1,198 @@
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# =====================================================
+# Champion / challenger shadow scoring
+# =====================================================
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shadow_scores (
+    logged_at     REAL    NOT NULL,
+    request_id    TEXT    NOT NULL,
+    row_number    INTEGER NOT NULL,
+    customer_id   TEXT,
+    champion      TEXT    NOT NULL,
+    champion_pd   REAL,
+    challenger    TEXT    NOT NULL,
+    challenger_pd REAL
+)
+"""
+
+
+class ShadowLog:
+    """
+    Append-only SQLite log of paired champion / challenger PDs.
+
+    One row per (request row, challenger). WAL mode lets an analyst read
+    the file while the API keeps appending to it.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def append(self, rows: List[tuple]):
+        with self._lock:
+            self._conn.executemany("INSERT INTO shadow_scores VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def read(self) -> pd.DataFrame:
+        """
+        Whole log as a DataFrame, for offline champion / challenger comparison.
+        """
+        with self._lock:
+            return pd.read_sql_query("SELECT * FROM shadow_scores", self._conn)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _as_pd_list(proba) -> list:
+    return [None if np.isnan(p) else float(p) for p in np.asarray(proba, dtype="float64")]
+
+
+class ShadowScorer:
+    """
+    Scores challenger models on the features the champion already used.
+
+    The champion's PD is returned to the caller straight away; submit_batch /
+    submit_records only queue work on a small thread pool (XGBoost, LightGBM
+    and NumPy release the GIL while predicting). Feature engineering is not
+    repeated: challengers receive the engineered frame (batch) or the
+    engineered record dicts (a /predict micro-batch) the champion was
+    scored on. Failed jobs are counted and logged.
+
+    challengers is called on the worker thread and returns the models to
+    run, e.g. registry.get for each challenger name, so loading a challenger
+    never blocks a live request. When more than max_pending jobs are queued
+    new jobs are dropped (and counted) rather than letting the backlog grow.
+    """
+
+    def __init__(
+        self,
+        challengers: Callable[[], list],
+        log: ShadowLog,
+        max_workers: int = 2,
+        max_pending: int = 64,
+    ):
+        self.challengers = challengers
+        self.log = log
+        self.max_pending = max_pending
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="shadow")
+
+    # -----------------------------
+    # Queueing
+    # -----------------------------
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return None
+            self._pending += 1
+            self.submitted += 1
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+            failed = future.exception()
+            if failed is not None:
+                self.failed += 1
+        if failed is not None:
+            logger.warning("Shadow scoring job failed", exc_info=failed)
+
+    def submit_batch(self, df_fe: pd.DataFrame, champion_pd: np.ndarray, champion: str, customer_ids=None):
+        """
+        Queue challenger scoring of an engineered batch. df_fe must not be
+        modified afterwards (it may share buffers with the caller's raw frame).
+        """
+        if customer_ids is None and "Customer_ID" in df_fe.columns:
+            customer_ids = df_fe["Customer_ID"].tolist()
+        return self._submit(self._score_batch, df_fe, np.asarray(champion_pd), champion, customer_ids)
+
+    def submit_records(self, records_fe: List[dict], champion_pd, champion: str):
+        """
+        Queue challenger scoring of engineered records as one job (a
+        /predict micro-batch), encoded into a single matrix per challenger.
+        """
+        return self._submit(self._score_records, list(records_fe), np.asarray(champion_pd), champion)
+
+    def submit_record(self, record_fe: dict, champion_pd: float, champion: str):
+        """
+        Queue challenger scoring of one engineered record.
+        """
+        return self.submit_records([record_fe], [champion_pd], champion)
+
+    # -----------------------------
+    # Worker side
+    # -----------------------------
+    def _models(self, champion: str) -> list:
+        return [m for m in self.challengers() if m.key != champion]
+
+    def _rows(self, champion, champion_pd, customer_ids, scored) -> List[tuple]:
+        logged_at = time.time()
+        request_id = uuid.uuid4().hex
+        champion_pd = _as_pd_list(champion_pd)
+        if customer_ids is None:
+            customer_ids = [None] * len(champion_pd)
+        customer_ids = [None if c is None else str(c) for c in customer_ids]
+
+        rows = []
+        for challenger, proba in scored:
+            for i, (cid, pd_champ, pd_chal) in enumerate(zip(customer_ids, champion_pd, _as_pd_list(proba))):
+                rows.append((logged_at, request_id, i, cid, champion, pd_champ, challenger, pd_chal))
+        return rows
+
+    def _score_batch(self, df_fe, champion_pd, champion, customer_ids):
+        scored = [(m.key, m.pipe.predict_proba(df_fe)[:, 1]) for m in self._models(champion)]
+        self.log.append(self._rows(champion, champion_pd, customer_ids, scored))
+
+    def _score_records(self, records_fe, champion_pd, champion):
+        scored = [
+            (m.key, m.scorer.predict_proba_encoded(m.scorer.encode_many(records_fe)))
+            for m in self._models(champion)
+        ]
+        customer_ids = [record_fe.get("Customer_ID") for record_fe in records_fe]
+        self.log.append(self._rows(champion, champion_pd, customer_ids, scored))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "pending": self._pending,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
+
+    def close(self, wait: bool = True):
+        """
+        Finish queued jobs (wait=True) and close the log.
+        """
+        self._pool.shutdown(wait=wait)
+        self.log.close()
+
@@ -0,0 +1,617 @@
+"""
+Scripted retraining: parallel, resumable Optuna tuning and a versioned artefact.
+
+    python train.py loan_default_processed.csv --model xgboost --trials 40 --workers 4
+    python train.py loan_default_processed.csv --model lightgbm --tune-rows 0 --workers 8
+
+The tuning cells of notebooks/Loan_Default_Models .ipynb as a script, with
+the same search spaces, class weighting, 80/20 stratified test split and
+3-fold stratified CV on a tuning sample. Differences:
+
+- Features come from features.engineer_features_for_scoring, so the
+  pipeline is trained on exactly what the scoring path hands it.
+- The ColumnTransformer is fitted once per CV fold, not once per fold of
+  every trial. Each fold's transformed train / validation matrices are
+  cached under --train-dir as .npy files (CSR parts when the output is
+  sparse) and memory-mapped by every trial, so trials only fit the model.
+- Trials run in --workers processes sharing one SQLite Optuna study. A
+  trial whose running mean AUC falls below the median of earlier trials
+  at the same fold is pruned. Re-running the same command resumes the
+  study: completed trials are kept and a trial whose worker died is
+  retried once.
+- The best parameters are refitted on the whole training split and
+  written to MODEL_DIR as the next <name>_<version>.pkl with its decision
+  config, training metadata (.train.json) and drift baseline
+  (.drift.json). The pickle is written last, so a registry refresh never
+  sees a model without its config.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from columnar import format_for_path, read_frame
+from drift import DriftMonitor, baseline_path, make_baseline
+from features import CATEGORICAL_FIELDS, NUMERIC_FIELDS, engineer_features_for_scoring, resolve_reference_date
+from native_scorer import NATIVE_SUFFIX
+from registry import parse_artefact_name
+from scoring import DEFAULT_MODEL_CONFIG, MODEL_DIR, apply_decision
+
+# =====================================================
+# 1. Settings
+# =====================================================
+
+RANDOM_STATE = 42
+TEST_SIZE = 0.20
+CV_FOLDS = 3
+DEFAULT_TRIALS = 20
+# Rows tuned on (0 = the whole training split); the notebook used 150k
+DEFAULT_TUNE_ROWS = 150_000
+
+# Fold caches and the Optuna study live here
+TRAIN_DIR = Path(os.getenv("TRAIN_DIR", "training"))
+STUDY_DB = "optuna.sqlite"
+
+TARGET = "Defaulted"
+
+# The columns engineer_features_for_scoring produces (identifiers, the raw
+# date and the leakage columns are left out, as in the notebook)
+NUMERIC_FEATURES = NUMERIC_FIELDS + [
+    "DTI", "Income_Loan_Ratio", "Loan_to_Income_Ratio", "Monthly_Installment",
+    "Affordability_Score", "App_Vintage", "Has_Past_Defaults", "High_DTI_Flag",
+    "Low_Affordability_Flag",
+]
+CATEGORICAL_FEATURES = CATEGORICAL_FIELDS + ["Age_Band", "Credit_Band", "Employment_Tenure_Band"]
+FEATURES = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+
+
+# =====================================================
+# 2. Models and search spaces (from the notebook)
+# =====================================================
+
+def _random_forest_space(trial) -> dict:
+    return {
+        "n_estimators": trial.suggest_int("n_estimators", 150, 400),
+        "max_depth": trial.suggest_int("max_depth", 6, 18),
+        "min_samples_split": trial.suggest_int("min_samples_split", 20, 150),
+        "min_samples_leaf": trial.suggest_int("min_samples_leaf", 10, 80),
+        "max_features": trial.suggest_categorical("max_features", ["sqrt", "log2"]),
+    }
+
+
+def _random_forest(params: dict, pos_weight: float, threads: int):
+    from sklearn.ensemble import RandomForestClassifier
+
+    return RandomForestClassifier(class_weight="balanced", n_jobs=threads, random_state=RANDOM_STATE, **params)
+
+
+def _xgboost_space(trial) -> dict:
+    return {
+        "n_estimators": trial.suggest_int("n_estimators", 200, 600),
+        "max_depth": trial.suggest_int("max_depth", 3, 10),
+        "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3, log=True),
+        "subsample": trial.suggest_float("subsample", 0.6, 1.0),
+        "colsample_bytree": trial.suggest_float("colsample_bytree", 0.6, 1.0),
+        "min_child_weight": trial.suggest_float("min_child_weight", 1.0, 10.0),
+        "gamma": trial.suggest_float("gamma", 0.0, 5.0),
+        "reg_alpha": trial.suggest_float("reg_alpha", 0.0, 5.0),
+        "reg_lambda": trial.suggest_float("reg_lambda", 0.0, 5.0),
+    }
+
+
+def _xgboost(params: dict, pos_weight: float, threads: int):
+    from xgboost import XGBClassifier
+
+    return XGBClassifier(
+        objective="binary:logistic",
+        eval_metric="logloss",
+        tree_method="hist",
+        scale_pos_weight=pos_weight,
+        random_state=RANDOM_STATE,
+        n_jobs=threads,
+        **params,
+    )
+
+
+def _lightgbm_space(trial) -> dict:
+    return {
+        "n_estimators": trial.suggest_int("n_estimators", 200, 600),
+        "num_leaves": trial.suggest_int("num_leaves", 31, 255),
+        "max_depth": trial.suggest_int("max_depth", -1, 12),
+        "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3, log=True),
+        "subsample": trial.suggest_float("subsample", 0.6, 1.0),
+        "colsample_bytree": trial.suggest_float("colsample_bytree", 0.6, 1.0),
+        "min_child_samples": trial.suggest_int("min_child_samples", 20, 200),
+        "reg_alpha": trial.suggest_float("reg_alpha", 0.0, 5.0),
+        "reg_lambda": trial.suggest_float("reg_lambda", 0.0, 5.0),
+    }
+
+
+def _lightgbm(params: dict, pos_weight: float, threads: int):
+    from lightgbm import LGBMClassifier
+
+    return LGBMClassifier(
+        objective="binary",
+        metric="auc",
+        n_jobs=threads,
+        random_state=RANDOM_STATE,
+        scale_pos_weight=pos_weight,
+        verbose=-1,
+        **params,
+    )
+
+
+# CLI name -> artefact name (as in models/) and its builders
+MODELS = {
+    "random_forest": {"artefact": "random_forest", "space": _random_forest_space, "build": _random_forest},
+    "xgboost": {"artefact": "xgboost_model", "space": _xgboost_space, "build": _xgboost},
+    "lightgbm": {"artefact": "lightgbm_model", "space": _lightgbm_space, "build": _lightgbm},
+}
+
+
+def build_preprocessor():
+    """
+    The notebook's ColumnTransformer: scaled numerics and one-hot
+    categoricals (unknown categories ignored). With this feature set the
+    output is dense (above sparse_threshold), which CompiledScorer needs
+    and which keeps XGBoost reading zeros as zeros, not as missing.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    return ColumnTransformer(transformers=[
+        ("num", Pipeline(steps=[("scaler", StandardScaler())]), NUMERIC_FEATURES),
+        ("cat", Pipeline(steps=[("encoder", OneHotEncoder(handle_unknown="ignore", sparse_output=True))]),
+         CATEGORICAL_FEATURES),
+    ])
+
+
+# =====================================================
+# 3. Data and splits
+# =====================================================
+
+def load_training_data(path: Path, reference_date) -> tuple:
+    """
+    (engineered feature frame, 0/1 target) for a labelled application file.
+    """
+    df = read_frame(path, format_for_path(path))
+    if TARGET not in df.columns:
+        raise ValueError(f"{path.name}: no {TARGET} column to train on")
+    df = df[df[TARGET].notna()].reset_index(drop=True)
+    df_fe = engineer_features_for_scoring(df, reference_date)
+    missing = [c for c in FEATURES if c not in df_fe.columns]
+    if missing:
+        raise ValueError(f"{path.name}: missing columns {missing}")
+    return df_fe[FEATURES], df[TARGET].astype("int64").to_numpy()
+
+
+def split_indices(y: np.ndarray, tune_rows: int, folds: int) -> dict:
+    """
+    Stratified row indices: train / test (80/20), the tuning sample drawn
+    from train, and the CV folds of the tuning sample (positions within it).
+    """
+    from sklearn.model_selection import StratifiedKFold, train_test_split
+
+    rows = np.arange(len(y))
+    train, test = train_test_split(rows, test_size=TEST_SIZE, stratify=y, random_state=RANDOM_STATE)
+    tune = train
+    if tune_rows and len(train) > tune_rows:
+        tune, _ = train_test_split(train, train_size=tune_rows, stratify=y[train], random_state=RANDOM_STATE)
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+    return {
+        "train": np.sort(train),
+        "test": np.sort(test),
+        "tune": np.sort(tune),
+        "folds": list(cv.split(np.zeros(len(tune)), y[np.sort(tune)])),
+    }
+
+
+def data_fingerprint(path: Path, reference_date: pd.Timestamp, tune_rows: int, folds: int) -> str:
+    """
+    Identifies a fold cache and a study: the same file, reference date,
+    sample and fold layout always map to the same digest.
+    """
+    stat = path.stat()
+    key = json.dumps([
+        str(path.resolve()), stat.st_size, stat.st_mtime_ns, reference_date.isoformat(),
+        tune_rows, folds, RANDOM_STATE, FEATURES,
+    ])
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+# =====================================================
+# 4. Fold cache (transformed once, memory-mapped by every trial)
+# =====================================================
+
+def _save_matrix(out_dir: Path, name: str, x) -> dict:
+    # float32 is what the tree libraries train on anyway
+    if hasattr(x, "tocsr"):
+        x = x.tocsr()
+        np.save(out_dir / f"{name}.data.npy", x.data.astype(np.float32))
+        np.save(out_dir / f"{name}.indices.npy", x.indices)
+        np.save(out_dir / f"{name}.indptr.npy", x.indptr)
+        return {"sparse": True, "shape": list(x.shape)}
+    np.save(out_dir / f"{name}.npy", np.asarray(x, dtype=np.float32))
+    return {"sparse": False, "shape": list(x.shape)}
+
+
+def _load_matrix(cache_dir: Path, name: str, meta: dict):
+    if not meta["sparse"]:
+        return np.load(cache_dir / f"{name}.npy", mmap_mode="r")
+    import scipy.sparse as sp
+
+    parts = [np.load(cache_dir / f"{name}.{part}.npy", mmap_mode="r") for part in ("data", "indices", "indptr")]
+    return sp.csr_matrix(tuple(parts), shape=tuple(meta["shape"]), copy=False)
+
+
+class FoldCache:
+    """
+    Transformed CV folds on disk: fold-<k>/{train,valid}(.npy | CSR parts)
+    plus the targets. Built once per data fingerprint; load() memory-maps,
+    so concurrent trial processes share the page cache instead of each
+    holding a copy.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.meta = json.loads((self.root / "meta.json").read_text())
+        self.folds = self.meta["folds"]
+        self._loaded = {}
+
+    @classmethod
+    def build(cls, root: Path, x: pd.DataFrame, y: np.ndarray, folds: list) -> "FoldCache":
+        """
+        Fit the preprocessor on each fold's training rows and write both
+        halves. Written to a temporary directory and renamed, so a crash
+        never leaves a half-built cache behind.
+        """
+        root = Path(root)
+        if (root / "meta.json").exists():
+            return cls(root)
+        tmp = root.with_name(f"{root.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        meta = {"folds": len(folds), "matrices": {}}
+        for k, (train, valid) in enumerate(folds):
+            preprocessor = build_preprocessor().fit(x.iloc[train])
+            for half, rows in (("train", train), ("valid", valid)):
+                name = f"fold-{k}-{half}"
+                meta["matrices"][name] = _save_matrix(tmp, name, preprocessor.transform(x.iloc[rows]))
+                np.save(tmp / f"{name}.y.npy", y[rows])
+        (tmp / "meta.json").write_text(json.dumps(meta))
+        os.replace(tmp, root)
+        return cls(root)
+
+    def load(self, k: int) -> tuple:
+        """
+        (x_train, y_train, x_valid, y_valid) for fold k, memory-mapped.
+        """
+        if k not in self._loaded:
+            halves = []
+            for half in ("train", "valid"):
+                name = f"fold-{k}-{half}"
+                halves += [
+                    _load_matrix(self.root, name, self.meta["matrices"][name]),
+                    np.load(self.root / f"{name}.y.npy", mmap_mode="r"),
+                ]
+            self._loaded[k] = tuple(halves)
+        return self._loaded[k]
+
+
+# =====================================================
+# 5. Parallel tuning
+# =====================================================
+
+def _storage(db_path: Path):
+    import optuna
+    from optuna.storages import RDBStorage, RetryFailedTrialCallback
+
+    # Heartbeats mark a trial whose process died as failed; it is then
+    # retried once, so an interrupted run resumes without losing a slot
+    return RDBStorage(
+        url=f"sqlite:///{db_path}",
+        engine_kwargs={"connect_args": {"timeout": 60}},
+        heartbeat_interval=60,
+        grace_period=180,
+        failed_trial_callback=RetryFailedTrialCallback(max_retry=1),
+    )
+
+
+def _objective(trial, model: str, cache: FoldCache, pos_weight: float, threads: int) -> float:
+    import optuna
+    from sklearn.metrics import roc_auc_score
+
+    spec = MODELS[model]
+    params = spec["space"](trial)
+    scores = []
+    for k in range(cache.folds):
+        x_train, y_train, x_valid, y_valid = cache.load(k)
+        clf = spec["build"](params, pos_weight, threads).fit(x_train, y_train)
+        scores.append(roc_auc_score(y_valid, clf.predict_proba(x_valid)[:, 1]))
+        # Running mean AUC, so the pruner can stop a poor trial after one fold
+        trial.report(float(np.mean(scores)), step=k)
+        if trial.should_prune():
+            raise optuna.TrialPruned()
+    return float(np.mean(scores))
+
+
+def _tune_worker(
+    worker: int,
+    db_path: str,
+    study_name: str,
+    model: str,
+    cache_dir: str,
+    pos_weight: float,
+    threads: int,
+    n_trials: int,
+) -> int:
+    """
+    One tuning process: joins the shared study and runs its share of the
+    remaining trials (complete or pruned).
+    """
+    import optuna
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=_storage(Path(db_path)),
+        # Distinct seeds, or every worker would propose the same first trials
+        sampler=optuna.samplers.TPESampler(seed=RANDOM_STATE + worker),
+        pruner=optuna.pruners.MedianPruner(n_startup_trials=5),
+    )
+    cache = FoldCache(Path(cache_dir))
+    study.optimize(
+        partial(_objective, model=model, cache=cache, pos_weight=pos_weight, threads=threads),
+        n_trials=n_trials,
+        gc_after_trial=True,
+    )
+    return os.getpid()
+
+
+def finished_trials(study) -> int:
+    from optuna.trial import TrialState
+
+    return len(study.get_trials(deepcopy=False, states=(TrialState.COMPLETE, TrialState.PRUNED)))
+
+
+def tune(
+    model: str,
+    train_dir: Path,
+    fingerprint: str,
+    cache: FoldCache,
+    pos_weight: float,
+    n_trials: int,
+    workers: int,
+):
+    """
+    Run the study to n_trials finished trials across worker processes and
+    return it. Trials already in the study (earlier runs) count.
+    """
+    import optuna
+
+    db_path = train_dir / STUDY_DB
+    study_name = f"{MODELS[model]['artefact']}-{fingerprint}"
+    study = optuna.create_study(
+        study_name=study_name, storage=_storage(db_path), direction="maximize", load_if_exists=True
+    )
+    remaining = n_trials - finished_trials(study)
+    if remaining > 0:
+        workers = max(1, min(workers, remaining))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        # Fixed shares: a shared "stop at n_trials" check lets concurrent
+        # workers each start one trial too many
+        shares = [remaining // workers + (worker < remaining % workers) for worker in range(workers)]
+        # spawn: each worker opens its own SQLite connection
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            futures = [
+                pool.submit(
+                    _tune_worker, worker, str(db_path), study_name, model, str(cache.root),
+                    pos_weight, threads, share,
+                )
+                for worker, share in enumerate(shares)
+            ]
+            for future in futures:
+                future.result()
+    return study
+
+
+# =====================================================
+# 6. Final fit and versioned artefact
+# =====================================================
+
+def next_version(model_dir: Path, artefact: str) -> str:
+    """
+    One past the highest version of artefact in model_dir, as "NN".
+    """
+    versions = [
+        int(version)
+        for suffix in (".pkl", NATIVE_SUFFIX)
+        for path in model_dir.glob(f"{artefact}_*{suffix}")
+        for name, version in [parse_artefact_name(path)]
+        if name == artefact
+    ]
+    return f"{max(versions, default=0) + 1:02d}"
+
+
+def decision_config(model_dir: Path, artefact: str, version: str) -> dict:
+    """
+    Decision settings for a new version: the previous version's (a business
+    setting, not something tuning changes) or the defaults.
+    """
+    previous = int(version) - 1
+    for path in sorted(model_dir.glob(f"{artefact}_*.json")):
+        name, v = parse_artefact_name(path)
+        if name == artefact and v.isdigit() and int(v) == previous:
+            return json.loads(path.read_text())
+    return dict(DEFAULT_MODEL_CONFIG)
+
+
+def fit_final(model: str, params: dict, x: pd.DataFrame, y: np.ndarray, pos_weight: float):
+    """
+    The scoring pipeline (preprocess + model) fitted on the whole training split.
+    """
+    from sklearn.pipeline import Pipeline
+
+    clf = MODELS[model]["build"](params, pos_weight, os.cpu_count() or 1)
+    return Pipeline(steps=[("preprocess", build_preprocessor()), ("model", clf)]).fit(x, y)
+
+
+def write_artefact(model_dir: Path, stem: str, pipe, config: dict, metadata: dict, baseline: dict) -> Path:
+    """
+    Write config, metadata and drift baseline, then the pickle (atomically,
+    last) so the registry only ever discovers complete artefacts.
+    """
+    import joblib
+
+    model_dir.mkdir(parents=True, exist_ok=True)
+    final = model_dir / f"{stem}.pkl"
+    (model_dir / f"{stem}.json").write_text(json.dumps(config, indent=2))
+    (model_dir / f"{stem}.train.json").write_text(json.dumps(metadata, indent=2))
+    baseline_path(final).write_text(json.dumps(baseline))
+    tmp = final.with_name(final.name + ".tmp")
+    joblib.dump(pipe, tmp)
+    os.replace(tmp, final)
+    return final
+
+
+def run(
+    input_path: Path,
+    model: str,
+    n_trials: int = DEFAULT_TRIALS,
+    workers: int = 1,
+    tune_rows: int = DEFAULT_TUNE_ROWS,
+    folds: int = CV_FOLDS,
+    reference_date: Optional[str] = None,
+    train_dir: Path = TRAIN_DIR,
+    model_dir: Path = MODEL_DIR,
+    tune_only: bool = False,
+) -> dict:
+    """
+    Tune, refit and write the next version of a model; returns a summary.
+    """
+    from sklearn.metrics import average_precision_score, roc_auc_score
+
+    start = time.perf_counter()
+    timings = {}
+    reference_date = resolve_reference_date(reference_date)
+    fingerprint = data_fingerprint(input_path, reference_date, tune_rows, folds)
+    train_dir.mkdir(parents=True, exist_ok=True)
+
+    x, y = load_training_data(input_path, reference_date)
+    splits = split_indices(y, tune_rows, folds)
+    y_train = y[splits["train"]]
+    pos_weight = float((len(y_train) - y_train.sum()) / y_train.sum())
+    timings["load"] = time.perf_counter() - start
+
+    t = time.perf_counter()
+    x_tune = x.iloc[splits["tune"]].reset_index(drop=True)
+    cache = FoldCache.build(train_dir / "folds" / fingerprint, x_tune, y[splits["tune"]], splits["folds"])
+    timings["fold_cache"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    study = tune(model, train_dir, fingerprint, cache, pos_weight, n_trials, workers)
+    timings["tune"] = time.perf_counter() - t
+    summary = {
+        "model": model,
+        "study": study.study_name,
+        "trials_finished": finished_trials(study),
+        "best_cv_roc_auc": round(study.best_value, 5),
+        "best_params": study.best_params,
+    }
+    if tune_only:
+        return {**summary, "seconds": {k: round(v, 1) for k, v in timings.items()}}
+
+    t = time.perf_counter()
+    x_train = x.iloc[splits["train"]]
+    pipe = fit_final(model, study.best_params, x_train, y_train, pos_weight)
+    timings["refit"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    x_test = x.iloc[splits["test"]]
+    y_test = y[splits["test"]]
+    test_proba = pipe.predict_proba(x_test)[:, 1]
+    metrics = {
+        "test_roc_auc": round(float(roc_auc_score(y_test, test_proba)), 5),
+        "test_pr_auc": round(float(average_precision_score(y_test, test_proba)), 5),
+    }
+
+    artefact = MODELS[model]["artefact"]
+    version = next_version(model_dir, artefact)
+    config = decision_config(model_dir, artefact, version)
+
+    # Drift baseline: the training split as the fitted model scores it
+    monitor = DriftMonitor(config["risk_band_labels"])
+    train_proba = pipe.predict_proba(x_train)[:, 1]
+    monitor.observe_frame(x_train, train_proba, apply_decision(train_proba, config)[1])
+    timings["evaluate"] = time.perf_counter() - t
+
+    metadata = {
+        **summary,
+        **metrics,
+        "input": str(input_path.resolve()),
+        "fingerprint": fingerprint,
+        "reference_date": reference_date.date().isoformat(),
+        "rows": {"train": len(splits["train"]), "test": len(splits["test"]), "tune": len(splits["tune"])},
+        "cv_folds": folds,
+        "scale_pos_weight": pos_weight,
+        "numeric_features": NUMERIC_FEATURES,
+        "categorical_features": CATEGORICAL_FEATURES,
+        "trained_at": pd.Timestamp.now(tz="UTC").isoformat(),
+    }
+    path = write_artefact(
+        model_dir, f"{artefact}_{version}", pipe, config, metadata,
+        make_baseline(monitor, input_path.name),
+    )
+    timings["total"] = time.perf_counter() - start
+    return {
+        **summary,
+        **metrics,
+        "artefact": str(path),
+        "seconds": {k: round(v, 1) for k, v in timings.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel, resumable Optuna retraining.")
+    parser.add_argument("input", type=Path, help="Labelled CSV, Parquet or Arrow IPC file (with Defaulted)")
+    parser.add_argument("--model", choices=sorted(MODELS), default="xgboost", help="Model family to tune")
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS, help="Finished trials the study should hold")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Tuning processes")
+    parser.add_argument("--tune-rows", type=int, default=DEFAULT_TUNE_ROWS, help="Tuning sample size (0 = all)")
+    parser.add_argument("--folds", type=int, default=CV_FOLDS, help="CV folds per trial")
+    parser.add_argument("--reference-date", help="Date App_Vintage is measured from (YYYY-MM-DD)")
+    parser.add_argument("--train-dir", type=Path, default=TRAIN_DIR, help="Fold cache and Optuna study directory")
+    parser.add_argument("--model-dir", type=Path, default=MODEL_DIR, help="Where the new version is written")
+    parser.add_argument("--tune-only", action="store_true", help="Stop after tuning (no refit or artefact)")
+    args = parser.parse_args(argv)
+
+    summary = run(
+        args.input,
+        args.model,
+        n_trials=args.trials,
+        workers=max(1, args.workers),
+        tune_rows=args.tune_rows,
+        folds=args.folds,
+        reference_date=args.reference_date,
+        train_dir=args.train_dir,
+        model_dir=args.model_dir,
+        tune_only=args.tune_only,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
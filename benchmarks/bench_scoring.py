@@ -0,0 +1,458 @@
+"""
+Reproducible scoring benchmarks: latency, throughput, memory, model load.
+
+    python benchmarks/bench_scoring.py run --out bench.json
+    python benchmarks/bench_scoring.py run --out benchmarks/baseline.json     # store a baseline
+    python benchmarks/bench_scoring.py compare bench.json benchmarks/baseline.json --tolerance 0.10
+
+For each pickled pipeline in MODEL_DIR, a fresh process measures:
+- model load time (unpickle + CompiledScorer) and RSS after loading,
+- single-record latency percentiles on the /predict fast path (score_application),
+- memory per million rows of the raw frame, as built (object strings)
+  and in the compact reader schema (schema.py),
+- batch throughput (score_new_applications) at --sizes rows, on frames
+  in the compact schema as the file and HTTP readers deliver them,
+- peak RSS of the whole run.
+Then, unless --skip-http, start-up is measured (import time of the API
+module; seconds from launch to port open, to /ready and to the first
+/predict answer), and end-to-end /predict latency, concurrent /predict
+throughput and /predict_batch throughput are measured against each model.
+Set MODEL_BACKEND=native to benchmark the exported artefacts.
+
+Inputs are synthetic applicants (benchmarks/synthetic.py) with a fixed
+seed and a fixed App_Vintage reference date, so runs are comparable.
+Results are one JSON document; compare exits with status 1 when any
+metric is worse than the baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+REPO = HERE.parent
+ENGINE_DIR = REPO / "app"
+sys.path.insert(0, str(ENGINE_DIR))
+sys.path.insert(0, str(HERE))
+
+from synthetic import make_applicants, make_records  # noqa: E402
+
+# =====================================================
+# 1. Settings
+# =====================================================
+
+DEFAULT_SIZES = [1, 100, 10_000, 1_000_000]
+DEFAULT_SEED = 20250131
+REFERENCE_DATE = "2025-01-31"
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Metrics where a larger value is better; everything else is a cost
+HIGHER_IS_BETTER = ("rows_per_second", "requests_per_second")
+# Sample counts and settings recorded next to metrics (not compared)
+COUNT_KEYS = (".n", ".repeats", ".rows", ".concurrency")
+
+
+def model_dir() -> Path:
+    return Path(os.getenv("MODEL_DIR", REPO / "models"))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def latency_summary(seconds) -> dict:
+    ms = np.asarray(seconds, dtype="float64") * 1000
+    summary = {f"p{p:g}_ms": round(float(np.percentile(ms, p)), 4) for p in PERCENTILES}
+    summary["mean_ms"] = round(float(ms.mean()), 4)
+    summary["n"] = len(ms)
+    return summary
+
+
+def _repeat(fn, min_repeats: int, min_seconds: float) -> list:
+    """
+    Call fn until it has run min_repeats times and for min_seconds in total.
+    Returns the wall time of each call.
+    """
+    times = []
+    while len(times) < min_repeats or sum(times) < min_seconds:
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+# =====================================================
+# 2. In-process benchmarks (one fresh process per model)
+# =====================================================
+
+def bench_model(model_file: str, sizes: list, n_single: int, seed: int, min_seconds: float) -> dict:
+    """
+    Runs in a spawned worker, so load time and RSS are not skewed by
+    models benchmarked earlier.
+    """
+    from features import resolve_reference_date
+    from native_scorer import NATIVE_SUFFIX, NativeScorer
+    from schema import conform_frame, frame_nbytes
+    from scoring import read_model_config, score_application, score_new_applications
+
+    reference_date = resolve_reference_date(REFERENCE_DATE)
+    path = model_dir() / model_file
+    rss_before = peak_rss_mb()
+
+    # Imports of the model stack count towards load time, as in a fresh replica
+    start = time.perf_counter()
+    if path.suffix == NATIVE_SUFFIX:
+        pipe = NativeScorer.load(path)
+    else:
+        import joblib
+
+        pipe = joblib.load(path)
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    if isinstance(pipe, NativeScorer):
+        scorer = pipe
+    else:
+        from compiled_scorer import CompiledScorer
+
+        scorer = CompiledScorer(pipe)
+    compile_seconds = time.perf_counter() - start
+    config = read_model_config(path)
+    rss_loaded = peak_rss_mb()
+
+    # Single-record latency on the /predict fast path (no cache)
+    records = make_records(min(n_single, 10_000), seed)
+    for record in records[:200]:
+        score_application(record, scorer, config, reference_date=reference_date)
+    single = []
+    for i in range(n_single):
+        record = records[i % len(records)]
+        t0 = time.perf_counter()
+        score_application(record, scorer, config, reference_date=reference_date)
+        single.append(time.perf_counter() - t0)
+
+    # Batch throughput; one frame of the largest size, sliced per size
+    df_all = make_applicants(max(sizes), seed)
+    per_million = 1_000_000 / len(df_all) / 2**20
+    frame_memory = {"object_mb_per_million_rows": round(frame_nbytes(df_all) * per_million, 1)}
+    df_all = conform_frame(df_all)
+    frame_memory["compact_mb_per_million_rows"] = round(frame_nbytes(df_all) * per_million, 1)
+    score_new_applications(df_all.iloc[:64], pipe, config, reference_date=reference_date)
+    batch = {}
+    for n in sizes:
+        df = df_all.iloc[:n]
+        times = _repeat(
+            lambda: score_new_applications(df, pipe, config, reference_date=reference_date),
+            min_repeats=1 if n >= 100_000 else 5,
+            min_seconds=min_seconds,
+        )
+        median = float(np.median(times))
+        batch[str(n)] = {
+            "seconds": round(median, 6),
+            "rows_per_second": round(n / median, 1),
+            "repeats": len(times),
+        }
+
+    return {
+        "load_seconds": round(load_seconds, 4),
+        "compile_seconds": round(compile_seconds, 4),
+        "rss_before_load_mb": rss_before,
+        "rss_after_load_mb": rss_loaded,
+        "single_record": latency_summary(single),
+        "frame_memory": frame_memory,
+        "batch": batch,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# =====================================================
+# 3. End-to-end HTTP benchmarks
+# =====================================================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(port: int, timeout: float = 120.0) -> tuple:
+    """
+    Launch the API with uvicorn (result cache off, so every request is
+    scored) and wait until /ready reports the models warm.
+    Returns the process and its start-up timings in seconds since launch:
+    port open (/health), ready (/ready) and first /predict answered.
+    """
+    import requests
+
+    env = dict(os.environ, PD_CACHE_BACKEND="off", SHADOW_MODELS="")
+    env.setdefault("SCORING_REFERENCE_DATE", REFERENCE_DATE)
+    launched = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ENGINE_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    timings = {}
+    deadline = launched + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API exited with status {proc.returncode}")
+        try:
+            if "listen_seconds" not in timings and requests.get(f"{base_url}/health", timeout=1).ok:
+                timings["listen_seconds"] = round(time.perf_counter() - launched, 4)
+            if requests.get(f"{base_url}/ready", timeout=1).status_code == 200:
+                timings["ready_seconds"] = round(time.perf_counter() - launched, 4)
+                break
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.05)
+    else:
+        proc.terminate()
+        raise RuntimeError("API did not become ready in time")
+
+    record = make_records(1)[0]
+    requests.post(f"{base_url}/predict", json=record, timeout=30).raise_for_status()
+    timings["first_prediction_seconds"] = round(time.perf_counter() - launched, 4)
+    return proc, timings
+
+
+def bench_import(repeats: int = 3) -> dict:
+    """
+    Wall time to import the API module (main.py) in a fresh interpreter,
+    median of repeats. Model loading is not included (it runs in the
+    lifespan preload).
+    """
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ENGINE_DIR, capture_output=True, text=True, check=True,
+            env=dict(os.environ, PD_CACHE_BACKEND="off"),
+        )
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return {"import_seconds": round(float(np.median(times)), 4)}
+
+
+def bench_http(base_url: str, model: str, n_single: int, concurrency: int, batch_rows: int, seed: int) -> dict:
+    import requests
+
+    session = requests.Session()
+    params = {"model": model, "reference_date": REFERENCE_DATE}
+    records = make_records(min(n_single, 10_000), seed)
+
+    def post(record):
+        response = session.post(f"{base_url}/predict", json=record, params=params, timeout=30)
+        response.raise_for_status()
+
+    # First requests load and warm the model
+    for record in records[:50]:
+        post(record)
+
+    single = []
+    for i in range(n_single):
+        t0 = time.perf_counter()
+        post(records[i % len(records)])
+        single.append(time.perf_counter() - t0)
+
+    # Concurrent callers (exercises the micro-batcher)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(post, (records[i % len(records)] for i in range(n_single))))
+    concurrent_seconds = time.perf_counter() - start
+
+    body = make_applicants(batch_rows, seed).to_csv(index=False).encode("utf-8")
+
+    def post_batch():
+        response = session.post(
+            f"{base_url}/predict_batch", data=body, params=params,
+            headers={"Content-Type": "text/csv"}, timeout=300,
+        )
+        response.raise_for_status()
+
+    times = _repeat(post_batch, min_repeats=5, min_seconds=1.0)
+    median = float(np.median(times))
+    session.close()
+
+    return {
+        "predict": latency_summary(single),
+        "predict_concurrent": {
+            "concurrency": concurrency,
+            "requests_per_second": round(n_single / concurrent_seconds, 1),
+        },
+        "predict_batch": {
+            "rows": batch_rows,
+            "seconds": round(median, 6),
+            "rows_per_second": round(batch_rows / median, 1),
+        },
+    }
+
+
+# =====================================================
+# 4. Run and compare
+# =====================================================
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run(args) -> dict:
+    backend = os.getenv("MODEL_BACKEND", "pickle")
+    suffix = ".native" if backend == "native" else ".pkl"
+    model_files = args.models or sorted(p.name for p in model_dir().glob("*" + suffix))
+    results = {
+        "environment": environment(),
+        "settings": {
+            "sizes": args.sizes,
+            "single_requests": args.single,
+            "seed": args.seed,
+            "reference_date": REFERENCE_DATE,
+            "model_backend": backend,
+        },
+        "models": {},
+    }
+
+    ctx = get_context("spawn")
+    for model_file in model_files:
+        print(f"benchmarking {model_file} ...", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results["models"][model_file] = pool.submit(
+                bench_model, model_file, args.sizes, args.single, args.seed, args.min_seconds
+            ).result()
+
+    if not args.skip_http:
+        from registry import parse_artefact_name
+
+        results["startup"] = bench_import()
+        port = _free_port()
+        proc, timings = start_api(port)
+        results["startup"].update(timings)
+        try:
+            results["http"] = {}
+            for model_file in model_files:
+                name, version = parse_artefact_name(Path(model_file))
+                print(f"HTTP benchmark {name}:{version} ...", file=sys.stderr)
+                results["http"][model_file] = bench_http(
+                    f"http://127.0.0.1:{port}", name, args.single, args.concurrency,
+                    args.http_batch_rows, args.seed,
+                )
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    return results
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """
+    Numeric leaves as dotted keys, e.g. models.xgboost_model_01.pkl.batch.100.rows_per_second.
+    """
+    flat = {}
+    for key, value in results.items():
+        if key in ("environment", "settings"):
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not name.endswith(COUNT_KEYS):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    One row per metric present in both runs: (metric, baseline, current,
+    relative change, regressed). Change is signed so that positive is worse.
+    """
+    cur, base = flatten(current), flatten(baseline)
+    rows = []
+    for metric in sorted(cur.keys() & base.keys()):
+        old, new = base[metric], cur[metric]
+        if old == 0:
+            continue
+        change = (new - old) / abs(old)
+        if metric.endswith(HIGHER_IS_BETTER):
+            change = -change
+        rows.append((metric, old, new, change, change > tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PD scoring benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run the benchmarks and write JSON results")
+    p_run.add_argument("--out", type=Path, required=True, help="Results JSON file")
+    p_run.add_argument("--models", nargs="*", help="Model files in MODEL_DIR (default: all of MODEL_BACKEND's kind)")
+    p_run.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES, help="Batch sizes (rows)")
+    p_run.add_argument("--single", type=int, default=2000, help="Single-record requests per measurement")
+    p_run.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    p_run.add_argument("--min-seconds", type=float, default=1.0, help="Minimum wall time per batch size")
+    p_run.add_argument("--concurrency", type=int, default=16, help="Concurrent HTTP callers")
+    p_run.add_argument("--http-batch-rows", type=int, default=5000, help="Rows per /predict_batch request")
+    p_run.add_argument("--skip-http", action="store_true", help="Do not launch the API")
+    p_run.add_argument("--baseline", type=Path, help="Also compare against this baseline")
+    p_run.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown")
+
+    p_cmp = sub.add_parser("compare", help="Flag regressions against a stored baseline")
+    p_cmp.add_argument("current", type=Path)
+    p_cmp.add_argument("baseline", type=Path)
+    p_cmp.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        current = run(args)
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(current, indent=2))
+        print(f"wrote {args.out}", file=sys.stderr)
+        if args.baseline is None:
+            return
+        baseline = json.loads(args.baseline.read_text())
+    else:
+        current = json.loads(args.current.read_text())
+        baseline = json.loads(args.baseline.read_text())
+
+    rows = compare(current, baseline, args.tolerance)
+    regressions = [r for r in rows if r[4]]
+    report = {
+        "tolerance": args.tolerance,
+        "baseline_commit": baseline.get("environment", {}).get("git_commit"),
+        "current_commit": current.get("environment", {}).get("git_commit"),
+        "metrics_compared": len(rows),
+        "regressions": [
+            {"metric": m, "baseline": old, "current": new, "worse_by": round(change, 4)}
+            for m, old, new, change, _ in regressions
+        ],
+    }
+    print(json.dumps(report, indent=2))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from schema import CATEGORY_LEVELS
+
+# =====================================================
+# Synthetic applicants (same fields and choices as the Streamlit forms)
+# =====================================================
+
+REGIONS = CATEGORY_LEVELS["Region"]
+EMPLOYMENT_STATUSES = CATEGORY_LEVELS["Employment_Status"]
+MARITAL_STATUSES = CATEGORY_LEVELS["Marital_Status"]
+EDUCATION_LEVELS = CATEGORY_LEVELS["Education_Level"]
+PROPERTY_TYPES = CATEGORY_LEVELS["Property_Ownership"]
+LOAN_PURPOSES = CATEGORY_LEVELS["Loan_Purpose"]
+APPROVAL_CHANNELS = CATEGORY_LEVELS["Approval_Channel"]
+CO_APPLICANT_OPTS = CATEGORY_LEVELS["Co_Applicant"]
+LOAN_TERMS = [36, 48, 60]
+
+
+def make_applicants(n: int, seed: int = 0, end_date: str = "2025-01-31") -> pd.DataFrame:
+    """
+    n raw applications within the Streamlit form ranges, reproducible per seed.
+    Application dates fall in the two years up to end_date.
+    """
+    rng = np.random.default_rng(seed)
+    income = np.round(rng.lognormal(np.log(80_000), 0.5, n), -2)
+
+    return pd.DataFrame({
+        "Customer_ID": np.arange(1, n + 1),
+        "Age": rng.integers(21, 71, n),
+        "Income": income,
+        "Annual_Expenses": np.round(income * rng.uniform(0.2, 0.9, n), -2),
+        "Loan_Amount": rng.integers(2, 81, n) * 500.0,
+        "Loan_Term_Months": rng.choice(LOAN_TERMS, n),
+        "Credit_Score": rng.integers(660, 851, n),
+        "Employment_Status": rng.choice(EMPLOYMENT_STATUSES, n),
+        "Marital_Status": rng.choice(MARITAL_STATUSES, n),
+        "Education_Level": rng.choice(EDUCATION_LEVELS, n),
+        "Property_Ownership": rng.choice(PROPERTY_TYPES, n),
+        "Loan_Purpose": rng.choice(LOAN_PURPOSES, n),
+        "Co_Applicant": rng.choice(CO_APPLICANT_OPTS, n),
+        "Approval_Channel": rng.choice(APPROVAL_CHANNELS, n),
+        "Region": rng.choice(REGIONS, n),
+        "Application_Date": (
+            pd.Timestamp(end_date) - pd.to_timedelta(rng.integers(0, 730, n), unit="D")
+        ).strftime("%Y-%m-%d"),
+        "Past_Defaults": rng.choice([0, 0, 0, 0, 1, 1, 2, 3], n),
+    })
+
+
+def make_records(n: int, seed: int = 0) -> list:
+    """
+    Same applicants as JSON-ready dicts (plain Python scalars), as the UI posts them.
+    """
+    return [
+        {k: (v.item() if hasattr(v, "item") else v) for k, v in row.items()}
+        for row in make_applicants(n, seed).to_dict("records")
+    ]
@@ -1,9 +1,21 @@
 import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
-import numpy as np
 from datetime import date
-import requests
+
+# Shared feature and I/O modules live in ../app (copied alongside in Docker images)
+ENGINE_DIR = Path(__file__).resolve().parent.parent / "app"
+if ENGINE_DIR.is_dir():
+    sys.path.insert(0, str(ENGINE_DIR))
+
+from columnar import FORMAT_SUFFIX, MEDIA_TYPES, SUFFIXES, format_for_path, iter_frames  # noqa: E402
+from schema import CATEGORY_LEVELS  # noqa: E402
+from scoring_client import ScoringClient  # noqa: E402
 
 # ✅ set_page_config MUST be the first Streamlit command
 st.set_page_config(
@@ -18,49 +30,111 @@ st.set_page_config(
 # Read API URL from environment (Docker), fallback to local for dev
 API_URL = os.getenv("API_URL", "http://127.0.0.1:8000/predict")
 
+# Batch files are submitted to /jobs next to /predict and scored in the background
+API_JOBS_URL = os.getenv("API_JOBS_URL", API_URL.rsplit("/", 1)[0] + "/jobs")
+
+# Seconds between job status polls
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+
+# Connections kept open per API host by the shared client
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "4"))
+
+# Download formats offered for scored output
+OUTPUT_FORMATS = {"CSV": "csv", "Parquet": "parquet", "Arrow IPC": "arrow"}
+
 # Optional: show which API URL is being used (helps debug)
 st.sidebar.write("API URL:", API_URL)
 
 
 # =====================================================
-# 2. Helper: Affordability score (same logic as before)
+# 2. Helpers: API client
 # =====================================================
 
-def compute_affordability_score(income: float, loan_amount: float, term_months: float) -> float:
+@st.cache_resource
+def get_scoring_client() -> ScoringClient:
     """
-    Reproduce the affordability score logic from the original feature engineering.
+    One pooled client per Streamlit server process (reused across reruns).
     """
-    r = 0.12 / 12
-    P = loan_amount
-    n = term_months
+    return ScoringClient(API_URL, pool_size=API_POOL_SIZE, jobs_url=API_JOBS_URL)
+
 
-    if n <= 0 or P <= 0 or income <= 0:
-        return 0.0
+def call_pd_api(payload: dict) -> dict:
+    """
+    Call the FastAPI PD prediction endpoint (with reasons when declined).
+    """
+    return get_scoring_client().predict(payload, params={"explain": "true"})
 
-    monthly_installment = P * (r * (1 + r) ** n) / ((1 + r) ** n - 1)
-    monthly_income = income / 12
 
-    if monthly_income <= 0:
-        return 0.0
+def new_output_path(suffix: str = ".csv") -> str:
+    """
+    Temp file for this session's scored output (replaces the previous one).
+    """
+    old_path = st.session_state.pop("scored_path", None)
+    if old_path and os.path.exists(old_path):
+        os.remove(old_path)
 
-    burden = monthly_installment / monthly_income
-    aff_raw = 1 - burden
-    aff_score = np.clip(aff_raw, 0, 1) * 100
-    return float(round(aff_score, 0))
+    fd, path = tempfile.mkstemp(prefix="scored_", suffix=suffix)
+    os.close(fd)
+    st.session_state["scored_path"] = path
+    return path
 
 
-def call_pd_api(payload: dict) -> dict:
+def follow_job(job_id: str):
     """
-    Call the FastAPI PD prediction endpoint.
+    Poll a background scoring job until it finishes, then offer its result.
+    The job id is kept in the page URL, so a reload (or a bookmark) picks
+    the job up again instead of losing it.
     """
-    try:
-        response = requests.post(API_URL, json=payload, timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"error": f"API error {response.status_code}: {response.text}"}
-    except Exception as e:
-        return {"error": str(e)}
+    client = get_scoring_client()
+    cancel_slot = st.empty()
+    if cancel_slot.button("Cancel job"):
+        client.cancel_job(job_id)
+    progress = st.progress(0.0, text="Queued")
+
+    while True:
+        job = client.job(job_id)
+        if "error" in job:
+            st.error(job["error"])
+            return
+        rows_done, rows_total = job["rows_done"], job["rows_total"]
+        done = rows_done / rows_total if rows_total else 0.0
+        total = f" of {rows_total}" if rows_total else ""
+        progress.progress(min(done, 1.0), text=f"{job['state'].capitalize()}: scored {rows_done}{total} rows")
+        if job["state"] not in ("queued", "running"):
+            break
+        time.sleep(JOB_POLL_SECONDS)
+    cancel_slot.empty()
+
+    if job["state"] == "failed":
+        st.error(f"Scoring job failed: {job['error']}")
+        return
+    if job["state"] == "cancelled":
+        st.warning("Scoring job cancelled.")
+        return
+
+    output_format = job["output_format"]
+    # Fetch the result once per job; reruns reuse the local copy
+    if st.session_state.get("scored_job") != job_id or not os.path.exists(st.session_state.get("scored_path", "")):
+        result = client.download_job_result(job_id, new_output_path(FORMAT_SUFFIX[output_format]))
+        if "error" in result:
+            st.error(result["error"])
+            return
+        st.session_state["scored_job"] = job_id
+    out_path = st.session_state["scored_path"]
+
+    st.success(f"Batch scoring completed ({job['model']}).")
+    st.write("Sample of scored records:")
+    st.dataframe(next(iter_frames(out_path, output_format, 5), None))
+
+    # Download button (streams the scored file from disk)
+    output_label = next(label for label, fmt in OUTPUT_FORMATS.items() if fmt == output_format)
+    with open(out_path, "rb") as f:
+        st.download_button(
+            label=f"Download scored file as {output_label}",
+            data=f,
+            file_name=f"scored_loan_applications_api{FORMAT_SUFFIX[output_format]}",
+            mime=MEDIA_TYPES[output_format],
+        )
 
 
 # =====================================================
@@ -75,26 +149,15 @@ mode = st.sidebar.radio(
     ["Single customer", "Batch scoring (CSV)"]
 )
 
-# Common reference lists
-regions = [
-    "Gauteng", "KwaZulu-Natal", "Western Cape", "Eastern Cape",
-    "Northern Cape", "Free State", "North West", "Limpopo", "Mpumalanga"
-]
-
-employment_statuses = [
-    "10+ years", "9 years", "8 years", "7 years", "6 years",
-    "5 years", "4 years", "3 years", "2 years", "1 year", "< 1 year"
-]
-
-marital_statuses = ["Single", "Married", "Divorced"]
-education_levels = ["High School", "Diploma", "Degree", "Masters"]
-property_types = ["OWN", "RENT", "MORTGAGE", "ANY", "OTHER", "NONE"]
-loan_purposes = [
-    "debt_consolidation", "credit_card", "home_improvement", "medical",
-    "small_business", "vacation", "major_purchase", "other"
-]
-approval_channels = ["Web", "Agent", "Branch", "Mobile App"]
-co_applicant_opts = ["No", "Yes"]
+# Common reference lists (the fixed category levels of the scoring schema)
+regions = CATEGORY_LEVELS["Region"]
+employment_statuses = CATEGORY_LEVELS["Employment_Status"]
+marital_statuses = CATEGORY_LEVELS["Marital_Status"]
+education_levels = CATEGORY_LEVELS["Education_Level"]
+property_types = CATEGORY_LEVELS["Property_Ownership"]
+loan_purposes = CATEGORY_LEVELS["Loan_Purpose"]
+approval_channels = CATEGORY_LEVELS["Approval_Channel"]
+co_applicant_opts = CATEGORY_LEVELS["Co_Applicant"]
 
 
 # -----------------------------------------------------
@@ -132,8 +195,6 @@ if mode == "Single customer":
         submitted = st.form_submit_button("Score Customer")
 
     if submitted:
-        # Compute affordability score on the frontend to send to API
-        affordability_score = compute_affordability_score(income, loan_amount, term)
         app_date_str = app_date.isoformat()
         app_month = app_date.strftime("%b")  # e.g. "Jan", "Feb"
 
@@ -159,7 +220,6 @@ if mode == "Single customer":
             "Income_Loan_Ratio": 0,       # recomputed in API
             "Monthly_Installment": 0,     # recomputed or not used
             "Loan_to_Income_Ratio": 0,    # recomputed in API
-            "Affordability_Score": affordability_score,
             "App_Month": app_month
         }
 
@@ -185,17 +245,23 @@ if mode == "Single customer":
             if pred_val is not None:
                 st.write(f"**Predicted Class:** {int(pred_val)} (1 = Default, 0 = Non-Default)")
 
+            reasons = result.get("Reasons")
+            if reasons:
+                st.write("**Main reasons for the risk assessment:**")
+                for reason in reasons:
+                    st.write(f"- {reason['field']} = {reason['value']}")
+
             st.write("Payload sent to API:")
             st.json(payload)
 
 
 # -----------------------------------------------------
-# Mode 2: Batch scoring – CSV via API (row by row)
+# Mode 2: Batch scoring – file upload via API (chunked)
 # -----------------------------------------------------
 else:
-    st.subheader("Batch Scoring – CSV Upload")
+    st.subheader("Batch Scoring – File Upload")
 
-    st.write("Upload a CSV with raw application data. Expected columns include:")
+    st.write("Upload a CSV, Parquet or Arrow IPC file with raw application data. Expected columns include:")
     st.code(
         "Customer_ID, Age, Income, Annual_Expenses, Loan_Amount, Loan_Term_Months,\n"
         "Credit_Score, Employment_Status, Marital_Status, Education_Level,\n"
@@ -203,93 +269,34 @@ else:
         "Region, Application_Date, Past_Defaults"
     )
 
-    file = st.file_uploader("Upload CSV file", type=["csv"])
+    file = st.file_uploader("Upload file", type=[suffix.lstrip(".") for suffix in SUFFIXES])
+    output_label = st.selectbox("Output format", list(OUTPUT_FORMATS))
 
     if file is not None:
-        df_upload = pd.read_csv(file)
+        input_format = format_for_path(file.name)
+        df_preview = next(iter_frames(file, input_format, 5))
+        file.seek(0)
         st.write("Preview of uploaded data:")
-        st.dataframe(df_upload.head())
-
-        if st.button("Run Scoring via API"):
-            results = []
-            for idx, row in df_upload.iterrows():
-                try:
-                    # Compute affordability for this row
-                    income = float(row.get("Income", 0) or 0)
-                    loan_amount = float(row.get("Loan_Amount", 0) or 0)
-                    term = float(row.get("Loan_Term_Months", 0) or 0)
-                    affordability_score = compute_affordability_score(income, loan_amount, term)
-
-                    # Application date handling
-                    app_date_val = pd.to_datetime(row.get("Application_Date"), errors="coerce")
-                    if pd.isna(app_date_val):
-                        app_date_str = date.today().isoformat()
-                        app_month = date.today().strftime("%b")
-                    else:
-                        app_date_str = app_date_val.date().isoformat()
-                        app_month = app_date_val.strftime("%b")
-
-                    payload = {
-                        "Customer_ID": int(row.get("Customer_ID", 0)),
-                        "Age": float(row.get("Age", 0) or 0),
-                        "Income": income,
-                        "Annual_Expenses": float(row.get("Annual_Expenses", 0) or 0),
-                        "Loan_Amount": loan_amount,
-                        "Loan_Term_Months": term,
-                        "Credit_Score": float(row.get("Credit_Score", 0) or 0),
-                        "Employment_Status": str(row.get("Employment_Status", "")),
-                        "Marital_Status": str(row.get("Marital_Status", "")),
-                        "Education_Level": str(row.get("Education_Level", "")),
-                        "Property_Ownership": str(row.get("Property_Ownership", "")),
-                        "Loan_Purpose": str(row.get("Loan_Purpose", "")),
-                        "Co_Applicant": str(row.get("Co_Applicant", "")),
-                        "Approval_Channel": str(row.get("Approval_Channel", "")),
-                        "Region": str(row.get("Region", "")),
-                        "Application_Date": app_date_str,
-                        "Past_Defaults": float(row.get("Past_Defaults", 0) or 0),
-                        "DTI": 0,
-                        "Income_Loan_Ratio": 0,
-                        "Monthly_Installment": 0,
-                        "Loan_to_Income_Ratio": 0,
-                        "Affordability_Score": affordability_score,
-                        "App_Month": app_month
-                    }
-
-                    result = call_pd_api(payload)
-
-                    if "error" in result:
-                        results.append({
-                            **row.to_dict(),
-                            "PD_Default": None,
-                            "Default_Pred": None,
-                            "Risk_Band": f"API error: {result['error']}"
-                        })
-                    else:
-                        results.append({
-                            **row.to_dict(),
-                            "PD_Default": result.get("Predicted_PD", None),
-                            "Default_Pred": result.get("Predicted_Class", None),
-                            "Risk_Band": result.get("Risk_Band", None)
-                        })
-
-                except Exception as e:
-                    results.append({
-                        **row.to_dict(),
-                        "PD_Default": None,
-                        "Default_Pred": None,
-                        "Risk_Band": f"Exception: {e}"
-                    })
-
-            scored_batch = pd.DataFrame(results)
-            st.success("Batch scoring via API completed.")
-            st.write("Sample of scored records:")
-            st.dataframe(scored_batch.head())
-
-            # Download button
-            csv_out = scored_batch.to_csv(index=False).encode("utf-8")
-            st.download_button(
-                label="Download scored file as CSV",
-                data=csv_out,
-                file_name="scored_loan_applications_api.csv",
-                mime="text/csv",
-            )
\ No newline at end of file
+        st.dataframe(df_preview)
+
+        if st.button("Submit scoring job"):
+            # The whole file goes to the API's job queue in one upload and is
+            # scored there in the background with one reference date
+            params = {
+                "reference_date": date.today().isoformat(),
+                "output_format": OUTPUT_FORMATS[output_label],
+            }
+            job = get_scoring_client().submit_job(file, input_format, params)
+            if "error" in job:
+                st.error("Error from API")
+                st.write(job["error"])
+            else:
+                st.query_params["job"] = job["job_id"]
+
+    job_id = st.query_params.get("job")
+    if job_id:
+        st.write(f"Scoring job `{job_id}`")
+        follow_job(job_id)
+        if st.button("Start a new job"):
+            del st.query_params["job"]
+            st.rerun()
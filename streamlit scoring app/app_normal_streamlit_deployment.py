@@ -1,9 +1,25 @@
+import os
+import sys
+import time
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import joblib
 from datetime import date
 
+# Shared scoring engine lives in ../app (copied alongside in Docker images)
+ENGINE_DIR = Path(__file__).resolve().parent.parent / "app"
+if ENGINE_DIR.is_dir():
+    sys.path.insert(0, str(ENGINE_DIR))
+
+from columnar import FORMAT_SUFFIX, MEDIA_TYPES, SUFFIXES, format_for_path, iter_frames  # noqa: E402
+from jobs import JobQueue  # noqa: E402
+from pd_cache import MemoryBackend, PDCache  # noqa: E402
+from schema import CATEGORY_LEVELS  # noqa: E402
+from scoring import MODEL_DIR, MODEL_FILE  # noqa: E402
+from scoring import load_model as load_pipeline  # noqa: E402
+from scoring import score_new_applications as score_with_pipeline  # noqa: E402
+
 # ✅ set_page_config MUST be the first Streamlit command
 st.set_page_config(
     page_title="Loan Default Risk Management System",
@@ -16,180 +32,97 @@ st.set_page_config(
 
 @st.cache_resource
 def load_model():
-    model_path = "xgboost_model_01.pkl"  # make sure this file is in the same folder
-    pipe = joblib.load(model_path)
-    return pipe
+    return load_pipeline()
 
 xgb_final_pipe = load_model()
 
+
+@st.cache_resource
+def get_pd_cache():
+    # Streamlit reruns the script on every widget change; repeat quotes
+    # for an unchanged applicant are served from here
+    return PDCache(MemoryBackend(max_entries=10_000)).for_model(MODEL_FILE)
+
 # =====================================================
-# 2. Feature engineering (must match training notebook)
+# 2. Scoring helper (shared with the FastAPI service)
 # =====================================================
 
-def engineer_features_for_scoring(df_raw: pd.DataFrame) -> pd.DataFrame:
+def score_new_applications(df_new: pd.DataFrame) -> pd.DataFrame:
     """
-    Apply the SAME feature engineering used in training to new applications.
-    This must stay consistent with your training notebook.
+    Score raw applications with the cached pipeline.
+    Feature engineering and banding live in app/scoring.py.
     """
-    df = df_raw.copy()
-
-    # -----------------------------
-    # Core ratios and instalment
-    # -----------------------------
-    # DTI
-    df["DTI"] = np.where(
-        df["Income"] == 0,
-        0,
-        df["Annual_Expenses"] / df["Income"]
-    )
-
-    # Income / Loan
-    df["Income_Loan_Ratio"] = np.where(
-        df["Loan_Amount"] == 0,
-        0,
-        df["Income"] / df["Loan_Amount"]
-    )
-
-    # Loan / Income
-    df["Loan_to_Income_Ratio"] = np.where(
-        df["Income"] == 0,
-        0,
-        df["Loan_Amount"] / df["Income"]
-    )
+    return score_with_pipeline(df_new, xgb_final_pipe, cache=get_pd_cache())
 
-    # Monthly instalment (12% annual rate assumption)
-    r = 0.12 / 12
-    P = df["Loan_Amount"]
-    n = df["Loan_Term_Months"]
-    df["Monthly_Installment"] = (
-        P * (r * (1 + r) ** n) / ((1 + r) ** n - 1)
-    ).round()
-
-    # Affordability score
-    df["Monthly_Income"] = df["Income"] / 12
-    burden = np.where(
-        df["Monthly_Income"] == 0,
-        np.nan,
-        df["Monthly_Installment"] / df["Monthly_Income"]
-    )
-    aff_raw = 1 - burden
-    df["Affordability_Score"] = (np.clip(aff_raw, 0, 1) * 100).round()
-    df["Affordability_Score"] = df["Affordability_Score"].fillna(0)
-
-    df.drop(columns=["Monthly_Income"], inplace=True)
-
-    # -----------------------------
-    # Dates and vintage
-    # -----------------------------
-    df["Application_Date"] = pd.to_datetime(df["Application_Date"], errors="coerce")
-
-    max_date = df["Application_Date"].max()
-    df["App_Vintage"] = ((max_date - df["Application_Date"]).dt.days / 30).round().astype("Int64")
-
-    # -----------------------------
-    # Binned variables
-    # -----------------------------
-    df["Age_Band"] = pd.cut(
-        df["Age"],
-        bins=[20, 30, 40, 50, 60, 70],
-        labels=["21-30", "31-40", "41-50", "51-60", "61-70"],
-        include_lowest=True
-    )
-
-    df["Credit_Band"] = pd.cut(
-        df["Credit_Score"],
-        bins=[0, 680, 700, 720, 900],
-        labels=["Subprime", "Near-prime", "Prime", "Super-prime"],
-        include_lowest=True
-    )
 
-    tenure_map = {
-        "< 1 year": "0-1 yr",
-        "1 year": "1-3 yrs",
-        "2 years": "1-3 yrs",
-        "3 years": "3-5 yrs",
-        "4 years": "3-5 yrs",
-        "5 years": "5-7 yrs",
-        "6 years": "5-7 yrs",
-        "7 years": "7-10 yrs",
-        "8 years": "7-10 yrs",
-        "9 years": "7-10 yrs",
-        "10+ years": "10+ yrs",
-    }
-    df["Employment_Tenure_Band"] = df["Employment_Status"].map(tenure_map).fillna("Unknown")
-
-    # -----------------------------
-    # Flags
-    # -----------------------------
-    df["Has_Past_Defaults"] = (df["Past_Defaults"] > 0).astype(int)
-    df["High_DTI_Flag"] = (df["DTI"] > 0.6).astype(int)
-    df["Low_Affordability_Flag"] = (df["Affordability_Score"] < 85).astype(int)
-
-    # Ensure all engineered columns exist
-    engineered_cols = [
-        "DTI",
-        "Income_Loan_Ratio",
-        "Loan_to_Income_Ratio",
-        "Monthly_Installment",
-        "Affordability_Score",
-        "Age_Band",
-        "Credit_Band",
-        "Employment_Tenure_Band",
-        "Has_Past_Defaults",
-        "High_DTI_Flag",
-        "Low_Affordability_Flag",
-        "App_Vintage",
-    ]
-    for c in engineered_cols:
-        if c not in df.columns:
-            df[c] = np.nan
-
-    return df
+# Seconds between job status polls
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
 
+# Download formats offered for scored output
+OUTPUT_FORMATS = {"CSV": "csv", "Parquet": "parquet", "Arrow IPC": "arrow"}
 
-# =====================================================
-# 3. Scoring helper
-# =====================================================
 
-def add_risk_band(pd_series: pd.Series) -> pd.Series:
+@st.cache_resource
+def get_job_queue() -> JobQueue:
     """
-    Simple risk banding based on PD.
-    Adjust thresholds as needed.
+    Batch files are scored by background worker processes (jobs.py), so
+    single-customer quotes stay responsive while a large file runs and a
+    job outlives the browser session that submitted it.
     """
-    def band(p):
-        if p >= 0.40:
-            return "High Risk"
-        elif p >= 0.25:
-            return "Medium Risk"
-        else:
-            return "Low Risk"
-    return pd_series.apply(band)
+    return JobQueue().start()
 
 
-def score_new_applications(df_new: pd.DataFrame) -> pd.DataFrame:
+def follow_job(job_id: str):
     """
-    Takes raw applications, applies feature engineering,
-    scores with the final XGBoost pipeline, and adds risk bands.
+    Poll a background scoring job until it finishes, then offer its result.
+    The job id is kept in the page URL, so a reload picks the job up again.
     """
-    df_fe = engineer_features_for_scoring(df_new)
-
-    # Drop columns that were not used for training (target / leakage)
-    drop_cols = ["Defaulted", "Approval_Status"]
-    df_fe = df_fe.drop(columns=[c for c in drop_cols if c in df_fe.columns])
-
-    proba = xgb_final_pipe.predict_proba(df_fe)[:, 1]
-    pred = xgb_final_pipe.predict(df_fe)
-
-    out = df_new.copy()
-    out["PD_Default"] = proba
-    out["Default_Pred"] = pred
-    out["Risk_Band"] = add_risk_band(out["PD_Default"])
-
-    return out
+    queue = get_job_queue()
+    cancel_slot = st.empty()
+    if cancel_slot.button("Cancel job"):
+        queue.cancel(job_id)
+    progress = st.progress(0.0, text="Queued")
+
+    while True:
+        job = queue.status(job_id)
+        if job is None:
+            st.error(f"Unknown job: {job_id}")
+            return
+        rows_done, rows_total = job["rows_done"], job["rows_total"]
+        done = rows_done / rows_total if rows_total else 0.0
+        total = f" of {rows_total}" if rows_total else ""
+        progress.progress(min(done, 1.0), text=f"{job['state'].capitalize()}: scored {rows_done}{total} rows")
+        if job["state"] not in ("queued", "running"):
+            break
+        time.sleep(JOB_POLL_SECONDS)
+    cancel_slot.empty()
+
+    if job["state"] == "failed":
+        st.error(f"Scoring job failed: {job['error']}")
+        return
+    if job["state"] == "cancelled":
+        st.warning("Scoring job cancelled.")
+        return
+
+    output_format = job["output_format"]
+    out_path = queue.result(job_id)
+    st.success("Scoring completed.")
+    st.write("Sample of scored records:")
+    st.dataframe(next(iter_frames(out_path, output_format, 5), None))
+
+    # Download button (streams the scored file from disk)
+    output_label = next(label for label, fmt in OUTPUT_FORMATS.items() if fmt == output_format)
+    with open(out_path, "rb") as f:
+        st.download_button(
+            label=f"Download scored file as {output_label}",
+            data=f,
+            file_name=f"scored_loan_applications{FORMAT_SUFFIX[output_format]}",
+            mime=MEDIA_TYPES[output_format],
+        )
 
 
 # =====================================================
-# 4. Streamlit UI
+# 3. Streamlit UI
 # =====================================================
 
 
@@ -202,26 +135,15 @@ mode = st.sidebar.radio(
     ["Single customer", "Batch scoring (CSV)"]
 )
 
-# Common reference lists
-regions = [
-    "Gauteng", "KwaZulu-Natal", "Western Cape", "Eastern Cape",
-    "Northern Cape", "Free State", "North West", "Limpopo", "Mpumalanga"
-]
-
-employment_statuses = [
-    "10+ years", "9 years", "8 years", "7 years", "6 years",
-    "5 years", "4 years", "3 years", "2 years", "1 year", "< 1 year"
-]
-
-marital_statuses = ["Single", "Married", "Divorced"]
-education_levels = ["High School", "Diploma", "Degree", "Masters"]
-property_types = ["OWN", "RENT", "MORTGAGE", "ANY", "OTHER", "NONE"]
-loan_purposes = [
-    "debt_consolidation", "credit_card", "home_improvement", "medical",
-    "small_business", "vacation", "major_purchase", "other"
-]
-approval_channels = ["Web", "Agent", "Branch", "Mobile App"]
-co_applicant_opts = ["No", "Yes"]
+# Common reference lists (the fixed category levels of the scoring schema)
+regions = CATEGORY_LEVELS["Region"]
+employment_statuses = CATEGORY_LEVELS["Employment_Status"]
+marital_statuses = CATEGORY_LEVELS["Marital_Status"]
+education_levels = CATEGORY_LEVELS["Education_Level"]
+property_types = CATEGORY_LEVELS["Property_Ownership"]
+loan_purposes = CATEGORY_LEVELS["Loan_Purpose"]
+approval_channels = CATEGORY_LEVELS["Approval_Channel"]
+co_applicant_opts = CATEGORY_LEVELS["Co_Applicant"]
 
 # -----------------------------------------------------
 # Mode 1: Single customer scoring
@@ -299,9 +221,9 @@ if mode == "Single customer":
 # Mode 2: Batch scoring
 # -----------------------------------------------------
 else:
-    st.subheader("Batch Scoring – CSV Upload")
+    st.subheader("Batch Scoring – File Upload")
 
-    st.write("Upload a CSV with raw application data. Expected columns include:")
+    st.write("Upload a CSV, Parquet or Arrow IPC file with raw application data. Expected columns include:")
     st.code(
         "Customer_ID, Age, Income, Annual_Expenses, Loan_Amount, Loan_Term_Months,\n"
         "Credit_Score, Employment_Status, Marital_Status, Education_Level,\n"
@@ -309,24 +231,32 @@ else:
         "Region, Application_Date, Past_Defaults, Approval_Status (optional), Defaulted (optional)"
     )
 
-    file = st.file_uploader("Upload CSV file", type=["csv"])
+    file = st.file_uploader("Upload file", type=[suffix.lstrip(".") for suffix in SUFFIXES])
+    output_label = st.selectbox("Output format", list(OUTPUT_FORMATS))
 
     if file is not None:
-        df_upload = pd.read_csv(file)
+        input_format = format_for_path(file.name)
+        df_preview = next(iter_frames(file, input_format, 5))
+        file.seek(0)
         st.write("Preview of uploaded data:")
-        st.dataframe(df_upload.head())
-
-        if st.button("Run Scoring"):
-            scored_batch = score_new_applications(df_upload)
-            st.success("Scoring completed.")
-            st.write("Sample of scored records:")
-            st.dataframe(scored_batch.head())
-
-            # Download button
-            csv_out = scored_batch.to_csv(index=False).encode("utf-8")
-            st.download_button(
-                label="Download scored file as CSV",
-                data=csv_out,
-                file_name="scored_loan_applications.csv",
-                mime="text/csv",
-            )
\ No newline at end of file
+        st.dataframe(df_preview)
+
+        if st.button("Submit scoring job"):
+            try:
+                job = get_job_queue().submit(
+                    file, input_format, MODEL_FILE, MODEL_DIR / MODEL_FILE,
+                    reference_date=date.today(),
+                    output_format=OUTPUT_FORMATS[output_label],
+                )
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.query_params["job"] = job["job_id"]
+
+    job_id = st.query_params.get("job")
+    if job_id:
+        st.write(f"Scoring job `{job_id}`")
+        follow_job(job_id)
+        if st.button("Start a new job"):
+            del st.query_params["job"]
+            st.rerun()
@@ -0,0 +1,118 @@
+import shutil
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from columnar import MEDIA_TYPES
+
+# =====================================================
+# Pooled HTTP client for the PD scoring API
+# =====================================================
+
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class ScoringClient:
+    """
+    Keep-alive client for /predict and /jobs.
+
+    One requests.Session is shared across Streamlit sessions, so connections
+    are reused across calls and up to pool_size are kept open per host.
+    Connection errors, read timeouts and 5xx responses are retried with
+    exponential backoff (scoring is idempotent, so POST is retried too).
+    Job submission is the exception: a file upload goes through a second
+    pooled session without retries, since a retry could queue the same
+    file twice.
+    """
+
+    def __init__(
+        self,
+        predict_url: str,
+        pool_size: int = 4,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: tuple = (5, 120),
+        jobs_url: Optional[str] = None,
+    ):
+        self.predict_url = predict_url
+        self.jobs_url = jobs_url or predict_url.rsplit("/", 1)[0] + "/jobs"
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        self.session = self._session(retry)
+        self.upload_session = self._session(Retry(total=0, read=False, raise_on_status=False))
+
+    def _session(self, retry: Retry) -> requests.Session:
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _request(self, send, url: str, parse=None, **kwargs) -> dict:
+        try:
+            response = send(url, timeout=self.timeout, **kwargs)
+            if response.ok:
+                return parse(response) if parse is not None else response.json()
+            else:
+                return {"error": f"API error {response.status_code}: {response.text}"}
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _post(self, url: str, parse=None, **kwargs) -> dict:
+        return self._request(self.session.post, url, parse, **kwargs)
+
+    def _get(self, url: str, parse=None, **kwargs) -> dict:
+        return self._request(self.session.get, url, parse, **kwargs)
+
+    def predict(self, payload: dict, params: Optional[dict] = None) -> dict:
+        """
+        Score one application via /predict.
+        """
+        return self._post(self.predict_url, json=payload, params=params)
+
+    def close(self):
+        self.session.close()
+        self.upload_session.close()
+
+    def submit_job(self, file, input_format: str, params: Optional[dict] = None) -> dict:
+        """
+        Queue a whole CSV / Parquet / Arrow file (binary file object, read
+        from its current position) as a background job via POST /jobs.
+        Returns the job (job_id, state, rows_total, ...) or an error.
+        """
+        headers = {"Content-Type": MEDIA_TYPES[input_format]}
+        return self._request(self.upload_session.post, self.jobs_url, data=file, params=params, headers=headers)
+
+    def job(self, job_id: str) -> dict:
+        """
+        Current state and progress (rows_done / rows_total) of a job.
+        """
+        return self._get(f"{self.jobs_url}/{job_id}")
+
+    def cancel_job(self, job_id: str) -> dict:
+        return self._post(f"{self.jobs_url}/{job_id}/cancel")
+
+    def download_job_result(self, job_id: str, dst: str) -> dict:
+        """
+        Stream a finished job's scored file to the path dst.
+        """
+        def save(response):
+            response.raw.decode_content = True
+            with open(dst, "wb") as f:
+                shutil.copyfileobj(response.raw, f)
+            return {"path": dst}
+
+        return self._get(f"{self.jobs_url}/{job_id}/result", parse=save, stream=True)
@@ -0,0 +1,11 @@
+import sys
+from pathlib import Path
+
+# The service modules import each other flat (as in the Docker image),
+# and the benchmarks share the synthetic applicant generator
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT / "app", ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+REFERENCE_DATE = "2025-01-31"
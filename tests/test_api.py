@@ -0,0 +1,86 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import main
+from columnar import MEDIA_TYPES, to_bytes
+from conftest import REFERENCE_DATE
+from synthetic import make_applicants
+
+
+@pytest.fixture(autouse=True)
+def started(monkeypatch):
+    # The lifespan hook is not run here; it stamps the start time
+    monkeypatch.setitem(main.startup, "started_at", time.perf_counter())
+
+
+def batch_request(body: bytes, content_type: str) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request({
+        "type": "http", "method": "POST", "path": "/predict_batch", "query_string": b"",
+        "headers": [(b"content-type", content_type.encode())],
+    }, receive)
+
+
+def post_batch(body: bytes, content_type: str, explain: bool = False):
+    return asyncio.run(main.predict_batch(
+        batch_request(body, content_type), model=None, version=None, reference_date=REFERENCE_DATE,
+        batch_id=None, explain=explain,
+    ))
+
+
+def predict_batch(records: list, explain: bool = False):
+    return post_batch(json.dumps(records, default=str).encode(), MEDIA_TYPES["json"], explain)
+
+
+@pytest.mark.parametrize("explain", [False, True])
+def test_unscorable_batch_is_422(explain):
+    # A zero term gives an infinite installment, which the pipeline rejects
+    records = make_applicants(3, seed=1).assign(Loan_Term_Months=0).to_dict("records")
+    with pytest.raises(HTTPException) as raised:
+        predict_batch(records, explain)
+    assert raised.value.status_code == 422
+
+
+def test_batch_scores_in_input_order():
+    records = make_applicants(5, seed=1).to_dict("records")
+    body = json.loads(predict_batch(records).body)
+    assert body["n_rows"] == 5
+    assert body["Customer_ID"] == [r["Customer_ID"] for r in records]
+
+
+def test_empty_batch_is_empty_result():
+    assert json.loads(predict_batch([]).body) == {
+        "n_rows": 0, "Customer_ID": [], "Predicted_PD": [], "Predicted_Class": [], "Risk_Band": [],
+        "Model": main.registry.resolve()[0],
+    }
+
+
+@pytest.mark.parametrize("fmt", ["json", "parquet", "csv"])
+def test_non_numeric_field_is_422(fmt):
+    # Present but not a number: rejected, not scored as a missing value
+    df = make_applicants(12, seed=1).astype({"Income": str})
+    df.loc[[3, 7], "Income"] = "not a number"
+    body = json.dumps(df.to_dict("records"), default=str).encode() if fmt == "json" else to_bytes(df, fmt)
+    with pytest.raises(HTTPException) as raised:
+        post_batch(body, MEDIA_TYPES[fmt])
+    assert raised.value.status_code == 422
+    assert raised.value.detail == "Income: 2 value(s) are not numbers (rows 3, 7)"
+
+
+def test_missing_numeric_field_is_still_scored():
+    records = make_applicants(3, seed=1).to_dict("records")
+    records[1]["Income"] = None
+    records[2]["Income"] = ""
+    assert json.loads(predict_batch(records).body)["n_rows"] == 3
+
+
+def test_import_starts_no_job_queue():
+    # The queue (and its jobs/ directory) is made by the lifespan only
+    assert main.job_queue is None
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch_score
+from columnar import read_frame
+from conftest import REFERENCE_DATE
+from scoring import MODEL_FILE, load_model, load_model_config, score_new_applications
+from synthetic import make_applicants
+
+ROWS = 1000
+CHUNK_ROWS = 170
+
+
+@pytest.fixture(scope="module")
+def input_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp("input") / "applications.csv"
+    make_applicants(ROWS, seed=3).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(scope="module")
+def whole_file(input_csv) -> pd.DataFrame:
+    # One in-process call over the whole file: the result shards must match
+    df = read_frame(input_csv, "csv")
+    return score_new_applications(df, load_model(MODEL_FILE), load_model_config(MODEL_FILE), reference_date=REFERENCE_DATE)
+
+
+def _assert_same_scores(out_dir, expected: pd.DataFrame):
+    sharded = pd.read_parquet(out_dir).sort_values("Customer_ID").reset_index(drop=True)
+    assert len(sharded) == len(expected)
+    np.testing.assert_array_equal(sharded["Customer_ID"].to_numpy(), expected["Customer_ID"].to_numpy())
+    np.testing.assert_allclose(sharded["PD_Default"].to_numpy(), expected["PD_Default"].to_numpy(), rtol=0, atol=1e-7)
+    assert sharded["Default_Pred"].tolist() == expected["Default_Pred"].tolist()
+    assert sharded["Risk_Band"].tolist() == expected["Risk_Band"].tolist()
+
+
+def test_shards_match_whole_file(input_csv, whole_file, tmp_path):
+    summary = batch_score.run(
+        input_csv, tmp_path / "scored", workers=3, chunk_rows=CHUNK_ROWS, reference_date=REFERENCE_DATE
+    )
+    assert summary["rows_scored"] == ROWS
+    assert summary["shards_scored"] == -(-ROWS // CHUNK_ROWS)
+    assert summary["reference_date"] == REFERENCE_DATE
+    _assert_same_scores(tmp_path / "scored", whole_file)
+
+
+def test_resume_rescores_only_missing_shards(input_csv, whole_file, tmp_path):
+    out_dir = tmp_path / "scored"
+    batch_score.run(input_csv, out_dir, workers=2, chunk_rows=CHUNK_ROWS, reference_date=REFERENCE_DATE)
+    batch_score.shard_path(out_dir, 2).unlink()
+    batch_score.shard_path(out_dir, 4).unlink()
+
+    # No --reference-date on resume: the stored one is reused
+    summary = batch_score.run(input_csv, out_dir, workers=2, chunk_rows=CHUNK_ROWS, resume=True)
+    assert summary["shards_scored"] == 2
+    assert summary["shards_skipped"] == -(-ROWS // CHUNK_ROWS) - 2
+    assert summary["reference_date"] == REFERENCE_DATE
+    _assert_same_scores(out_dir, whole_file)
+
+
+def test_resume_refuses_changed_settings(input_csv, tmp_path):
+    out_dir = tmp_path / "scored"
+    batch_score.run(input_csv, out_dir, workers=1, chunk_rows=CHUNK_ROWS, reference_date=REFERENCE_DATE)
+    with pytest.raises(SystemExit):
+        batch_score.run(input_csv, out_dir, workers=1, chunk_rows=CHUNK_ROWS + 1, resume=True)
+    with pytest.raises(SystemExit):
+        batch_score.run(input_csv, out_dir, workers=1, chunk_rows=CHUNK_ROWS, reference_date=REFERENCE_DATE)
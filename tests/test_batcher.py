@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from batcher import MicroBatcher
+
+
+class Recorder:
+    """
+    score_many that doubles its items and remembers every batch it saw.
+    """
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, items: list) -> list:
+        self.batches.append(list(items))
+        if self.fail:
+            raise ValueError("model failed")
+        return [2 * x for x in items]
+
+
+def test_coalesces_up_to_max_batch():
+    score = Recorder()
+
+    async def run():
+        batcher = MicroBatcher(score, max_batch=4, max_wait_ms=50, max_concurrent=1)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        await batcher.close()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [2 * i for i in range(10)]
+    assert [len(b) for b in score.batches] == [4, 4, 2]
+    assert stats["requests"] == 10
+    assert stats["batches"] == 3
+
+
+def test_flushes_after_max_wait():
+    score = Recorder()
+
+    async def run():
+        batcher = MicroBatcher(score, max_batch=64, max_wait_ms=30)
+        start = time.perf_counter()
+        result = await batcher.submit(21)
+        elapsed = time.perf_counter() - start
+        await batcher.close()
+        return result, elapsed
+
+    result, elapsed = asyncio.run(run())
+    assert result == 42
+    assert score.batches == [[21]]
+    # A lone request waits out max_wait for company, then goes alone
+    assert 0.03 <= elapsed < 1.0
+
+
+def test_exception_reaches_every_caller():
+    score = Recorder(fail=True)
+
+    async def run():
+        batcher = MicroBatcher(score, max_batch=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        await batcher.close()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(run())
+    assert score.batches == [[0, 1, 2]]
+    assert all(isinstance(r, ValueError) for r in results)
+    assert stats["failed_batches"] == 1
+
+
+def test_cancelled_callers_are_skipped():
+    score = Recorder()
+
+    async def run():
+        batcher = MicroBatcher(score, max_batch=8, max_wait_ms=50)
+        tasks = [asyncio.create_task(batcher.submit(i)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        tasks[1].cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert score.batches == [[0, 2]]
+    assert results[0] == 0 and results[2] == 4
+    assert isinstance(results[1], asyncio.CancelledError)
+
+
+def test_close_drains_running_batches_and_fails_the_rest():
+    started, release = threading.Event(), threading.Event()
+
+    def score_many(items):
+        started.set()
+        release.wait(5)
+        return items
+
+    async def run():
+        batcher = MicroBatcher(score_many, max_batch=8, max_wait_ms=1, max_concurrent=1)
+        running = asyncio.create_task(batcher.submit("running"))
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        # Collected, but waiting for the one busy slot
+        waiting = asyncio.create_task(batcher.submit("waiting"))
+        await asyncio.sleep(0.05)
+        closing = asyncio.create_task(batcher.close())
+        await asyncio.sleep(0.01)
+        assert not closing.done()
+        release.set()
+        await closing
+        assert not batcher._flushes
+        return await running, await asyncio.gather(waiting, return_exceptions=True)
+
+    result, (waiting,) = asyncio.run(run())
+    assert result == "running"
+    assert isinstance(waiting, RuntimeError)
+
+
+def test_close_fails_queued_requests():
+    async def run():
+        batcher = MicroBatcher(Recorder(), max_batch=8, max_wait_ms=1000)
+        task = asyncio.create_task(batcher.submit(1))
+        await asyncio.sleep(0.01)
+        await batcher.close()
+        with pytest.raises(RuntimeError):
+            await task
+
+    asyncio.run(run())
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from compiled_scorer import CompiledScorer
+from conftest import REFERENCE_DATE
+from features import NUMERIC_FIELDS, engineer_features_for_scoring, engineer_features_record
+from scoring import MODEL_DIR, drop_leakage, load_model
+from synthetic import make_applicants
+
+PICKLES = sorted(p.name for p in MODEL_DIR.glob("*.pkl"))
+
+
+def awkward_applicants(n: int = 300) -> pd.DataFrame:
+    """
+    Synthetic applicants plus rows the encoder must treat exactly as the
+    pipeline does: unknown categories, missing dates, all-NaN numerics.
+    """
+    df = make_applicants(n, seed=11)
+    for col in NUMERIC_FIELDS:
+        df[col] = df[col].astype("float64")
+    df = df.astype({"Application_Date": object})
+    df.loc[0, ["Region", "Loan_Purpose", "Employment_Status"]] = ["Atlantis", "yacht", "retired"]
+    df.loc[1, "Application_Date"] = None
+    df.loc[2, "Application_Date"] = "never"
+    df.loc[3, NUMERIC_FIELDS] = np.nan
+    df.loc[4, NUMERIC_FIELDS + ["Application_Date"]] = np.nan
+    df.loc[5, "Credit_Score"] = 999.0
+    return df
+
+
+@pytest.fixture(scope="module")
+def applicants() -> pd.DataFrame:
+    return awkward_applicants()
+
+
+@pytest.fixture(scope="module", params=PICKLES)
+def pipe(request):
+    return load_model(request.param)
+
+
+def test_encoder_output_is_dense(pipe, applicants):
+    # CompiledScorer relies on zeros in its vector being real zeros
+    preprocessor = pipe.named_steps["preprocess"]
+    assert not getattr(preprocessor, "sparse_output_", False)
+    x = preprocessor.transform(drop_leakage(engineer_features_for_scoring(applicants, REFERENCE_DATE)))
+    assert not sparse.issparse(x)
+
+
+def test_encoding_matches_preprocessor(pipe, applicants):
+    scorer = CompiledScorer(pipe)
+    df_fe = drop_leakage(engineer_features_for_scoring(applicants, REFERENCE_DATE))
+    expected = np.asarray(pipe.named_steps["preprocess"].transform(df_fe), dtype="float64")
+
+    records_fe = [engineer_features_record(r, REFERENCE_DATE) for r in applicants.to_dict("records")]
+    np.testing.assert_allclose(scorer.encode_many(records_fe), expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(scorer.encode_frame(df_fe), expected, rtol=0, atol=1e-12)
+
+
+def test_predictions_match_pipeline(pipe, applicants):
+    scorer = CompiledScorer(pipe)
+    df_fe = drop_leakage(engineer_features_for_scoring(applicants, REFERENCE_DATE))
+    if not hasattr(pipe.named_steps["model"], "get_booster") and not hasattr(pipe.named_steps["model"], "booster_"):
+        # Linear models reject NaN inputs in sklearn too: compare complete rows
+        complete = np.isfinite(scorer.encode_frame(df_fe)).all(axis=1)
+        applicants, df_fe = applicants[complete], df_fe[complete]
+    expected = pipe.predict_proba(df_fe)[:, 1]
+
+    records = applicants.to_dict("records")
+    records_fe = [engineer_features_record(r, REFERENCE_DATE) for r in records]
+    batch = scorer.predict_proba_encoded(scorer.encode_many(records_fe))
+    single = np.array([scorer.predict_pd(r, REFERENCE_DATE) for r in records])
+
+    np.testing.assert_allclose(batch, expected, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(single, expected, rtol=0, atol=1e-6)
@@ -0,0 +1,138 @@
+import math
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import drift
+from conftest import REFERENCE_DATE
+from drift import SCORE_FEATURE, DriftMonitor, stability_index
+from features import engineer_features_for_scoring
+from registry import ModelRegistry
+from scoring import MODEL_DIR
+from synthetic import make_applicants
+
+BANDS = ["Low", "Medium", "High"]
+
+
+def hand_psi(actual: list, expected: list) -> float:
+    a = [max(x / sum(actual), drift._PSI_FLOOR) for x in actual]
+    e = [max(x / sum(expected), drift._PSI_FLOOR) for x in expected]
+    return sum((ai - ei) * math.log(ai / ei) for ai, ei in zip(a, e))
+
+
+@pytest.fixture(scope="module")
+def batch():
+    df_fe = engineer_features_for_scoring(make_applicants(400, seed=21), REFERENCE_DATE)
+    rng = np.random.default_rng(21)
+    return df_fe, rng.random(len(df_fe)), rng.choice(BANDS, len(df_fe))
+
+
+def test_psi_by_hand():
+    assert stability_index(np.array([30, 70]), np.array([50, 50])) == pytest.approx(
+        (0.3 - 0.5) * math.log(0.3 / 0.5) + (0.7 - 0.5) * math.log(0.7 / 0.5)
+    )
+    # An empty bin is floored rather than making the index infinite
+    floored = stability_index(np.array([0, 100]), np.array([50, 50]))
+    assert floored == pytest.approx(hand_psi([0, 100], [50, 50]))
+    assert math.isfinite(floored)
+    assert math.isnan(stability_index(np.array([0, 0]), np.array([50, 50])))
+
+
+def test_csi_against_baseline():
+    monitor = DriftMonitor(BANDS)
+    size = monitor.layout.histograms["Credit_Score"]["size"]
+    expected = [10] * size
+    actual = [0] * size
+    actual[1], actual[5], actual[-1] = 40, 50, 10
+    monitor.baseline = {"histograms": {"Credit_Score": expected}}
+
+    counts = np.zeros(monitor.layout.size, dtype=np.int64)
+    offset = monitor.layout.histograms["Credit_Score"]["offset"]
+    counts[offset:offset + size] = actual
+    report = monitor.compare(counts)
+    assert report["features"]["Credit_Score"]["index"] == round(hand_psi(actual, expected), 4)
+    assert report["features"]["Credit_Score"]["status"] == "shift"
+    assert report["features"]["DTI"]["status"] == "no baseline"
+
+
+def test_frame_and_records_count_the_same(batch):
+    df_fe, proba, band = batch
+    by_frame, by_records = DriftMonitor(BANDS), DriftMonitor(BANDS)
+    by_frame.observe_frame(df_fe, proba, band)
+    by_records.observe_records(df_fe.to_dict("records"), proba, band)
+
+    np.testing.assert_array_equal(by_frame.total, by_records.total)
+    assert by_frame.histogram(by_frame.total, SCORE_FEATURE).sum() == len(df_fe)
+    banded = sum(by_frame.histogram(by_frame.total, f"{SCORE_FEATURE}|{b}").sum() for b in BANDS)
+    assert banded == len(df_fe)
+
+
+def test_merged_states_equal_one_monitor(batch):
+    df_fe, proba, band = batch
+    half = len(df_fe) // 2
+    first, second, both = (DriftMonitor(BANDS, window_seconds=10, windows=4) for _ in range(3))
+    counts_a = first.counts({n: df_fe[n].iloc[:half] for n in df_fe}, proba[:half], band[:half])
+    counts_b = first.counts({n: df_fe[n].iloc[half:] for n in df_fe}, proba[half:], band[half:])
+    first.add(counts_a, half, now=5)
+    second.add(counts_b, len(df_fe) - half, now=15)
+    both.add(counts_a, half, now=5)
+    both.add(counts_b, len(df_fe) - half, now=15)
+
+    merged = DriftMonitor(BANDS, window_seconds=10, windows=4)
+    merged.merge(first.state())
+    merged.merge(second.state())
+    assert merged.state() == both.state()
+
+    with pytest.raises(ValueError):
+        DriftMonitor(BANDS, window_seconds=60, windows=4).merge(first.state())
+
+
+def test_windows_roll_over():
+    monitor = DriftMonitor(BANDS, window_seconds=10, windows=3)
+    ones = np.ones(monitor.layout.size, dtype=np.int64)
+    for window in range(4):
+        monitor.add(ones * (window + 1), 1, now=window * 10 + 5)
+
+    # Window 0 was overwritten by window 3; the running total keeps it
+    assert monitor.window_counts(now=35)[0] == 2 + 3 + 4
+    assert monitor.window_counts(windows=1, now=35)[0] == 4
+    assert monitor.window_counts(now=65)[0] == 0
+    assert monitor.total[0] == 1 + 2 + 3 + 4
+    assert monitor.rows == 4
+
+    # A window older than the ring is dropped on merge
+    old = DriftMonitor(BANDS, window_seconds=10, windows=3)
+    old.add(ones, 1, now=5)
+    monitor.merge(old.state())
+    assert monitor.window_counts(now=35)[0] == 2 + 3 + 4
+
+
+def test_registry_keeps_drift_across_eviction_and_refresh(tmp_path, batch):
+    df_fe, proba, band = batch
+    for name in ("xgboost_model_01", "lightgbm_model_01"):
+        for suffix in (".pkl", ".json"):
+            shutil.copy(MODEL_DIR / f"{name}{suffix}", tmp_path / f"{name}{suffix}")
+    registry = ModelRegistry(tmp_path, "xgboost_model", max_loaded=1)
+
+    first = registry.get()
+    first.drift.observe_frame(df_fe, proba, band)
+    registry.get("lightgbm_model")
+    reloaded = registry.get()
+    assert reloaded is not first
+    assert reloaded.drift.rows == len(df_fe)
+
+    # An overwritten file is reloaded on refresh with the same monitor
+    artefact = tmp_path / "xgboost_model_01.pkl"
+    shutil.copy(MODEL_DIR / "xgboost_model_01.pkl", artefact)
+    stamp = artefact.stat().st_mtime + 10
+    os.utime(artefact, (stamp, stamp))
+    registry.refresh()
+    assert registry.get() is not reloaded
+    assert registry.get().drift.rows == len(df_fe)
+
+    # A version that is gone takes its monitor with it
+    artefact.unlink()
+    registry.refresh()
+    assert "xgboost_model:01" not in registry._drift
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compiled_scorer import CompiledScorer
+from conftest import REFERENCE_DATE
+from explain import Explainer
+from features import engineer_features_for_scoring
+from scoring import MODEL_DIR, drop_leakage, load_model, read_model_config, score_new_applications
+from synthetic import make_applicants
+from test_compiled_scorer import PICKLES
+
+
+@pytest.fixture(scope="module")
+def applicants() -> pd.DataFrame:
+    return make_applicants(300, seed=4)
+
+
+@pytest.fixture(scope="module", params=PICKLES)
+def model(request):
+    pipe = load_model(request.param)
+    return pipe, read_model_config(MODEL_DIR / request.param), Explainer(CompiledScorer(pipe))
+
+
+def test_contributions_add_up_to_log_odds(model, applicants):
+    pipe, _, explainer = model
+    df_fe = drop_leakage(engineer_features_for_scoring(applicants, REFERENCE_DATE))
+    x = explainer.scorer.encode_frame(df_fe)
+
+    proba = pipe.predict_proba(df_fe)[:, 1]
+    bias = explainer.scorer.predict_contribs(x)[:, -1]
+    total = explainer.field_contributions(x).sum(axis=1) + bias
+    # TreeSHAP runs in float32 inside the boosters
+    np.testing.assert_allclose(total, np.log(proba / (1 - proba)), rtol=0, atol=1e-4)
+
+
+def test_batch_reasons_match_record_reasons(model, applicants):
+    pipe, config, explainer = model
+    min_pd = float(np.quantile(
+        score_new_applications(applicants, pipe, config, reference_date=REFERENCE_DATE)["PD_Default"], 0.7
+    ))
+    scored = score_new_applications(
+        applicants, pipe, config, reference_date=REFERENCE_DATE, explainer=explainer, explain_min_pd=min_pd
+    )
+
+    explained = scored["PD_Default"] > min_pd
+    assert explained.sum() > 0
+    assert scored.loc[~explained, "Reasons"].isna().all()
+    records = applicants.to_dict("records")
+    for i in np.flatnonzero(explained):
+        reasons = scored.at[i, "Reasons"]
+        assert reasons == explainer.explain_record(records[i], REFERENCE_DATE)
+        assert all(r["contribution"] > 0 for r in reasons)
+
+    # Explaining the same rows again is served from the cache
+    misses = explainer.stats()["misses"]
+    score_new_applications(applicants, pipe, config, reference_date=REFERENCE_DATE, explainer=explainer, explain_min_pd=min_pd)
+    assert explainer.stats()["misses"] == misses
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import REFERENCE_DATE
+from features import engineer_features_for_scoring, engineer_features_record
+from synthetic import make_applicants
+
+ENGINEERED = [
+    "DTI", "Income_Loan_Ratio", "Loan_to_Income_Ratio", "Monthly_Installment",
+    "Affordability_Score", "App_Vintage", "Age_Band", "Credit_Band",
+    "Employment_Tenure_Band", "Has_Past_Defaults", "High_DTI_Flag", "Low_Affordability_Flag",
+]
+
+
+def baseline_features(df_raw: pd.DataFrame, reference_date) -> pd.DataFrame:
+    """
+    The original pandas implementation from the Streamlit app, with the
+    one intended change: App_Vintage counts back from reference_date
+    instead of the batch's latest application.
+    """
+    df = df_raw.copy()
+    df["DTI"] = np.where(df["Income"] == 0, 0, df["Annual_Expenses"] / df["Income"])
+    df["Income_Loan_Ratio"] = np.where(df["Loan_Amount"] == 0, 0, df["Income"] / df["Loan_Amount"])
+    df["Loan_to_Income_Ratio"] = np.where(df["Income"] == 0, 0, df["Loan_Amount"] / df["Income"])
+
+    r = 0.12 / 12
+    P = df["Loan_Amount"]
+    n = df["Loan_Term_Months"]
+    df["Monthly_Installment"] = (P * (r * (1 + r) ** n) / ((1 + r) ** n - 1)).round()
+
+    df["Monthly_Income"] = df["Income"] / 12
+    burden = np.where(df["Monthly_Income"] == 0, np.nan, df["Monthly_Installment"] / df["Monthly_Income"])
+    df["Affordability_Score"] = (np.clip(1 - burden, 0, 1) * 100).round()
+    df["Affordability_Score"] = df["Affordability_Score"].fillna(0)
+    df.drop(columns=["Monthly_Income"], inplace=True)
+
+    df["Application_Date"] = pd.to_datetime(df["Application_Date"], errors="coerce")
+    days = (pd.Timestamp(reference_date) - df["Application_Date"]).dt.days
+    df["App_Vintage"] = (days / 30).round().clip(lower=0).astype("Int64")
+
+    df["Age_Band"] = pd.cut(
+        df["Age"], bins=[20, 30, 40, 50, 60, 70],
+        labels=["21-30", "31-40", "41-50", "51-60", "61-70"], include_lowest=True,
+    )
+    df["Credit_Band"] = pd.cut(
+        df["Credit_Score"], bins=[0, 680, 700, 720, 900],
+        labels=["Subprime", "Near-prime", "Prime", "Super-prime"], include_lowest=True,
+    )
+    tenure_map = {
+        "< 1 year": "0-1 yr", "1 year": "1-3 yrs", "2 years": "1-3 yrs", "3 years": "3-5 yrs",
+        "4 years": "3-5 yrs", "5 years": "5-7 yrs", "6 years": "5-7 yrs", "7 years": "7-10 yrs",
+        "8 years": "7-10 yrs", "9 years": "7-10 yrs", "10+ years": "10+ yrs",
+    }
+    df["Employment_Tenure_Band"] = df["Employment_Status"].map(tenure_map).fillna("Unknown")
+    df["Has_Past_Defaults"] = (df["Past_Defaults"] > 0).astype(int)
+    df["High_DTI_Flag"] = (df["DTI"] > 0.6).astype(int)
+    df["Low_Affordability_Flag"] = (df["Affordability_Score"] < 85).astype(int)
+    return df
+
+
+@pytest.fixture(scope="module")
+def applicants() -> pd.DataFrame:
+    df = make_applicants(400, seed=7)
+    df["Income"] = df["Income"].astype("float64")
+    df["Loan_Term_Months"] = df["Loan_Term_Months"].astype("float64")
+    df["Age"] = df["Age"].astype("float64")
+    df["Credit_Score"] = df["Credit_Score"].astype("float64")
+    df["Past_Defaults"] = df["Past_Defaults"].astype("float64")
+    df["Application_Date"] = df["Application_Date"].astype(object)
+
+    edge = {
+        0: {"Income": 0.0},
+        1: {"Loan_Amount": 0.0},
+        2: {"Loan_Term_Months": 0.0},
+        3: {"Income": 0.0, "Loan_Amount": 0.0, "Loan_Term_Months": 0.0},
+        4: {"Age": 18.0},
+        5: {"Age": 20.0},
+        6: {"Age": 75.0},
+        7: {"Credit_Score": 950.0},
+        8: {"Credit_Score": 0.0},
+        9: {"Credit_Score": -5.0},
+        10: {"Application_Date": "not a date"},
+        11: {"Application_Date": "2025-02-30"},
+        12: {"Application_Date": None},
+        13: {"Application_Date": "2026-06-01"},
+        14: {"Income": np.nan},
+        15: {"Loan_Amount": np.nan},
+        16: {"Loan_Term_Months": np.nan},
+        17: {"Age": np.nan, "Credit_Score": np.nan, "Past_Defaults": np.nan},
+        18: {"Annual_Expenses": np.nan},
+        19: {"Employment_Status": "unemployed"},
+        20: {"Employment_Status": None},
+    }
+    for i, values in edge.items():
+        for col, value in values.items():
+            df.at[i, col] = value
+    return df
+
+
+def _as_float(values) -> np.ndarray:
+    return pd.Series(values).astype("float64").to_numpy()
+
+
+def _as_labels(values) -> list:
+    return [None if pd.isna(v) else str(v) for v in values]
+
+
+def test_batch_matches_baseline(applicants):
+    expected = baseline_features(applicants, REFERENCE_DATE)
+    actual = engineer_features_for_scoring(applicants, REFERENCE_DATE)
+
+    for col in ["DTI", "Income_Loan_Ratio", "Loan_to_Income_Ratio", "Monthly_Installment", "Affordability_Score"]:
+        np.testing.assert_array_equal(_as_float(actual[col]), _as_float(expected[col]), err_msg=col)
+    for col in ["Has_Past_Defaults", "High_DTI_Flag", "Low_Affordability_Flag"]:
+        np.testing.assert_array_equal(actual[col].to_numpy(), expected[col].to_numpy(), err_msg=col)
+    for col in ["Age_Band", "Credit_Band", "Employment_Tenure_Band"]:
+        assert _as_labels(actual[col]) == _as_labels(expected[col]), col
+    assert actual["App_Vintage"].isna().tolist() == expected["App_Vintage"].isna().tolist()
+    assert actual["App_Vintage"].dropna().tolist() == expected["App_Vintage"].dropna().tolist()
+    assert pd.Series(actual["Application_Date"]).equals(expected["Application_Date"])
+
+
+def test_record_matches_baseline(applicants):
+    expected = baseline_features(applicants, REFERENCE_DATE)
+
+    for i, record in enumerate(applicants.to_dict("records")):
+        actual = engineer_features_record(record, REFERENCE_DATE)
+        row = expected.iloc[i]
+        for col in ["DTI", "Income_Loan_Ratio", "Loan_to_Income_Ratio", "Monthly_Installment", "Affordability_Score"]:
+            np.testing.assert_equal(float(actual[col]), float(row[col]), err_msg=f"row {i} {col}")
+        for col in ["Has_Past_Defaults", "High_DTI_Flag", "Low_Affordability_Flag"]:
+            assert actual[col] == row[col], (i, col)
+        for col in ["Age_Band", "Credit_Band", "Employment_Tenure_Band"]:
+            assert _as_labels([actual[col]]) == _as_labels([row[col]]), (i, col)
+        if pd.isna(row["App_Vintage"]):
+            assert actual["App_Vintage"] is None, i
+        else:
+            assert actual["App_Vintage"] == row["App_Vintage"], i
+
+
+def test_batch_is_row_independent(applicants):
+    whole = engineer_features_for_scoring(applicants, REFERENCE_DATE)
+    parts = pd.concat([
+        engineer_features_for_scoring(applicants.iloc[i:i + 37], REFERENCE_DATE)
+        for i in range(0, len(applicants), 37)
+    ])
+    for col in ENGINEERED:
+        assert _as_labels(whole[col]) == _as_labels(parts[col]), col
@@ -0,0 +1,115 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from columnar import read_frame
+from conftest import REFERENCE_DATE
+from jobs import JobQueue, JobStore, count_csv_rows
+from scoring import MODEL_DIR, load_model, read_model_config, score_new_applications
+from synthetic import make_applicants
+
+MODEL_FILE = "xgboost_model_01.pkl"
+
+
+def wait_for(queue: JobQueue, job_id: str, timeout: float = 120.0) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.status(job_id)
+        if job["state"] not in ("queued", "running"):
+            return job
+        time.sleep(0.2)
+    raise AssertionError(f"job {job_id} still {job['state']} after {timeout}s")
+
+
+@pytest.fixture(scope="module")
+def applicants_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp("input") / "applicants.csv"
+    make_applicants(700, seed=5).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture(scope="module")
+def queue(tmp_path_factory):
+    queue = JobQueue(root=tmp_path_factory.mktemp("jobs"), workers=1, chunk_rows=200, threads=1, nice=0)
+    queue.start(supervise_seconds=0.2)
+    yield queue
+    queue.stop()
+
+
+def submit(queue: JobQueue, path, model_path=MODEL_DIR / MODEL_FILE) -> dict:
+    with open(path, "rb") as f:
+        return queue.submit(f, "csv", MODEL_FILE, model_path, reference_date=REFERENCE_DATE)
+
+
+def test_count_csv_rows(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("a,b\n1,2\n3,4")
+    assert count_csv_rows(path) == 2
+    path.write_text("a,b\n1,2\n3,4\n")
+    assert count_csv_rows(path) == 2
+    assert count_csv_rows(path, block_size=3) == 2
+
+
+def test_job_matches_direct_scoring(queue, applicants_csv):
+    job = submit(queue, applicants_csv)
+    assert job["rows_total"] == 700
+
+    job = wait_for(queue, job["job_id"])
+    assert job["state"] == "done", job["error"]
+    assert job["rows_done"] == job["rows_total"] == 700
+
+    scored = read_frame(queue.result(job["job_id"]), "parquet")
+    expected = score_new_applications(
+        pd.read_csv(applicants_csv), load_model(MODEL_FILE), read_model_config(MODEL_DIR / MODEL_FILE),
+        reference_date=REFERENCE_DATE,
+    )
+    np.testing.assert_allclose(scored["PD_Default"], expected["PD_Default"], rtol=0, atol=1e-12)
+
+
+def test_bad_model_fails_the_job_not_the_worker(queue, applicants_csv):
+    bad = submit(queue, applicants_csv, model_path=MODEL_DIR / "no_such_model.pkl")
+    good = submit(queue, applicants_csv)
+
+    bad = wait_for(queue, bad["job_id"])
+    assert bad["state"] == "failed"
+    assert "no_such_model" in bad["error"]
+    assert wait_for(queue, good["job_id"])["state"] == "done"
+    assert queue.stats()["alive"] == 1
+
+
+def test_dead_worker_is_replaced(queue, applicants_csv):
+    restarts = queue.restarts
+    queue._processes[0].kill()
+    deadline = time.time() + 30
+    while queue.restarts == restarts and time.time() < deadline:
+        time.sleep(0.1)
+    assert queue.restarts == restarts + 1
+
+    job = wait_for(queue, submit(queue, applicants_csv)["job_id"])
+    assert job["state"] == "done"
+
+
+def test_reclaimed_job_refuses_old_claim(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite")
+    store.create({
+        "job_id": "j1", "state": "queued", "model": MODEL_FILE, "model_path": "m",
+        "reference_date": REFERENCE_DATE, "input_format": "csv", "output_format": "parquet",
+        "submitted_at": time.time(),
+    })
+    first = store.claim(pid=1, stale_seconds=60)
+    assert store.claim(pid=2, stale_seconds=60) is None
+    assert store.progress("j1", first["claim_token"], 10) is False
+
+    second = store.claim(pid=2, stale_seconds=-1)
+    assert second["claim_token"] != first["claim_token"]
+    assert store.progress("j1", first["claim_token"], 20) is True
+    assert store.finish("j1", first["claim_token"], "done") is False
+    assert store.get("j1")["state"] == "running"
+
+    assert store.progress("j1", second["claim_token"], 5) is False
+    assert store.finish("j1", second["claim_token"], "done", rows_total=5) is True
+    job = store.get("j1")
+    assert (job["state"], job["rows_done"], job["rows_total"], job["worker_pid"]) == ("done", 5, 5, 2)
+    store.close()
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+
+from metrics import HTTP_REQUESTS, HTTP_SECONDS, HTTPMetricsMiddleware, MetricsRegistry
+
+
+def test_counter_rendering_escapes_label_values():
+    registry = MetricsRegistry()
+    counter = registry.counter("pd_things", "Things seen.", ("model",))
+    counter.labels('a "quoted"\\path\nline').inc()
+    counter.labels("plain").inc(2)
+
+    assert registry.render().splitlines() == [
+        "# HELP pd_things_total Things seen.",
+        "# TYPE pd_things_total counter",
+        'pd_things_total{model="a \\"quoted\\"\\\\path\\nline"} 1.0',
+        'pd_things_total{model="plain"} 2.0',
+    ]
+
+
+def test_histogram_rendering_is_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("pd_wait_seconds", "Waits.", ("path",), buckets=(2, 1))
+    child = histogram.labels("api")
+    for value in (0.5, 1.0, 1.5, 5):
+        child.observe(value)
+
+    assert registry.render().splitlines()[2:] == [
+        'pd_wait_seconds_bucket{path="api",le="1.0"} 2',
+        'pd_wait_seconds_bucket{path="api",le="2.0"} 3',
+        'pd_wait_seconds_bucket{path="api",le="+Inf"} 4',
+        'pd_wait_seconds_sum{path="api"} 8.0',
+        'pd_wait_seconds_count{path="api"} 4',
+    ]
+
+
+def test_callback_rendering():
+    registry = MetricsRegistry()
+    registry.add_callback(lambda: [
+        ("pd_models_loaded", "gauge", "Models in memory.", [({}, 2), ({"model": 'x"y'}, 1)]),
+    ])
+    assert registry.render().splitlines() == [
+        "# HELP pd_models_loaded Models in memory.",
+        "# TYPE pd_models_loaded gauge",
+        "pd_models_loaded 2.0",
+        'pd_models_loaded{model="x\\"y"} 1.0',
+    ]
+
+
+def call(app, method: str, path: str) -> int:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "http_version": "1.1", "method": method, "path": path, "raw_path": path.encode(),
+        "root_path": "", "scheme": "http", "query_string": b"", "headers": [],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+    return next(m["status"] for m in sent if m["type"] == "http.response.start")
+
+
+def requests_for(method: str, route: str, status: str) -> float:
+    return HTTP_REQUESTS.labels(method, route, status).value
+
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+
+    @app.post("/models/{name}/activate")
+    def activate(name: str):
+        return {"model": name}
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(HTTPMetricsMiddleware)
+    route = "/models/{name}/activate"
+    before = requests_for("POST", route, "200"), requests_for("GET", "unmatched", "404")
+    timed = sum(HTTP_SECONDS.labels("POST", route).counts)
+
+    assert call(app, "POST", "/models/xgboost_model/activate") == 200
+    assert call(app, "POST", "/models/lightgbm_model/activate") == 200
+    assert call(app, "GET", "/no/such/path") == 404
+    with pytest.raises(RuntimeError):
+        call(app, "GET", "/boom")
+
+    # One series per template, whatever the path parameters
+    assert requests_for("POST", route, "200") == before[0] + 2
+    assert requests_for("GET", "unmatched", "404") == before[1] + 1
+    assert requests_for("GET", "/boom", "500") >= 1
+    assert sum(HTTP_SECONDS.labels("POST", route).counts) == timed + 2
+    assert not any(key[1].startswith("/models/xgboost") for key in HTTP_REQUESTS._children)
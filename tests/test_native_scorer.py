@@ -0,0 +1,83 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from compiled_scorer import CompiledScorer
+from conftest import REFERENCE_DATE
+from export_native import PARITY_TOLERANCE, export, export_model_spec
+from features import engineer_features_for_scoring, engineer_features_record
+from native_scorer import NATIVE_SUFFIX, SPEC_FORMAT, NativeScorer
+from scoring import MODEL_DIR, drop_leakage, load_model
+from synthetic import make_applicants
+from test_compiled_scorer import PICKLES, awkward_applicants
+from train import CATEGORICAL_FEATURES, FEATURES, build_preprocessor
+
+
+@pytest.fixture(scope="module")
+def applicants() -> pd.DataFrame:
+    df = awkward_applicants()
+    df.loc[6:9, "Loan_Purpose"] = [None, np.nan, pd.NA, None]
+    return df
+
+
+@pytest.fixture(scope="module", params=PICKLES)
+def exported(request, tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp("native")
+    export(request.param, check_rows=2000, tolerance=PARITY_TOLERANCE, out_dir=out_dir)
+    native = NativeScorer.load(out_dir / (MODEL_DIR / request.param).with_suffix(NATIVE_SUFFIX).name)
+    return load_model(request.param), native
+
+
+def assert_native_matches(pipe, native: NativeScorer, applicants: pd.DataFrame):
+    df_fe = drop_leakage(engineer_features_for_scoring(applicants, REFERENCE_DATE))
+    if native.model_type == "linear":
+        # Linear models reject NaN inputs in sklearn too: compare complete rows
+        complete = np.isfinite(native.encode_frame(df_fe)).all(axis=1)
+        applicants, df_fe = applicants[complete], df_fe[complete]
+    expected = pipe.predict_proba(df_fe)[:, 1]
+
+    records = applicants.to_dict("records")
+    records_fe = [engineer_features_record(r, REFERENCE_DATE) for r in records]
+    frame = native.predict_proba(df_fe)[:, 1]
+    batch = native.predict_proba_encoded(native.encode_many(records_fe))
+    single = np.array([native.predict_pd(r, REFERENCE_DATE) for r in records])
+
+    np.testing.assert_allclose(frame, expected, rtol=0, atol=PARITY_TOLERANCE)
+    np.testing.assert_allclose(batch, expected, rtol=0, atol=PARITY_TOLERANCE)
+    np.testing.assert_allclose(single, expected, rtol=0, atol=PARITY_TOLERANCE)
+
+
+def test_exported_models_match_pipeline(exported, applicants):
+    pipe, native = exported
+    assert_native_matches(pipe, native, applicants)
+
+
+def test_fitted_missing_category_matches_pipeline(applicants, tmp_path):
+    # A category fitted on NaN must catch NaN / None / pd.NA at scoring time
+    from sklearn.pipeline import Pipeline
+    from xgboost import XGBClassifier
+
+    train = make_applicants(600, seed=3).astype({"Loan_Purpose": object})
+    train.loc[::7, "Loan_Purpose"] = np.nan
+    df_fe = engineer_features_for_scoring(train, REFERENCE_DATE)[FEATURES]
+    target = np.random.default_rng(3).integers(0, 2, len(df_fe))
+    pipe = Pipeline(steps=[
+        ("preprocess", build_preprocessor()),
+        ("model", XGBClassifier(n_estimators=20, max_depth=3, n_jobs=1)),
+    ]).fit(df_fe, target)
+
+    compiled = CompiledScorer(pipe)
+    assert "Loan_Purpose" in compiled.missing_index
+    assert set(compiled.missing_index) <= set(CATEGORICAL_FEATURES)
+
+    spec = {
+        "format": SPEC_FORMAT,
+        **compiled.encoder_spec(),
+        "model": export_model_spec(pipe.named_steps["model"], tmp_path),
+    }
+    native = NativeScorer(json.loads(json.dumps(spec)), tmp_path)
+    assert native.missing_index == compiled.missing_index
+
+    assert_native_matches(pipe, native, applicants)
@@ -0,0 +1,103 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import REFERENCE_DATE
+from pd_cache import MemoryBackend, PDCache, SQLiteBackend, frame_digests, record_digest
+from registry import ModelRegistry
+from scoring import MODEL_DIR, MODEL_FILE, load_model, load_model_config, score_new_applications
+from synthetic import make_applicants
+
+RESULT = (0.1, 0, "Low")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_entries=2)
+    return SQLiteBackend(tmp_path / "pd_cache.sqlite", max_entries=2)
+
+
+def test_lru_eviction(backend):
+    backend.set_many([(("m:1", "a"), RESULT), (("m:1", "b"), RESULT)], expires_at=1e12)
+    # Reading a makes b the least recently used
+    now = 2e9
+    assert backend.get_many([("m:1", "a")], now) == {("m:1", "a"): RESULT}
+    backend.set_many([(("m:1", "c"), RESULT)], expires_at=1e12)
+
+    assert len(backend) == 2
+    assert backend.evictions == 1
+    assert set(backend.get_many([("m:1", k) for k in "abc"], now + 1)) == {("m:1", "a"), ("m:1", "c")}
+
+
+def test_ttl_expiry(backend):
+    backend.set_many([(("m:1", "a"), RESULT)], expires_at=2e9)
+    assert backend.get_many([("m:1", "a")], 2e9 - 1) == {("m:1", "a"): RESULT}
+    assert backend.get_many([("m:1", "a")], 2e9) == {}
+
+
+def test_invalidate_drops_one_model(backend):
+    backend.max_entries = 10
+    keys = [("xgboost_model:01|2025-01-31", "a"), ("xgboost_model:02|2025-01-31", "b"), ("xgboost_model_v2:01|2025-01-31", "c")]
+    backend.set_many([(key, RESULT) for key in keys], expires_at=1e12)
+
+    backend.invalidate("xgboost_model")
+    assert set(backend.get_many(keys, 0)) == {keys[2]}
+    backend.invalidate()
+    assert len(backend) == 0
+
+
+def test_record_and_frame_digests():
+    df = make_applicants(3, seed=2)
+    records = df.to_dict("records")
+    assert record_digest(records[0]) == record_digest({**records[0], "Customer_ID": 999})
+    assert record_digest(records[0]) != record_digest({**records[0], "Region": " " + records[0]["Region"]})
+    digests = frame_digests(df)
+    assert len(set(digests)) == 3
+    assert digests == frame_digests(df.assign(Customer_ID=0))
+
+
+def test_registry_changes_invalidate(tmp_path):
+    for version in ("01", "02"):
+        for suffix in (".pkl", ".json"):
+            shutil.copy(MODEL_DIR / f"xgboost_model_01{suffix}", tmp_path / f"xgboost_model_{version}{suffix}")
+    registry = ModelRegistry(tmp_path, "xgboost_model")
+    cache = PDCache(MemoryBackend(100))
+    registry.add_listener(cache.invalidate)
+
+    def fill():
+        cache.store("xgboost_model:02|2025-01-31", {"a": RESULT})
+        cache.store("other_model:01|2025-01-31", {"b": RESULT})
+
+    fill()
+    registry.activate("xgboost_model", "01", warm=False)
+    assert len(cache.backend) == 1
+    assert cache.lookup("other_model:01|2025-01-31", ["b"]) == {"b": RESULT}
+
+    # An overwritten file drops its warm copy, and its cached PDs with it
+    fill()
+    registry.get("xgboost_model", "01")
+    stamp = (tmp_path / "xgboost_model_01.pkl").stat().st_mtime + 10
+    os.utime(tmp_path / "xgboost_model_01.pkl", (stamp, stamp))
+    registry.refresh()
+    assert len(cache.backend) == 1
+
+
+def test_partial_hits_match_uncached_scoring():
+    pipe, config = load_model(MODEL_FILE), load_model_config(MODEL_FILE)
+    df = make_applicants(200, seed=3)
+    df = df.iloc[np.r_[0:200, 0:20]].reset_index(drop=True)  # duplicates score once
+    expected = score_new_applications(df, pipe, config, reference_date=REFERENCE_DATE)
+
+    cache = PDCache(MemoryBackend(1000))
+    bound = cache.for_model("xgboost_model:01")
+    score_new_applications(df.iloc[::3], pipe, config, reference_date=REFERENCE_DATE, cache=bound)
+    hits = cache.hits
+    scored = score_new_applications(df, pipe, config, reference_date=REFERENCE_DATE, cache=bound)
+
+    assert cache.hits - hits == len(set(frame_digests(df.iloc[::3])))
+    np.testing.assert_array_equal(scored["PD_Default"], expected["PD_Default"])
+    assert scored["Default_Pred"].tolist() == expected["Default_Pred"].tolist()
+    assert scored["Risk_Band"].astype(str).tolist() == expected["Risk_Band"].astype(str).tolist()
@@ -0,0 +1,106 @@
+import json
+import re
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio import REPORTS, SKETCH_RELATIVE_ERROR, PortfolioAnalytics, PortfolioStore
+from synthetic import make_applicants
+
+ROWS = 3000
+SQL_FILE = Path(__file__).resolve().parents[1] / "SQL Portfolio Analysis" / "Loan_Application_Analysis.sql"
+
+
+@pytest.fixture(scope="module")
+def loans() -> pd.DataFrame:
+    # The loan_applications export: outcomes, every credit band and a few NULLs
+    df = make_applicants(ROWS, seed=12)
+    rng = np.random.default_rng(12)
+    df["Credit_Score"] = rng.integers(300, 851, ROWS)
+    df["Defaulted"] = (rng.random(ROWS) < 0.2).astype(int)
+    df["Approval_Status"] = rng.choice(["Approved", "Rejected", "Pending"], ROWS)
+    df.loc[rng.choice(ROWS, 40, replace=False), "Property_Ownership"] = None
+    df.loc[rng.choice(ROWS, 25, replace=False), "Income"] = np.nan
+    df.loc[rng.choice(ROWS, 15, replace=False), "Region"] = None
+    return df
+
+
+def sql_reports() -> dict:
+    """
+    Every aggregate query of the SQL file, in file order (the order of REPORTS).
+    """
+    statements = [s.strip() for s in re.sub(r"--[^\n]*", "", SQL_FILE.read_text()).split(";")]
+    queries = [s for s in statements if s and "SELECT *" not in s]
+    assert len(queries) == len(REPORTS) - 2  # the two PD reports read scored batches only
+    return dict(zip(REPORTS, queries))
+
+
+def by_dims(df: pd.DataFrame, dims: list) -> pd.DataFrame:
+    return df.sort_values(dims, na_position="last").reset_index(drop=True) if dims else df
+
+
+def test_reports_match_the_sql(loans):
+    conn = sqlite3.connect(":memory:")
+    loans.to_sql("loan_applications", conn, index=False)
+    analytics = PortfolioAnalytics.from_frame(loans)
+
+    for name, query in sql_reports().items():
+        expected = pd.read_sql_query(query, conn)
+        dims = list(REPORTS[name]["dims"])
+        report = analytics.report(name)
+        if "order_by" in REPORTS[name]:
+            column, ascending = REPORTS[name]["order_by"]
+            assert report[column].is_monotonic_increasing if ascending else report[column].is_monotonic_decreasing
+        pd.testing.assert_frame_equal(
+            by_dims(report[list(expected.columns)], dims), by_dims(expected, dims),
+            check_dtype=False, rtol=1e-9, obj=name,
+        )
+    conn.close()
+
+
+def test_quantiles_within_sketch_error(loans):
+    report = PortfolioAnalytics.from_frame(loans).report("income_by_education")
+    for row in report.itertuples():
+        income = loans.loc[loans["Education_Level"] == row.Education_Level, "Income"].dropna().sort_values()
+        # The sketch answers the rank-(q * (n - 1)) value within its relative error
+        exact = income.iloc[int(0.5 * (len(income) - 1))]
+        assert row.median_income == pytest.approx(exact, rel=SKETCH_RELATIVE_ERROR)
+
+
+def test_split_and_merge_equals_one_pass(loans):
+    whole = PortfolioAnalytics.from_frame(loans)
+    merged = PortfolioAnalytics()
+    for part in np.array_split(np.arange(ROWS), 4):
+        merged.merge(PortfolioAnalytics.from_frame(loans.iloc[part]))
+
+    assert merged.rows == whole.rows == ROWS
+    for name in REPORTS:
+        dims = list(REPORTS[name]["dims"])
+        pd.testing.assert_frame_equal(by_dims(merged.report(name), dims), by_dims(whole.report(name), dims), rtol=1e-9)
+
+
+def test_store_counts_a_batch_once(loans, tmp_path):
+    first, second = loans.iloc[:1000], loans.iloc[1000:]
+    store = PortfolioStore(tmp_path / "portfolio.sqlite")
+    assert store.merge(PortfolioAnalytics.from_frame(first), "batch-1")
+    assert store.merge(PortfolioAnalytics.from_frame(second), "batch-2")
+    assert not store.merge(PortfolioAnalytics.from_frame(first), "batch-1")
+    assert store.stats()["batches"] == 2
+    assert store.stats()["rows"] == ROWS
+
+    whole = PortfolioAnalytics.from_frame(loans)
+    for name in ("regional_loan_demand", "default_rate_by_credit_band", "customer_demographics"):
+        dims = list(REPORTS[name]["dims"])
+        pd.testing.assert_frame_equal(by_dims(store.report(name), dims), by_dims(whole.report(name), dims), rtol=1e-9)
+    store.close()
+
+
+def test_dict_round_trip(loans):
+    analytics = PortfolioAnalytics.from_frame(loans.iloc[:500])
+    restored = PortfolioAnalytics.from_dict(json.loads(json.dumps(analytics.to_dict())))
+    assert restored.rows == analytics.rows
+    for name in REPORTS:
+        pd.testing.assert_frame_equal(restored.report(name), analytics.report(name))
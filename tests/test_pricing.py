@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import REFERENCE_DATE
+from features import ANNUAL_RATE
+from pricing import OFFER_COLUMNS, PricingEngine
+from scoring import MODEL_FILE, load_model, load_model_config, score_new_applications
+from synthetic import LOAN_TERMS, make_applicants
+
+RATES = [0.08, ANNUAL_RATE, 0.16]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return load_model(MODEL_FILE), load_model_config(MODEL_FILE)
+
+
+@pytest.fixture(scope="module")
+def applicants() -> pd.DataFrame:
+    return make_applicants(120, seed=17)
+
+
+def engine(model, **kwargs) -> PricingEngine:
+    pipe, config = model
+    return PricingEngine(pipe, config, RATES, LOAN_TERMS, reference_date=REFERENCE_DATE, **kwargs)
+
+
+def test_model_rate_and_own_term_match_scoring(model, applicants):
+    tensors = engine(model).price_chunk(applicants)
+    scored = score_new_applications(applicants, *model, reference_date=REFERENCE_DATE)
+
+    own_term = np.searchsorted(LOAN_TERMS, applicants["Loan_Term_Months"])
+    at_model_rate = tensors["PD_Default"][np.arange(len(applicants)), RATES.index(ANNUAL_RATE), own_term]
+    np.testing.assert_array_equal(at_model_rate, scored["PD_Default"])
+
+
+def test_chunking_gives_the_same_offers(model, applicants):
+    whole = engine(model).offers(applicants)
+    small = engine(model, max_cells=7 * len(RATES) * len(LOAN_TERMS))
+    assert small.chunk_rows == 7
+    pd.testing.assert_frame_equal(small.offers(applicants), whole)
+    assert (whole["Approvable_Offers"] > 0).any()
+
+
+def test_best_offer_tie_break(model):
+    # Every grid point costs 3,600 in total: the lower rate wins, then the shorter term
+    pipe, config = model
+    pricing = PricingEngine(pipe, config, [0.10, 0.20], [36, 48], reference_date=REFERENCE_DATE)
+    installment = np.broadcast_to(3600 / pricing.terms, (3, 2, 2)).copy()
+    approvable = np.ones((3, 2, 2), dtype=bool)
+    approvable[1, 0, :] = False
+    approvable[2] = False
+    offers = pricing.best_offers({
+        "Monthly_Installment": installment,
+        "Affordability_Score": np.full((3, 2, 2), 50.0),
+        "PD_Default": np.full((3, 2, 2), 0.01),
+        "Approvable": approvable,
+    })
+
+    np.testing.assert_array_equal(offers["Offer_Rate"], [0.10, 0.20, np.nan])
+    np.testing.assert_array_equal(offers["Offer_Term"], [36, 36, np.nan])
+    np.testing.assert_array_equal(offers["Approvable_Offers"], [4, 2, 0])
+    assert offers["Offer_Risk_Band"][2] is None
+
+
+def test_no_approvable_offer_is_empty(model, applicants):
+    offers = engine(model, min_affordability=101).offers(applicants)
+    assert (offers["Approvable_Offers"] == 0).all()
+    assert offers["Offer_Risk_Band"].isna().all()
+    assert offers[[c for c in OFFER_COLUMNS if c not in ("Offer_Risk_Band", "Approvable_Offers")]].isna().all().all()
@@ -0,0 +1,112 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from registry import ModelRegistry, parse_artefact_name
+from scoring import MODEL_DIR
+
+
+def install(model_dir: Path, source: str, target: str):
+    for suffix in (".pkl", ".json"):
+        shutil.copy(MODEL_DIR / f"{source}{suffix}", model_dir / f"{target}{suffix}")
+
+
+@pytest.fixture
+def model_dir(tmp_path) -> Path:
+    install(tmp_path, "xgboost_model_01", "xgboost_model_01")
+    install(tmp_path, "xgboost_model_01", "xgboost_model_02")
+    install(tmp_path, "lightgbm_model_01", "lightgbm_model_01")
+    return tmp_path
+
+
+@pytest.fixture
+def notified():
+    return []
+
+
+@pytest.fixture
+def registry(model_dir, notified) -> ModelRegistry:
+    registry = ModelRegistry(model_dir, "xgboost_model", max_loaded=1)
+    registry.add_listener(notified.append)
+    return registry
+
+
+def test_parse_artefact_name():
+    assert parse_artefact_name(Path("xgboost_model_01.pkl")) == ("xgboost_model", "01")
+    assert parse_artefact_name(Path("logistic_regression_10.pkl")) == ("logistic_regression", "10")
+    assert parse_artefact_name(Path("champion.pkl")) == ("champion", "0")
+
+
+def test_version_resolution(registry, model_dir):
+    assert registry.available() == {"lightgbm_model": ["01"], "xgboost_model": ["01", "02"]}
+    assert registry.resolve() == ("xgboost_model:02", model_dir / "xgboost_model_02.pkl")
+    assert registry.resolve(version="01")[0] == "xgboost_model:01"
+    assert registry.resolve("lightgbm_model")[0] == "lightgbm_model:01"
+    with pytest.raises(KeyError):
+        registry.resolve("unknown_model")
+    with pytest.raises(KeyError):
+        registry.resolve(version="07")
+
+    # Versions compare as numbers, not strings
+    install(model_dir, "xgboost_model_01", "xgboost_model_10")
+    registry.refresh()
+    assert registry.active_version("xgboost_model") == "10"
+
+
+def test_activate_pins_the_version(registry, model_dir, notified):
+    model = registry.activate("xgboost_model", "01")
+    assert model.key == "xgboost_model:01"
+    assert model.warmup_seconds > 0
+    assert registry.get().key == "xgboost_model:01"
+    assert notified == ["xgboost_model"]
+
+    # A newer file does not unseat a pinned version
+    install(model_dir, "xgboost_model_01", "xgboost_model_03")
+    registry.refresh()
+    assert registry.available()["xgboost_model"] == ["01", "02", "03"]
+    assert registry.active_version("xgboost_model") == "01"
+    assert notified == ["xgboost_model"]
+
+    # Activating the active version again changes nothing
+    registry.activate("xgboost_model", "01")
+    assert notified == ["xgboost_model"]
+
+    # Once the pinned file is gone the latest version takes over
+    for suffix in (".pkl", ".json"):
+        (model_dir / f"xgboost_model_01{suffix}").unlink()
+    registry.refresh()
+    assert registry.active_version("xgboost_model") == "03"
+    assert notified == ["xgboost_model", "xgboost_model"]
+
+
+def test_refresh_reloads_an_overwritten_file(registry, model_dir, notified):
+    first = registry.get()
+    assert registry.get() is first
+    registry.refresh()
+    assert registry.get() is first
+    assert notified == []
+
+    artefact = model_dir / "xgboost_model_02.pkl"
+    stamp = artefact.stat().st_mtime + 10
+    os.utime(artefact, (stamp, stamp))
+    registry.refresh()
+    assert notified == ["xgboost_model"]
+    assert registry.get() is not first
+
+
+def test_reload_after_eviction_is_warm(registry):
+    first = registry.get()
+    assert first.warmup_seconds > 0
+    registry.get("lightgbm_model")
+    assert registry.peek() is None
+
+    reloaded = registry.get()
+    assert reloaded is not first
+    assert reloaded.warmup_seconds > 0
+    assert [m["model"] for m in registry.loaded()] == ["xgboost_model"]
+
+    cold = ModelRegistry(registry.model_dir, "xgboost_model", warm_on_load=False)
+    assert cold.get().warmup_seconds == 0.0
+    assert cold.warm_up()[0].warmup_seconds > 0
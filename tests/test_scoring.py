@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from conftest import REFERENCE_DATE
+from scoring import DEFAULT_MODEL_CONFIG, MODEL_FILE, apply_decision, load_model, score_new_applications
+from synthetic import make_applicants
+
+CONFIG = {
+    "decision_threshold": 0.3,
+    "risk_band_cutoffs": [0.1, 0.2, 0.5],
+    "risk_band_labels": ["A", "B", "C", "D"],
+}
+
+
+def test_default_cutoffs_at_the_boundaries():
+    proba = np.array([0.0, 0.2499, 0.25, 0.3999, 0.4, 0.5, 0.5001, 1.0, np.nan])
+    pred, band = apply_decision(proba, DEFAULT_MODEL_CONFIG)
+    # Class 1 only above the threshold; a PD at a cut-off is in the band above
+    assert pred.tolist() == [0, 0, 0, 0, 0, 0, 1, 1, 0]
+    assert band.tolist() == [
+        "Low Risk", "Low Risk", "Medium Risk", "Medium Risk", "High Risk",
+        "High Risk", "High Risk", "High Risk", "Low Risk",
+    ]
+
+
+def test_configured_cutoffs():
+    proba = np.array([0.05, 0.1, 0.15, 0.2, 0.3, 0.3001, 0.5, 0.99])
+    pred, band = apply_decision(proba, CONFIG)
+    assert pred.tolist() == [0, 0, 0, 0, 0, 1, 1, 1]
+    assert band.tolist() == ["A", "B", "B", "C", "C", "C", "D", "D"]
+
+
+def test_scoring_uses_the_given_config():
+    applicants = make_applicants(200, seed=5)
+    pipe = load_model(MODEL_FILE)
+    scored = score_new_applications(applicants, pipe, CONFIG, reference_date=REFERENCE_DATE)
+
+    pred, band = apply_decision(scored["PD_Default"].to_numpy(dtype="float64"), CONFIG)
+    assert scored["Default_Pred"].tolist() == pred.tolist()
+    assert scored["Risk_Band"].astype(str).tolist() == band.tolist()
+    assert set(scored["Risk_Band"].astype(str)) <= set(CONFIG["risk_band_labels"])
+    assert scored["Default_Pred"].mean() == pytest.approx((scored["PD_Default"] > 0.3).mean())
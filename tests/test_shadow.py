@@ -0,0 +1,62 @@
+import logging
+from functools import partial
+
+import numpy as np
+import pytest
+
+from conftest import REFERENCE_DATE
+from registry import ModelRegistry
+from scoring import MODEL_DIR, score_applications
+from shadow import ShadowLog, ShadowScorer
+from synthetic import make_applicants
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return ModelRegistry(MODEL_DIR, "xgboost_model")
+
+
+@pytest.fixture
+def log(tmp_path):
+    return ShadowLog(tmp_path / "shadow.sqlite")
+
+
+def test_microbatch_is_one_shadow_job(registry, log):
+    champion = registry.get("xgboost_model")
+    challenger = registry.get("lightgbm_model")
+    shadow = ShadowScorer(lambda: [challenger], log)
+    records = make_applicants(40, seed=2).to_dict("records")
+
+    score_applications(
+        records, champion.scorer, champion.config,
+        shadow=partial(shadow.submit_records, champion=champion.key),
+        reference_date=REFERENCE_DATE,
+    )
+    shadow.close()
+
+    assert shadow.stats()["submitted"] == 1
+    logged = ShadowLog(log.path).read().sort_values("row_number")
+    assert len(logged) == len(records)
+    assert logged["request_id"].nunique() == 1
+    assert logged["customer_id"].tolist() == [str(r["Customer_ID"]) for r in records]
+    expected = [challenger.scorer.predict_pd(r, REFERENCE_DATE) for r in records]
+    np.testing.assert_allclose(logged["challenger_pd"], expected, rtol=0, atol=1e-12)
+
+
+def test_failed_shadow_job_is_logged(registry, log, caplog):
+    champion = registry.get("xgboost_model")
+
+    def challengers():
+        raise RuntimeError("challenger unavailable")
+
+    shadow = ShadowScorer(challengers, log)
+    with caplog.at_level(logging.WARNING, logger="shadow"):
+        score_applications(
+            make_applicants(5, seed=2).to_dict("records"), champion.scorer, champion.config,
+            shadow=partial(shadow.submit_records, champion=champion.key),
+            reference_date=REFERENCE_DATE,
+        )
+        shadow.close()
+
+    assert shadow.stats()["failed"] == 1
+    assert "challenger unavailable" in caplog.text